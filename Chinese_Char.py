@@ -1,18 +1,108 @@
 """Chinese Character Generator for DC-ACE Research.
 
-Generates PNG images of 30 basic Chinese characters using stroke data.
+Generates PNG images of 30 basic Chinese characters (or a set selected by
+complexity, see hanzi_complexity) using stroke data.
 Each character is drawn 3 times with variations in scale/position.
 """
 
 import json
 import turtle
 import os
-import io
-from PIL import Image
+import argparse
+import time
+import random
+import itertools
+import functools
+import multiprocessing as mp
+
+from brush import PROFILES, brush_outline, draw_brush_stroke, fill_outline
+from hanzi_geometry import DEFAULT_TOLERANCE, CharacterGeometryCache
+from hanzi_augment import augment_glyphs
+from hanzi_complexity import add_selection_args, ensure_feature_index, has_selection, selection_from_args
+from render_pipeline import (FRAME_FORMATS, Progress, canvas_postscript, postscript_to_image,
+                             prefetch_samples, render_parallel, save_frames)
+from sharding import add_shard_args, check_shard_args, shard_dir, shard_of, task_seed, write_manifest
+from task_catalog import DEFAULT_CATALOG, add_catalog_arg, write_catalog
+from perceptual_hash import HASH_VERSION, add_dedupe_args, deduper_from_args, file_phash, resolve_dataset
+
+# 30 basic characters: (character, pinyin, meaning, description)
+CHARACTERS = [
+    ("一", "yī", "one", "horizontal line"),
+    ("人", "rén", "person", "two strokes forming a person"),
+    ("入", "rù", "enter", "two strokes entering downward"),
+    ("八", "bā", "eight", "two strokes separating outward"),
+    ("刀", "dāo", "knife", "curved blade shape"),
+    ("力", "lì", "power/strength", "muscular arm shape"),
+    ("又", "yòu", "again/also", "right hand shape"),
+    ("十", "shí", "ten", "cross/plus shape"),
+    ("工", "gōng", "work/labor", "three horizontal lines"),
+    ("土", "tǔ", "earth/soil", "ground with line above"),
+    ("木", "mù", "wood/tree", "tree with branches"),
+    ("火", "huǒ", "fire", "flames rising"),
+    ("水", "shuǐ", "water", "flowing water"),
+    ("口", "kǒu", "mouth", "square opening"),
+    ("日", "rì", "sun/day", "sun with line inside"),
+    ("月", "yuè", "moon/month", "crescent moon"),
+    ("田", "tián", "field", "rice field grid"),
+    ("目", "mù", "eye", "eye with pupils"),
+    ("白", "bái", "white", "sun with line"),
+    ("山", "shān", "mountain", "three peaks"),
+    ("女", "nǚ", "woman", "seated figure"),
+    ("子", "zǐ", "child", "baby with arms up"),
+    ("夕", "xī", "evening", "crescent moon"),
+    ("大", "dà", "big/large", "person with arms spread"),
+    ("小", "xiǎo", "small/little", "three small dots"),
+    ("王", "wáng", "king", "three horizontal lines with vertical"),
+    ("车", "chē", "vehicle/car", "cart from above"),
+    ("贝", "bèi", "shell/treasure", "cowrie shell"),
+    ("门", "mén", "door/gate", "two door panels"),
+    ("言", "yán", "speech/words", "mouth speaking"),
+]
+
+# Variations for 3 samples (scale, offset_x, offset_y)
+VARIATIONS = [
+    (0.5, 0, 0),      # Sample 1: Medium, centered
+    (0.6, -30, 20),   # Sample 2: Larger, offset left-up
+    (0.45, 25, -15),  # Sample 3: Smaller, offset right-down
+]
+
+# Brush width for medians in graphics.txt units (1024 per em), scaled with the glyph
+MEDIAN_BRUSH_WIDTH = 64
+
+# "median": pen along the stroke skeletons; "outline": filled SVG stroke outlines
+RENDER_MODES = ("median", "outline")
+
+def character_prompt(char, pinyin, meaning, description):
+    if not pinyin:  # a selected character without hand annotations
+        return f"Draw Chinese character '{char}'"
+    return f"Draw Chinese character '{char}' ({pinyin}, meaning: {meaning}) - {description}"
+
+def character_rows(selected=None, annotated=CHARACTERS):
+    """(character, pinyin, meaning, description) rows to generate.
+
+    `selected` characters (e.g. a hanzi_complexity selection) take their
+    annotations from `annotated` where it has them; without a selection the
+    hand-curated `annotated` list itself is used.
+    """
+    if selected is None:
+        return list(annotated)
+    known = {row[0]: row for row in annotated}
+    return [known.get(c, (c, "", "", "")) for c in selected]
 
 class ChineseCharacterGenerator:
-    def __init__(self, file_path):
-        """Load character stroke data from graphics.txt"""
+    characters = CHARACTERS
+    variations = VARIATIONS
+
+    def __init__(self, file_path, brush=None, mode="median", tolerance=DEFAULT_TOLERANCE, geometry_cache=None):
+        """Load character stroke data from graphics.txt
+
+        `brush` names a brush.PROFILES width profile; medians are then filled
+        as calligraphic outlines instead of drawn with a 4px pen. mode="outline"
+        fills the true glyph outlines, flattened within `tolerance` glyph units.
+        `geometry_cache` is a directory that keeps prepared geometry across runs.
+        """
+        self.brush = brush
+        self.mode = mode
         self.data_map = {}
         print(f"Loading character database from {file_path}...")
         with open(file_path, 'r', encoding='utf-8') as f:
@@ -20,55 +110,118 @@ class ChineseCharacterGenerator:
                 item = json.loads(line)
                 self.data_map[item['character']] = item
         print(f"✅ Loaded {len(self.data_map)} characters")
+        self.geometry = CharacterGeometryCache(self.data_map, cache_dir=geometry_cache, tolerance=tolerance)
+
+    def _open_screen(self):
+        """Initialize the Turtle screen and pen used for character drawing"""
+        screen = turtle.Screen()
+        screen.setup(600, 600)
+        screen.bgcolor("white")
+        turtle.tracer(0, 0)  # Disable animation for speed
+
+        t = turtle.Turtle()
+        t.hideturtle()
+        t.speed(0)
+        t.pensize(4)
+        t.pencolor("black")
+        return screen, t
+
+    def _close_screen(self):
+        # Always try to close the screen
+        try:
+            turtle.Screen().bye()
+        except:
+            pass
+        # Reset turtle module
+        turtle.TurtleScreen._RUNNING = True
+        self.__dict__.pop("_screen", None)
+        self.__dict__.pop("_t", None)
+
+    def _persistent_screen(self):
+        # One screen kept open across jobs (corpus and frame workers)
+        if not hasattr(self, "_screen"):
+            self._screen, self._t = self._open_screen()
+        return self._screen, self._t
+
+    def _stroke_steps(self, t, char, scale, offset_x, offset_y, augment=None):
+        """Draw `char` (or its `augment` = (seed, variant, count) variant) one stroke per step."""
+        if augment:
+            strokes, widths = self._augmented(char, *augment)
+            yield from self._draw_strokes(t, strokes, scale, offset_x, offset_y, widths)
+        elif self.mode == "outline":
+            yield from self._draw_outlines(t, char, scale, offset_x, offset_y)
+        else:
+            yield from self._draw_medians(t, char, scale, offset_x, offset_y)
+
+    def _draw_char(self, t, char, scale, offset_x, offset_y, augment=None):
+        for _ in self._stroke_steps(t, char, scale, offset_x, offset_y, augment):
+            pass
+
+    def _draw_outlines(self, t, char, scale, offset_x, offset_y):
+        # Cached polygons; each variation is only an affine map plus one fill per stroke
+        for stroke in self.geometry.outlines(char):
+            for poly in stroke:
+                fill_outline(t, poly * scale + (offset_x, offset_y))
+            yield
+
+    def _draw_medians(self, t, char, scale, offset_x, offset_y):
+        # Cached medians, already centered on the 1024 em (y stays up like turtle's)
+        yield from self._draw_strokes(t, self.geometry.medians(char), scale, offset_x, offset_y)
 
-    def draw_to_png(self, char, output_path, scale=0.5, offset_x=0, offset_y=0):
-        """Draw a Chinese character and save as PNG"""
+    def _draw_strokes(self, t, strokes, scale, offset_x, offset_y, widths=None):
+        # `widths` optionally scales the pen/brush width per stroke
+        for i, stroke in enumerate(strokes):
+            pts = stroke * scale + (offset_x, offset_y)
+            factor = 1.0 if widths is None else float(widths[i])
+            if self.brush:
+                draw_brush_stroke(t, pts, MEDIAN_BRUSH_WIDTH * scale * factor, self.brush)
+            else:
+                t.pensize(4 * factor)
+                t.penup()
+                t.goto(*pts[0])
+                t.pendown()
+                for x, y in pts[1:].tolist():
+                    t.goto(x, y)
+            yield
+
+    def draw_frames(self, char, scale=0.5, offset_x=0, offset_y=0, augment=None):
+        """Yield one RGBA image per stroke: the character after strokes 1..k.
+
+        Strokes go through the same turtle routines and PostScript rasterizer
+        as draw_to_png, on a screen kept open across calls, so the last frame
+        is the dataset image. `augment` = (seed, variant, count) draws an
+        augmented variant, as corpus jobs do.
+        """
+        screen, t = self._persistent_screen()
+        t.clear()
+        for _ in self._stroke_steps(t, char, scale, offset_x, offset_y, augment):
+            turtle.update()
+            yield postscript_to_image(canvas_postscript(screen))
+
+    def draw_to_png(self, char, output_path, scale=0.5, offset_x=0, offset_y=0, progressive=None, frame_ms=400):
+        """Draw a Chinese character and save as PNG
+
+        With `progressive` ("png", "gif" or "apng"), save one frame per stroke
+        instead: a numbered PNG sequence next to `output_path`, or an animation.
+        """
         if char not in self.data_map:
             print(f"❌ Character not found: {char}")
             return False
+        if progressive:
+            paths = save_frames(self.draw_frames(char, scale, offset_x, offset_y), output_path, progressive, frame_ms)
+            if paths:
+                print(f"✅ Saved stroke frames: {paths[0]}")
+            return bool(paths)
 
         success = False
         try:
-            # Initialize Turtle
-            screen = turtle.Screen()
-            screen.setup(600, 600)
-            screen.bgcolor("white")
-            turtle.tracer(0, 0)  # Disable animation for speed
-
-            t = turtle.Turtle()
-            t.hideturtle()
-            t.speed(0)
-            t.pensize(4)
-            t.pencolor("black")
-
-            # Get stroke data
-            medians = self.data_map[char]['medians']
-
-            # Draw each stroke
-            for stroke in medians:
-                t.penup()
-                # Convert coordinates: 1024 coordinate system -> centered Turtle coords
-                # Correct transformation: flip Y-axis only
-                start_x = (stroke[0][0] - 512) * scale + offset_x
-                start_y = (stroke[0][1] - 512) * scale + offset_y
-                t.goto(start_x, start_y)
-                t.pendown()
-
-                for x, y in stroke[1:]:
-                    turtle_x = (x - 512) * scale + offset_x
-                    turtle_y = (y - 512) * scale + offset_y
-                    t.goto(turtle_x, turtle_y)
+            screen, t = self._open_screen()
+            self._draw_char(t, char, scale, offset_x, offset_y)
 
             # Save to PNG
             turtle.update()
-            canvas = screen.getcanvas()
             try:
-                ps = canvas.postscript(colormode="color")
-                b = io.BytesIO(ps.encode("utf-8"))
-                img = Image.open(b)
-                img.load(scale=1)
-                rgba = img.convert("RGBA")
-                rgba.save(output_path, "PNG")
+                postscript_to_image(canvas_postscript(screen)).save(output_path, "PNG")
                 print(f"✅ Saved: {output_path}")
                 success = True
             except Exception as e:
@@ -81,79 +234,297 @@ class ChineseCharacterGenerator:
         except Exception as e:
             print(f"❌ Error drawing {char}: {e}")
         finally:
-            # Always try to close the screen
-            try:
-                turtle.Screen().bye()
-            except:
-                pass
-            # Reset turtle module
-            turtle.TurtleScreen._RUNNING = True
+            self._close_screen()
 
         return success
 
-def generate_all_characters():
-    """Generate 30 basic Chinese characters, 3 samples each"""
-
-    # 30 basic characters with metadata
-    characters = [
-        ("一", "yī", "one", "horizontal line"),
-        ("人", "rén", "person", "two strokes forming a person"),
-        ("入", "rù", "enter", "two strokes entering downward"),
-        ("八", "bā", "eight", "two strokes separating outward"),
-        ("刀", "dāo", "knife", "curved blade shape"),
-        ("力", "lì", "power/strength", "muscular arm shape"),
-        ("又", "yòu", "again/also", "right hand shape"),
-        ("十", "shí", "ten", "cross/plus shape"),
-        ("工", "gōng", "work/labor", "three horizontal lines"),
-        ("土", "tǔ", "earth/soil", "ground with line above"),
-        ("木", "mù", "wood/tree", "tree with branches"),
-        ("火", "huǒ", "fire", "flames rising"),
-        ("水", "shuǐ", "water", "flowing water"),
-        ("口", "kǒu", "mouth", "square opening"),
-        ("日", "rì", "sun/day", "sun with line inside"),
-        ("月", "yuè", "moon/month", "crescent moon"),
-        ("田", "tián", "field", "rice field grid"),
-        ("目", "mù", "eye", "eye with pupils"),
-        ("白", "bái", "white", "sun with line"),
-        ("山", "shān", "mountain", "three peaks"),
-        ("女", "nǚ", "woman", "seated figure"),
-        ("子", "zǐ", "child", "baby with arms up"),
-        ("夕", "xī", "evening", "crescent moon"),
-        ("大", "dà", "big/large", "person with arms spread"),
-        ("小", "xiǎo", "small/little", "three small dots"),
-        ("王", "wáng", "king", "three horizontal lines with vertical"),
-        ("车", "chē", "vehicle/car", "cart from above"),
-        ("贝", "bèi", "shell/treasure", "cowrie shell"),
-        ("门", "mén", "door/gate", "two door panels"),
-        ("言", "yán", "speech/words", "mouth speaking"),
-    ]
+    def iter_samples(self, count, seed=None, characters=None, prefetch=8):
+        """Yield `count` (RGBA ndarray, metadata) pairs without writing to disk.
+
+        Cycles over (character, variation) pairs in list order, shuffled when a
+        seed is given. One screen stays open for the whole stream.
+        """
+        characters = characters or self.characters
+        pairs = [(idx, entry, sample_num, variation)
+                 for idx, entry in enumerate(characters, 1) if entry[0] in self.data_map
+                 for sample_num, variation in enumerate(self.variations, 1)]
+        if not pairs:
+            return
+        if seed is not None:
+            random.Random(seed).shuffle(pairs)
+        order = itertools.cycle(pairs)
+        screen, t = self._open_screen()
+
+        def render_next():
+            idx, (char, pinyin, meaning, description), sample_num, (scale, offset_x, offset_y) = next(order)
+            t.clear()
+            self._draw_char(t, char, scale, offset_x, offset_y)
+            turtle.update()
+            return canvas_postscript(screen), {
+                "id": f"{idx:02d}_{char}_{sample_num}.png",
+                "character": char,
+                "pinyin": pinyin,
+                "meaning": meaning,
+                "description": description,
+                "prompt": character_prompt(char, pinyin, meaning, description),
+                "scale": scale,
+                "offset_x": offset_x,
+                "offset_y": offset_y
+            }
+
+        try:
+            yield from prefetch_samples(render_next, count, prefetch)
+        finally:
+            self._close_screen()
+
+    def render_job(self, job):
+        """Draw one corpus job on a screen kept open across jobs; return (postscript, metadata)."""
+        screen, t = self._persistent_screen()
+        filename, char, scale, offset_x, offset_y, augment = job
+        t.clear()
+        self._draw_char(t, char, scale, offset_x, offset_y, augment)
+        turtle.update()
+        return canvas_postscript(screen), corpus_metadata(job)
+
+    def _augmented(self, char, seed, variant, count):
+        # All `count` variants of a character are drawn in one batch and kept
+        # for the worker's next jobs (a character's jobs are queued together)
+        key = (char, seed, count)
+        if getattr(self, "_augment_key", None) != key:
+            self._augment_key = key
+            self._augment_batch = augment_glyphs([self.geometry.medians(char)], count, seed=task_seed(seed, char))[0]
+        return self._augment_batch[variant - 1]
+
+# ==========================================
+# Corpus Mode
+# ==========================================
+
+CORPUS_DIR = "/Users/peilinwu/Documents/AI memory research/Chinese_corpus"
+GRAPHICS_PATH = "/Users/peilinwu/Documents/AI memory research/draw_character/graphics.txt"
+CORPUS_HASHES = "corpus_phash.json"
+
+def corpus_jobs(characters, variations, augment=0, seed=0):
+    """[(filename, char, scale, offset_x, offset_y, augment)]; names use the code point so they survive filtering.
+
+    With `augment`, each character also gets that many hanzi_augment variants
+    (drawn at the first variation's scale and offset); `augment` in the job is
+    then (seed, variant, count), else None.
+    """
+    jobs = []
+    for char in characters:
+        for n, (scale, offset_x, offset_y) in enumerate(variations, 1):
+            jobs.append((f"{ord(char):05X}_{char}_{n}.png", char, scale, offset_x, offset_y, None))
+        scale, offset_x, offset_y = variations[0]
+        for k in range(1, augment + 1):
+            jobs.append((f"{ord(char):05X}_{char}_a{k}.png", char, scale, offset_x, offset_y, (seed, k, augment)))
+    return jobs
+
+def corpus_metadata(job):
+    filename, char, scale, offset_x, offset_y, augment = job
+    params = {"type": "character", "character": char, "scale": scale,
+              "offset_x": offset_x, "offset_y": offset_y}
+    if augment:
+        params["augment"] = {"seed": augment[0], "variant": augment[1]}
+    return {
+        "id": filename,
+        "level": None,
+        "prompt": f"Draw Chinese character '{char}'",
+        "params": params,
+    }
+
+def _corpus_worker(file_path, brush, mode, geometry_cache, worker):
+    return ChineseCharacterGenerator(file_path, brush, mode, geometry_cache=geometry_cache)
+
+def generate_corpus(characters=None, limit=None, workers=None, resume=True, output_dir=CORPUS_DIR,
+                    graphics_path=GRAPHICS_PATH, brush=None, mode="median", geometry_cache=None,
+                    catalog=DEFAULT_CATALOG, augment=0, seed=0, dedupe=None, variations=VARIATIONS,
+                    metadata_name="corpus.json"):
+    """Render every graphics.txt character (or `characters`) × `variations` across a process pool.
+
+    Each worker keeps one screen open for all its jobs. With `resume`, images
+    already in `output_dir` are skipped, so an interrupted run picks up where
+    it stopped. Writes `metadata_name` (tasks.json schema; its stem is the
+    catalog dataset) for every image present.
+    `augment` adds that many seeded median augmentations per character; they
+    only exist as medians, so mode="outline" with `augment` is rejected.
+    A perceptual_hash.Deduper flags or rejects near-identical variations
+    across the whole corpus; hashes persist in CORPUS_HASHES for resumed runs.
+    """
+    if augment and mode == "outline":
+        raise ValueError("augmented variants are drawn from medians; they cannot be rendered with mode='outline'")
+    gen = ChineseCharacterGenerator(graphics_path)
+    if characters:
+        missing = [c for c in characters if c not in gen.data_map]
+        if missing:
+            print(f"❌ Not in graphics.txt: {''.join(missing)}")
+        characters = [c for c in characters if c in gen.data_map]
+    else:
+        characters = list(gen.data_map)
+    characters = characters[:limit] if limit else characters
+    jobs = corpus_jobs(characters, variations, augment, seed)
+
+    os.makedirs(output_dir, exist_ok=True)
+    existing = set(os.listdir(output_dir)) if resume else set()
+    # Hashes of every image this directory has had, rejected ones included,
+    # so a resumed run neither re-renders rejects nor forgets originals
+    hashes_path = os.path.join(output_dir, CORPUS_HASHES)
+    hashes, rejected_before = {}, set()
+    if dedupe and resume and os.path.exists(hashes_path):
+        with open(hashes_path, encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved["dedupe"].get("hash") == HASH_VERSION:  # keys of an older layout are recomputed
+            hashes = saved["hashes"]
+            if dedupe.reject and saved["dedupe"] == dedupe.config():
+                rejected_before = set(hashes) - existing
+    todo = [job for job in jobs if job[0] not in existing and job[0] not in rejected_before]
+    print(f"\n🖌️  Corpus: {len(characters)} characters × {len(variations) + augment} variations = {len(jobs)} images")
+    if len(todo) < len(jobs):
+        print(f"⏭️  Resuming: {len(jobs) - len(todo)} already rendered")
+    print(f"📂 Output: {output_dir}\n")
+
+    start = time.monotonic()
+    rendered = []
+    if todo:
+        factory = functools.partial(_corpus_worker, graphics_path, brush, mode, geometry_cache)
+        rendered = render_parallel(factory, todo, output_dir, (600, 600, 4), workers=workers, progress="Corpus",
+                                   hashed=dedupe is not None)
+    elapsed = time.monotonic() - start
+
+    present = set(os.listdir(output_dir))
+    metadata = [corpus_metadata(job) for job in jobs if job[0] in present or job[0] in rejected_before]
+    if dedupe:
+        hashes.update((meta["id"], meta["phash"]) for meta in rendered)
+        for meta in metadata:
+            if meta["id"] not in hashes:  # rendered by a run without --dedupe
+                hashes[meta["id"]] = file_phash(os.path.join(output_dir, meta["id"]))
+            meta["phash"] = hashes[meta["id"]]
+        # Decided over the whole corpus in job order, so resumed and fresh runs agree
+        metadata = dedupe.resolve(metadata, output_dir)
+        print(f"🔁 {dedupe.summary()}")
+        with open(hashes_path, "w", encoding="utf-8") as f:
+            json.dump({"dedupe": dedupe.config(), "hashes": hashes}, f)
+    metadata_path = os.path.join(output_dir, metadata_name)
+    with open(metadata_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    if catalog:
+        write_catalog(metadata, metadata_path, catalog)
+
+    print(f"\n✅ Rendered {len(rendered)} images in {elapsed:.1f}s ({len(rendered) / max(elapsed, 1e-9):.1f} img/s); "
+          f"{len(metadata)}/{len(jobs)} in the corpus")
+    print(f"📊 Metadata saved to {metadata_path}")
+
+# ==========================================
+# Stroke-Order Frames
+# ==========================================
+
+FRAMES_DIR = "/Users/peilinwu/Documents/AI memory research/Chinese_frames"
+
+_frame_gen = None
+
+def _init_frame_worker(graphics_path, brush, mode, geometry_cache):
+    global _frame_gen
+    _frame_gen = ChineseCharacterGenerator(graphics_path, brush, mode, geometry_cache=geometry_cache)
+
+def _frame_job(args):
+    char, output_path, fmt, frame_ms, augment = args
+    scale, offset_x, offset_y = VARIATIONS[0]
+    frames = _frame_gen.draw_frames(char, scale, offset_x, offset_y, augment)
+    return char, [os.path.basename(p) for p in save_frames(frames, output_path, fmt, frame_ms)]
+
+def frame_paths(char, output_dir, fmt, variant=None):
+    """Output path for a character's frames (PNG sequences number their files from it).
+
+    `variant` k names the frames of augmented variant k, like corpus images.
+    """
+    ext = "gif" if fmt == "gif" else "png"
+    suffix = f"_a{variant}" if variant else ""
+    return os.path.join(output_dir, f"{ord(char):05X}_{char}{suffix}.{ext}")
+
+def generate_stroke_frames(characters=None, limit=None, workers=None, resume=True, output_dir=FRAMES_DIR,
+                           graphics_path=GRAPHICS_PATH, brush=None, mode="median", geometry_cache=None,
+                           fmt="png", frame_ms=400, augment=0, seed=0):
+    """Stroke-order frames (strokes 1..k) for every graphics.txt character (or `characters`).
+
+    Frames come from draw_frames, so the last frame of a character is the
+    image draw_to_png renders for it. `augment` adds frames for that many
+    seeded median augmentations per character (as in generate_corpus).
+    Characters are spread over a process pool; with `resume`, outputs that
+    already exist are skipped. Writes frames.json.
+    """
+    if augment and mode == "outline":
+        raise ValueError("augmented variants are drawn from medians; they cannot be rendered with mode='outline'")
+    gen = ChineseCharacterGenerator(graphics_path)
+    characters = [c for c in characters if c in gen.data_map] if characters else list(gen.data_map)
+    characters = characters[:limit] if limit else characters
+    os.makedirs(output_dir, exist_ok=True)
+    # (character, augment) per output; augment is (seed, variant, count) or None
+    variants = [(c, None) for c in characters]
+    variants += [(c, (seed, k, augment)) for c in characters for k in range(1, augment + 1)]
+
+    def outputs(char, aug):
+        path = frame_paths(char, output_dir, fmt, aug[1] if aug else None)
+        strokes = len(gen.data_map[char]["medians"])
+        if fmt == "png":
+            stem = os.path.splitext(path)[0]
+            return [f"{stem}_{k:02d}.png" for k in range(1, strokes + 1)]
+        return [path]
+
+    todo = [(c, aug) for c, aug in variants if not (resume and os.path.exists(outputs(c, aug)[-1]))]
+    print(f"\n🎞️  Stroke frames ({fmt}): {len(variants)} drawings, {len(variants) - len(todo)} already done")
+    print(f"📂 Output: {output_dir}\n")
+
+    if todo:
+        progress = Progress(len(todo), "Frames")
+        tasks = [(c, frame_paths(c, output_dir, fmt, aug[1] if aug else None), fmt, frame_ms, aug) for c, aug in todo]
+        initargs = (graphics_path, brush, mode, geometry_cache)
+        with mp.get_context("spawn").Pool(workers, _init_frame_worker, initargs) as pool:
+            for _ in pool.imap_unordered(_frame_job, tasks, chunksize=16):
+                progress.update()
+        progress.summary()
+
+    metadata = []
+    for char, aug in variants:
+        entry = {"character": char, "strokes": len(gen.data_map[char]["medians"]), "format": fmt,
+                 "files": [os.path.basename(p) for p in outputs(char, aug)]}
+        if aug:
+            entry["augment"] = {"seed": aug[0], "variant": aug[1]}
+        metadata.append(entry)
+    metadata_path = os.path.join(output_dir, "frames.json")
+    with open(metadata_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    print(f"📊 Metadata saved to {metadata_path}")
+
+def generate_all_characters(shard=0, num_shards=1, catalog=DEFAULT_CATALOG, brush=None, mode="median",
+                            geometry_cache=None, dedupe=None, characters=None):
+    """Generate `characters` (default: the 30 basic CHARACTERS), 3 samples each"""
+    selected = characters is not None
+    characters = character_rows(characters)
+    variations = VARIATIONS
 
     # Output directory
     output_dir = "/Users/peilinwu/Documents/AI memory research/Chinese_2"
+    if num_shards > 1:
+        output_dir = shard_dir(output_dir, shard, num_shards)
     os.makedirs(output_dir, exist_ok=True)
 
     # Initialize generator
-    graphics_path = "/Users/peilinwu/Documents/AI memory research/draw_character/graphics.txt"
-    gen = ChineseCharacterGenerator(graphics_path)
+    gen = ChineseCharacterGenerator(GRAPHICS_PATH, brush, mode, geometry_cache=geometry_cache)
 
     print(f"\n🖌️  Generating {len(characters)} characters × 3 samples each...")
     print(f"📂 Output: {output_dir}\n")
 
-    # Variations for 3 samples (scale, offset_x, offset_y)
-    variations = [
-        (0.5, 0, 0),      # Sample 1: Medium, centered
-        (0.6, -30, 20),   # Sample 2: Larger, offset left-up
-        (0.45, 25, -15),  # Sample 3: Smaller, offset right-down
-    ]
-
     total = 0
     detailed_metadata = []
+    positions = {}
 
     for idx, (char, pinyin, meaning, description) in enumerate(characters, 1):
         char_samples = []
         for sample_num, (scale, offset_x, offset_y) in enumerate(variations, 1):
             # Filename format: 01_一_1.png, 01_一_2.png, 01_一_3.png
             filename = f"{idx:02d}_{char}_{sample_num}.png"
+            if shard_of(filename, num_shards) != shard:
+                continue
+            positions[filename] = (idx - 1) * len(variations) + sample_num - 1
             output_path = os.path.join(output_dir, filename)
 
             success = gen.draw_to_png(char, output_path, scale, offset_x, offset_y)
@@ -165,6 +536,8 @@ def generate_all_characters():
                     "offset_x": offset_x,
                     "offset_y": offset_y
                 })
+                if dedupe:
+                    char_samples[-1]["phash"] = file_phash(output_path)
 
         detailed_metadata.append({
             "index": idx,
@@ -172,7 +545,7 @@ def generate_all_characters():
             "pinyin": pinyin,
             "meaning": meaning,
             "description": description,
-            "prompt": f"Draw Chinese character '{char}' ({pinyin}, meaning: {meaning}) - {description}",
+            "prompt": character_prompt(char, pinyin, meaning, description),
             "samples": char_samples
         })
 
@@ -184,15 +557,86 @@ def generate_all_characters():
         "total_characters": len(characters),
         "samples_per_character": 3,
         "total_images": total,
-        "description": "DC-ACE Chinese Character Dataset - 30 basic characters with stroke-accurate rendering",
+        "description": (f"DC-ACE Chinese Character Dataset - {len(characters)} selected characters"
+                        if selected else
+                        "DC-ACE Chinese Character Dataset - 30 basic characters with stroke-accurate rendering"),
         "characters": detailed_metadata
     }
 
     import json
+    if dedupe:
+        metadata = resolve_dataset(dedupe, metadata, output_dir, num_shards)
     metadata_path = os.path.join(output_dir, "characters.json")
     with open(metadata_path, 'w', encoding='utf-8') as f:
         json.dump(metadata, f, indent=2, ensure_ascii=False)
+    if num_shards > 1:
+        write_manifest(output_dir, shard, num_shards, None, "characters.json", positions, dedupe)
+    elif catalog:
+        write_catalog(metadata, metadata_path, catalog)
     print(f"📊 Metadata saved to {metadata_path}")
 
+# ==========================================
+# CLI
+# ==========================================
+
+CORPUS_ONLY = ("limit", "workers", "no_resume", "augment", "frames")
+
+def add_corpus_args(parser, default_set, frames=True):
+    """Character choice and --corpus options, shared by the Chinese_Char and Chinese_L3 CLIs."""
+    parser.add_argument("--corpus", action="store_true", help="render every graphics.txt character across a process pool")
+    parser.add_argument("--chars", default=None, help="only these characters (e.g. 山水火)")
+    parser.add_argument("--limit", type=int, default=None, help="corpus: first N characters")
+    parser.add_argument("--workers", type=int, default=None, help="corpus: render processes (default: all cores)")
+    parser.add_argument("--no-resume", action="store_true", help="corpus: re-render images that already exist")
+    parser.add_argument("--augment", type=int, default=0, help="corpus: augmented median variants per character")
+    parser.add_argument("--seed", type=int, default=0, help="corpus: augmentation seed")
+    if frames:
+        parser.add_argument("--frames", choices=FRAME_FORMATS, help="corpus: write per-stroke frames instead of images")
+        parser.add_argument("--frame-ms", type=int, default=400, help="frames: GIF/APNG frame duration")
+    add_selection_args(parser.add_argument_group(f"select characters by complexity (default: {default_set})"))
+
+def characters_from_args(parser, args):
+    """Validate the corpus options; return the chosen characters (None: the generator's default set)."""
+    if not args.corpus:
+        given = [f"--{k.replace('_', '-')}" for k in CORPUS_ONLY if getattr(args, k, None)]
+        if given:
+            parser.error(f"corpus options need --corpus: {', '.join(given)}")
+    if args.dedupe and getattr(args, "frames", None):
+        parser.error("--dedupe does not apply to --frames")
+    if args.augment and args.mode == "outline":
+        parser.error("--augment draws stroke medians; it does not apply to --mode outline")
+    chars = list(args.chars) if args.chars else None
+    if has_selection(args):
+        features = args.catalog or DEFAULT_CATALOG
+        ensure_feature_index(GRAPHICS_PATH, features)
+        selected = selection_from_args(args, features)
+        chars = [c for c in selected if c in chars] if chars else selected
+        if not chars:
+            parser.exit(1, "❌ No characters match the complexity range\n")
+    return chars
+
 if __name__ == "__main__":
-    generate_all_characters()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--brush", choices=sorted(PROFILES), help="fill medians with a calligraphic brush profile")
+    parser.add_argument("--mode", choices=RENDER_MODES, default="median", help="draw stroke medians or filled outlines")
+    parser.add_argument("--geometry-cache", default=None, help="directory for prepared glyph geometry reused across runs")
+    add_corpus_args(parser, "the 30 basic characters")
+    add_dedupe_args(parser.add_argument_group("near-duplicate images (not with --frames)"))
+    add_shard_args(parser)
+    add_catalog_arg(parser)
+    args = parser.parse_args()
+    check_shard_args(parser, args)
+    chars = characters_from_args(parser, args)
+
+    if args.corpus:
+        if args.frames:
+            generate_stroke_frames(chars, args.limit, args.workers, not args.no_resume, brush=args.brush,
+                                   mode=args.mode, geometry_cache=args.geometry_cache, fmt=args.frames,
+                                   frame_ms=args.frame_ms, augment=args.augment, seed=args.seed)
+        else:
+            generate_corpus(chars, args.limit, args.workers, not args.no_resume, brush=args.brush, mode=args.mode,
+                            geometry_cache=args.geometry_cache, catalog=args.catalog, augment=args.augment,
+                            seed=args.seed, dedupe=deduper_from_args(args))
+    else:
+        generate_all_characters(args.shard, args.num_shards, args.catalog, args.brush, args.mode,
+                                args.geometry_cache, deduper_from_args(args), chars)
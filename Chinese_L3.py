@@ -1,158 +1,101 @@
 """Level 3 Chinese Character Generator for DC-ACE Research.
 
-Generates PNG images of 30 compound Chinese characters using stroke data.
+Generates PNG images of 30 compound Chinese characters (or a set selected by
+complexity, see hanzi_complexity) using stroke data.
 Each character is drawn 2 times with variations in scale/position.
+--corpus runs the Chinese_Char corpus pipeline with these variations.
 """
 
-import json
-import turtle
 import os
-import io
-from PIL import Image
-
-class ChineseCharacterGeneratorL3:
-    def __init__(self, file_path):
-        """Load character stroke data from graphics.txt"""
-        self.data_map = {}
-        print(f"Loading character database from {file_path}...")
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                item = json.loads(line)
-                self.data_map[item['character']] = item
-        print(f"✅ Loaded {len(self.data_map)} characters")
-
-    def draw_to_png(self, char, output_path, scale=0.5, offset_x=0, offset_y=0):
-        """Draw a Chinese character and save as PNG"""
-        if char not in self.data_map:
-            print(f"❌ Character not found: {char}")
-            return False
-
-        success = False
-        try:
-            # Initialize Turtle
-            screen = turtle.Screen()
-            screen.setup(600, 600)
-            screen.bgcolor("white")
-            turtle.tracer(0, 0)  # Disable animation for speed
-
-            t = turtle.Turtle()
-            t.hideturtle()
-            t.speed(0)
-            t.pensize(4)
-            t.pencolor("black")
-
-            # Get stroke data
-            medians = self.data_map[char]['medians']
-
-            # Draw each stroke
-            for stroke in medians:
-                t.penup()
-                # Convert coordinates: 1024 coordinate system -> centered Turtle coords
-                # Correct transformation: keep X as-is, adjust Y
-                start_x = (stroke[0][0] - 512) * scale + offset_x
-                start_y = (stroke[0][1] - 512) * scale + offset_y
-                t.goto(start_x, start_y)
-                t.pendown()
-
-                for x, y in stroke[1:]:
-                    turtle_x = (x - 512) * scale + offset_x
-                    turtle_y = (y - 512) * scale + offset_y
-                    t.goto(turtle_x, turtle_y)
-
-            # Save to PNG
-            turtle.update()
-            canvas = screen.getcanvas()
-            try:
-                ps = canvas.postscript(colormode="color")
-                b = io.BytesIO(ps.encode("utf-8"))
-                img = Image.open(b)
-                img.load(scale=1)
-                rgba = img.convert("RGBA")
-                rgba.save(output_path, "PNG")
-                print(f"✅ Saved: {output_path}")
-                success = True
-            except Exception as e:
-                print(f"❌ Error saving {output_path}: {e}")
-                success = False
-
-        except turtle.Terminator:
-            # Handle turtle termination gracefully
-            pass
-        except Exception as e:
-            print(f"❌ Error drawing {char}: {e}")
-        finally:
-            # Always try to close the screen
-            try:
-                turtle.Screen().bye()
-            except:
-                pass
-            # Reset turtle module
-            turtle.TurtleScreen._RUNNING = True
-
-        return success
-
-def generate_all_characters():
-    """Generate 30 Level 3 Chinese characters, 2 samples each"""
-
-    # 30 Level 3 compound characters with metadata
-    characters = [
-        ("二", "èr", "two", "two horizontal lines"),
-        ("三", "sān", "three", "three horizontal lines"),
-        ("从", "cóng", "from/follow", "two people following"),
-        ("众", "zhòng", "crowd/many people", "three people together"),
-        ("林", "lín", "forest/woods", "two trees side by side"),
-        ("森", "sēn", "dense forest", "three trees together"),
-        ("吕", "lǚ", "surname Lü", "two mouths stacked"),
-        ("品", "pǐn", "product/quality", "three mouths forming triangle"),
-        ("昌", "chāng", "prosperous", "two suns stacked"),
-        ("晶", "jīng", "crystal/bright", "three suns forming triangle"),
-        ("炎", "yán", "inflammation/flame", "two fires stacked"),
-        ("焱", "yàn", "flames/blaze", "three fires forming triangle"),
-        ("圭", "guī", "jade tablet", "two earths stacked"),
-        ("双", "shuāng", "pair/double", "two birds together"),
-        ("多", "duō", "many/much", "two evenings together"),
-        ("回", "huí", "return/回", "enclosed square within square"),
-        ("因", "yīn", "because/cause", "large enclosed with small inside"),
-        ("困", "kùn", "sleepy/trapped", "tree enclosed in box"),
-        ("国", "guó", "country/nation", "jade enclosed in box"),
-        ("呆", "dāi", "dull/foolish/stay", "mouth with tree above"),
-        ("尖", "jiān", "sharp/pointed", "small on top of large"),
-        ("好", "hǎo", "good", "woman with child"),
-        ("明", "míng", "bright/clear", "sun and moon together"),
-        ("男", "nán", "male/man", "field with power"),
-        ("加", "jiā", "add/plus", "power with mouth"),
-        ("信", "xìn", "letter/trust/believe", "person with words"),
-        ("问", "wèn", "ask/question", "door with mouth"),
-        ("闪", "shǎn", "flash/dodge", "door with person"),
-        ("囚", "qiú", "prisoner", "person enclosed in box"),
-        ("杏", "xìng", "apricot", "tree with mouth below"),
-    ]
+import argparse
+
+from Chinese_Char import (RENDER_MODES, ChineseCharacterGenerator, add_corpus_args, character_prompt, character_rows,
+                          characters_from_args, generate_corpus)
+from brush import PROFILES
+from sharding import add_shard_args, check_shard_args, shard_dir, shard_of, write_manifest
+from task_catalog import DEFAULT_CATALOG, add_catalog_arg, write_catalog
+from perceptual_hash import add_dedupe_args, deduper_from_args, file_phash, resolve_dataset
+
+# 30 Level 3 compound characters: (character, pinyin, meaning, description)
+CHARACTERS = [
+    ("二", "èr", "two", "two horizontal lines"),
+    ("三", "sān", "three", "three horizontal lines"),
+    ("从", "cóng", "from/follow", "two people following"),
+    ("众", "zhòng", "crowd/many people", "three people together"),
+    ("林", "lín", "forest/woods", "two trees side by side"),
+    ("森", "sēn", "dense forest", "three trees together"),
+    ("吕", "lǚ", "surname Lü", "two mouths stacked"),
+    ("品", "pǐn", "product/quality", "three mouths forming triangle"),
+    ("昌", "chāng", "prosperous", "two suns stacked"),
+    ("晶", "jīng", "crystal/bright", "three suns forming triangle"),
+    ("炎", "yán", "inflammation/flame", "two fires stacked"),
+    ("焱", "yàn", "flames/blaze", "three fires forming triangle"),
+    ("圭", "guī", "jade tablet", "two earths stacked"),
+    ("双", "shuāng", "pair/double", "two birds together"),
+    ("多", "duō", "many/much", "two evenings together"),
+    ("回", "huí", "return/回", "enclosed square within square"),
+    ("因", "yīn", "because/cause", "large enclosed with small inside"),
+    ("困", "kùn", "sleepy/trapped", "tree enclosed in box"),
+    ("国", "guó", "country/nation", "jade enclosed in box"),
+    ("呆", "dāi", "dull/foolish/stay", "mouth with tree above"),
+    ("尖", "jiān", "sharp/pointed", "small on top of large"),
+    ("好", "hǎo", "good", "woman with child"),
+    ("明", "míng", "bright/clear", "sun and moon together"),
+    ("男", "nán", "male/man", "field with power"),
+    ("加", "jiā", "add/plus", "power with mouth"),
+    ("信", "xìn", "letter/trust/believe", "person with words"),
+    ("问", "wèn", "ask/question", "door with mouth"),
+    ("闪", "shǎn", "flash/dodge", "door with person"),
+    ("囚", "qiú", "prisoner", "person enclosed in box"),
+    ("杏", "xìng", "apricot", "tree with mouth below"),
+]
+
+CORPUS_DIR = "/Users/peilinwu/Documents/AI memory research/Chinese_L3_corpus"
+
+# Variations for 2 samples (scale, offset_x, offset_y)
+VARIATIONS = [
+    (0.5, 0, 0),      # Sample 1: Medium, centered
+    (0.55, -20, 15),  # Sample 2: Slightly larger, offset
+]
+
+class ChineseCharacterGeneratorL3(ChineseCharacterGenerator):
+    """Same median renderer as Level 1, with the Level 3 character set."""
+    characters = CHARACTERS
+    variations = VARIATIONS
+
+
+def generate_all_characters(shard=0, num_shards=1, catalog=DEFAULT_CATALOG, brush=None, mode="median",
+                            geometry_cache=None, dedupe=None, characters=None):
+    """Generate `characters` (default: the 30 Level 3 CHARACTERS), 2 samples each"""
+    selected = characters is not None
+    characters = character_rows(characters, CHARACTERS)
+    variations = VARIATIONS
 
     # Output directory
     output_dir = "/Users/peilinwu/Documents/AI memory research/Chinese_L3"
+    if num_shards > 1:
+        output_dir = shard_dir(output_dir, shard, num_shards)
     os.makedirs(output_dir, exist_ok=True)
 
     # Initialize generator
     graphics_path = "/Users/peilinwu/Documents/AI memory research/draw_character/graphics.txt"
-    gen = ChineseCharacterGeneratorL3(graphics_path)
+    gen = ChineseCharacterGeneratorL3(graphics_path, brush, mode, geometry_cache=geometry_cache)
 
     print(f"\n🖌️  Generating Level 3: {len(characters)} characters × 2 samples each...")
     print(f"📂 Output: {output_dir}\n")
 
-    # Variations for 2 samples (scale, offset_x, offset_y)
-    variations = [
-        (0.5, 0, 0),      # Sample 1: Medium, centered
-        (0.55, -20, 15),  # Sample 2: Slightly larger, offset
-    ]
-
     total = 0
     detailed_metadata = []
+    positions = {}
 
     for idx, (char, pinyin, meaning, description) in enumerate(characters, 1):
         char_samples = []
         for sample_num, (scale, offset_x, offset_y) in enumerate(variations, 1):
             # Filename format: 01_二_1.png, 01_二_2.png
             filename = f"{idx:02d}_{char}_{sample_num}.png"
+            if shard_of(filename, num_shards) != shard:
+                continue
+            positions[filename] = (idx - 1) * len(variations) + sample_num - 1
             output_path = os.path.join(output_dir, filename)
 
             success = gen.draw_to_png(char, output_path, scale, offset_x, offset_y)
@@ -164,6 +107,8 @@ def generate_all_characters():
                     "offset_x": offset_x,
                     "offset_y": offset_y
                 })
+                if dedupe:
+                    char_samples[-1]["phash"] = file_phash(output_path)
 
         detailed_metadata.append({
             "index": idx,
@@ -171,7 +116,7 @@ def generate_all_characters():
             "pinyin": pinyin,
             "meaning": meaning,
             "description": description,
-            "prompt": f"Draw Chinese character '{char}' ({pinyin}, meaning: {meaning}) - {description}",
+            "prompt": character_prompt(char, pinyin, meaning, description),
             "samples": char_samples
         })
 
@@ -184,15 +129,43 @@ def generate_all_characters():
         "samples_per_character": 2,
         "total_images": total,
         "level": 3,
-        "description": "DC-ACE Level 3 Chinese Character Dataset - 30 compound characters composed of basic radicals",
+        "description": (f"DC-ACE Level 3 Chinese Character Dataset - {len(characters)} selected characters"
+                        if selected else
+                        "DC-ACE Level 3 Chinese Character Dataset - 30 compound characters composed of basic radicals"),
         "characters": detailed_metadata
     }
 
     import json
+    if dedupe:
+        metadata = resolve_dataset(dedupe, metadata, output_dir, num_shards)
     metadata_path = os.path.join(output_dir, "characters_L3.json")
     with open(metadata_path, 'w', encoding='utf-8') as f:
         json.dump(metadata, f, indent=2, ensure_ascii=False)
+    if num_shards > 1:
+        write_manifest(output_dir, shard, num_shards, None, "characters_L3.json", positions, dedupe)
+    elif catalog:
+        write_catalog(metadata, metadata_path, catalog)
     print(f"📊 Metadata saved to {metadata_path}")
 
 if __name__ == "__main__":
-    generate_all_characters()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--brush", choices=sorted(PROFILES), help="fill medians with a calligraphic brush profile")
+    parser.add_argument("--mode", choices=RENDER_MODES, default="median", help="draw stroke medians or filled outlines")
+    parser.add_argument("--geometry-cache", default=None, help="directory for prepared glyph geometry reused across runs")
+    add_corpus_args(parser, "the 30 compound characters", frames=False)
+    add_shard_args(parser)
+    add_catalog_arg(parser)
+    add_dedupe_args(parser)
+    args = parser.parse_args()
+    check_shard_args(parser, args)
+    chars = characters_from_args(parser, args)
+
+    if args.corpus:
+        # The Level 1 corpus pipeline with the Level 3 variations
+        generate_corpus(chars, args.limit, args.workers, not args.no_resume, output_dir=CORPUS_DIR, brush=args.brush,
+                        mode=args.mode, geometry_cache=args.geometry_cache, catalog=args.catalog,
+                        augment=args.augment, seed=args.seed, dedupe=deduper_from_args(args), variations=VARIATIONS,
+                        metadata_name="corpus_L3.json")
+    else:
+        generate_all_characters(args.shard, args.num_shards, args.catalog, args.brush, args.mode,
+                                args.geometry_cache, deduper_from_args(args), chars)
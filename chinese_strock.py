@@ -5,12 +5,23 @@ Generates 32 strokes (6 Basic + 26 Compound) with 5 samples each.
 """
 
 import os
-import io
 import math
 import random
 import json
+import argparse
+import functools
+import itertools
 import turtle
-from PIL import Image
+
+import numpy as np
+
+from render_pipeline import (PngWriter, canvas_postscript, postscript_to_image, prefetch_samples,
+                             render_parallel)
+from sharding import add_shard_args, check_shard_args, select_jobs, shard_dir, task_seed, write_manifest
+from task_catalog import DEFAULT_CATALOG, add_catalog_arg, write_catalog
+from perceptual_hash import add_dedupe_args, deduper_from_args, resolve_dataset
+from brush import draw_brush_stroke
+from turtle_recorder import record, sample_offset
 
 WIDTH = 800
 HEIGHT = 600
@@ -22,125 +33,165 @@ OUT_DIR = "/Users/peilinwu/Documents/AI memory research/chinese_strokes_dataset"
 
 def save_canvas_to_png(screen: turtle.Screen, path: str) -> None:
     """Save the current turtle screen to a PNG using postscript + PIL."""
-    canvas = screen.getcanvas()
     try:
-        ps = canvas.postscript(colormode="color")
-        b = io.BytesIO(ps.encode("utf-8"))
-        img = Image.open(b)
-        img.load(scale=1)
-        rgba = img.convert("RGBA")
-        rgba.save(path, "PNG")
+        postscript_to_image(canvas_postscript(screen)).save(path, "PNG")
     except Exception as e:
         print(f"Error saving {path}: {e}")
 
 # ==========================================
-# Part 1: The 6 Basic Strokes (原子笔画)
+# Stroke Geometry (declarative specs)
 # ==========================================
 
-def stroke_dian(t: turtle.Turtle, size: float):
-    """点 (Dot) - Teardrop shape at 315° (South-East)."""
+# Every stroke is a segment list at unit size, in turtle coordinates
+# (start at the origin, headings in degrees counter-clockwise from east):
+#   ("line", heading, length)          setheading + forward
+#   ("arc",  heading, radius, extent)  setheading + circle (None keeps heading)
+#   ("hook", heading, length)          the final flick of a 钩/提 stroke
+# All geometry is linear in size, so each spec is tessellated once into a
+# cached unit polyline and only scaled and translated per sample.
+STROKE_SPECS = {
+    # Basic strokes
+    "dian": [("line", 315, 0.2)],
+    "heng": [("line", 5, 1.0)],
+    "shu": [("line", 270, 1.0)],
+    "pie": [("arc", 260, -3 / math.pi, 60)],          # turns right 60° over one size
+    "na": [("arc", 300, 4.5 / math.pi, 40)],           # turns left 40° over one size
+    "ti": [("line", 30, 0.8)],
+
+    # Group A: Right-Angle Folds (方折)
+    "heng_zhe": [("line", 0, 1.0), ("line", 270, 0.9)],
+    "heng_pie": [("line", 0, 0.8), ("arc", 225, -10.8 / math.pi, 20)],
+    # Arches down 3° and back; the old per-pixel loop made the sag grow with
+    # size, this is its shape at a typical size of 60
+    "heng_gou": [("arc", 0, -30 / math.pi, 3), ("arc", None, 30 / math.pi, 3), ("hook", 225, 0.2)],
+    "heng_zhe_gou": [("line", 0, 1.0), ("line", 270, 2.5), ("hook", 135, 0.3)],
+    "heng_zhe_ti": [("line", 0, 1.0), ("line", 270, 1.5), ("hook", 30, 0.6)],
+    "heng_zhe_zhe": [("line", 0, 1.0), ("line", 270, 0.8), ("line", 0, 0.8)],
+    "heng_xie_gou": [("line", 0, 0.8), ("arc", 270, 2.4, 40), ("hook", 90, 0.2)],
+    "heng_zhe_wan_gou": [("line", 10, 0.7), ("line", 260, 1.0), ("arc", -30, 1.0, 60), ("hook", 95, 0.1)],
+    "heng_pie_wan_gou": [("line", 0, 1.9), ("line", 240, 1.75), ("arc", -45, -2.5, 60), ("hook", 145, 0.75)],
+    "heng_zhe_zhe_pie": [("line", 0, 0.25), ("line", 240, 0.3), ("line", 0, 0.1), ("arc", 90, 0.4, -80)],
+    "heng_zhe_zhe_zhe_gou": [("line", 8, 1.8), ("line", 250, 1.5), ("line", 0, 0.72), ("arc", 270, -6.0, 20),
+                             ("hook", 120, 0.6)],
+    "heng_zhe_zhe_zhe": [("line", 8, 1.8), ("line", 250, 1.5), ("line", 0, 0.72), ("arc", 270, -6.0, 20)],
+
+    # Group B: Vertical-Based Folds (竖折)
+    "shu_ti": [("line", 270, 1.5), ("hook", 30, 0.6)],
+    "shu_zhe": [("line", 270, 1.0), ("line", 0, 1.5)],
+    "shu_gou": [("line", 270, 2.0), ("hook", 135, 0.3)],
+    "shu_wan_gou": [("line", 270, 1.0), ("arc", None, 0.3, 90), ("arc", 0, 3.0, 10), ("hook", 90, 0.2)],
+    "shu_zhe_pie": [("line", 250, 1.0), ("line", 0, 0.8), ("line", 250, 1.0)],
+    "shu_zhe_zhe": [("line", 270, 1.0), ("line", 0, 0.8), ("line", 270, 0.8)],
+    "shu_zhe_zhe_gou": [("line", 250, 0.8), ("line", 0, 0.6), ("arc", 90, 3.0, -20), ("hook", 135, 0.2)],
+
+    # Group C: Slanted & Curved Hooks (斜弯折)
+    "pie_dian": [("line", 225, 1.0), ("line", 315, 1.2)],
+    "pie_zhe": [("line", 225, 1.0), ("line", 0, 0.8)],
+    "xie_gou": [("arc", 270, 2.7, 30), ("hook", 90, 0.2)],
+    "wan_gou": [("arc", 270, -3.0, 20), ("hook", 110, 0.2)],
+    "wo_gou": [("arc", -45, 1.5, 60), ("hook", 135, 0.2)],
+}
+
+ARC_STEP = 3.0  # degrees of turn per tessellated arc segment
+
+# Brush width profile per stroke when drawn calligraphically (default "hook"
+# for 钩/提 endings, "uniform" otherwise)
+STROKE_PROFILES = {"dian": "taper", "pie": "taper", "heng_pie": "taper", "na": "press"}
+
+def stroke_profile(name: str) -> str:
+    if name in STROKE_PROFILES:
+        return STROKE_PROFILES[name]
+    return "hook" if STROKE_SPECS[name][-1][0] == "hook" else "uniform"
+
+def _tessellate(spec):
+    """Walk a segment list like a turtle would; return the (N, 2) unit polyline."""
+    pieces = [np.zeros((1, 2))]
+    pos = np.zeros(2)
+    heading = 0.0
+    for seg in spec:
+        if seg[1] is not None:
+            heading = float(seg[1])
+        if seg[0] == "arc":
+            # Same chord construction as turtle.circle(radius, extent)
+            radius, extent = seg[2], seg[3]
+            n = max(1, math.ceil(abs(extent) / ARC_STEP))
+            w = extent / n
+            chord = 2.0 * radius * math.sin(math.radians(w / 2))
+            if radius < 0:
+                chord, w = -chord, -w
+            angles = np.radians(heading + w / 2 + w * np.arange(n))
+            steps = chord * np.column_stack((np.cos(angles), np.sin(angles)))
+            heading += n * w
+        else:
+            angle = math.radians(heading)
+            steps = seg[2] * np.array([[math.cos(angle), math.sin(angle)]])
+        pieces.append(pos + np.cumsum(steps, axis=0))
+        pos = pieces[-1][-1]
+    return np.concatenate(pieces)
+
+@functools.lru_cache(maxsize=None)
+def unit_polyline(name: str) -> np.ndarray:
+    """Cached unit-size polyline of a stroke (read-only)."""
+    pts = _tessellate(STROKE_SPECS[name])
+    pts.setflags(write=False)
+    return pts
+
+def stroke_polyline(name: str, size: float, origin=(0.0, 0.0)) -> np.ndarray:
+    """Polyline of stroke `name` at `size`, starting at `origin`."""
+    return unit_polyline(name) * size + np.asarray(origin, dtype=float)
+
+def draw_stroke(t: turtle.Turtle, name: str, size: float, width: float | None = None):
+    """Draw a stroke from its cached polyline, then return the pen to the start.
+
+    With `width`, the stroke is filled as one brush outline of that max
+    width using the stroke's profile instead of a 3px pen line.
+    """
     t.pencolor("black")
     t.pensize(3)
     start_x, start_y = t.position()
 
-    t.setheading(315)
-    t.pendown()
-    # Teardrop: thick start, sharp end
-    for i in range(int(0.2 * size)):
-        t.pensize(max(1, 5 - i // 2))
-        t.forward(1)
+    pts = stroke_polyline(name, size, (start_x, start_y))
+    if width:
+        draw_brush_stroke(t, pts, width, stroke_profile(name))
+    else:
+        t.pendown()
+        for x, y in pts[1:].tolist():
+            t.goto(x, y)
+    t.penup()
 
     # Reset
-    t.penup()
     t.goto(start_x, start_y)
     t.setheading(90)
     t.pensize(1)
 
-def stroke_heng(t: turtle.Turtle, size: float):
-    """横 (Horizontal) - Straight line at 0° (East) with slight upward tilt."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
+# ==========================================
+# Part 1: The 6 Basic Strokes (原子笔画)
+# ==========================================
 
-    t.setheading(5)  # Slight upward tilt
-    t.pendown()
-    t.forward(size)
-    t.penup()
+def stroke_dian(t: turtle.Turtle, size: float):
+    """点 (Dot) - Teardrop shape at 315° (South-East)."""
+    # Teardrop: thick start, sharp end
+    draw_stroke(t, "dian", size, width=5)
 
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+def stroke_heng(t: turtle.Turtle, size: float):
+    """横 (Horizontal) - Straight line at 0° (East) with slight upward tilt."""
+    draw_stroke(t, "heng", size)
 
 def stroke_shu(t: turtle.Turtle, size: float):
     """竖 (Vertical) - Straight line at 270° (South)."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(270)
-    t.pendown()
-    t.forward(size)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "shu", size)
 
 def stroke_pie(t: turtle.Turtle, size: float):
     """撇 (Throw) - Curved sweep from 260° to 200° (South-West)."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(260)
-    t.pendown()
-    # Curve towards 200°
-    for i in range(60):
-        t.forward(size / 60)
-        t.right(1)  # Gradual curve
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "pie", size)
 
 def stroke_na(t: turtle.Turtle, size: float):
     """捺 (Press) - Curved sweep from 300° to 340° (South-East)."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(300)
-    t.pendown()
-    # Curve towards 340°
-    for i in range(40):
-        t.forward(size / 40)
-        t.left(1)  # Gradual curve
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "na", size)
 
 def stroke_ti(t: turtle.Turtle, size: float):
     """提 (Rise) - Sharp straight line at 30° (North-East)."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(30)
-    t.pendown()
-    t.forward(0.8 * size)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "ti", size)
 
 # ==========================================
 # Part 2: The 26 Compound Strokes (复合折笔)
@@ -150,503 +201,160 @@ def stroke_ti(t: turtle.Turtle, size: float):
 
 def stroke_heng_zhe(t: turtle.Turtle, size: float):
     """横折 ┐ - Horizontal then vertical right angle."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(0)
-    t.pendown()
-    t.forward(size)
-    t.setheading(270)
-    t.forward(0.9 * size)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "heng_zhe", size)
 
 def stroke_heng_pie(t: turtle.Turtle, size: float):
     """横撇 ㇇ - Horizontal then throw."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(0)
-    t.pendown()
-    t.forward(0.8 * size)
-    t.setheading(225)
-    # Curved throw
-    for i in range(40):
-        t.forward(1.2 * size / 40)
-        t.right(0.5)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "heng_pie", size)
 
 def stroke_heng_gou(t: turtle.Turtle, size: float):
     """横钩 乛 - Horizontal with hook."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(0)
-    t.pendown()
-    # Slight arch down
-    for i in range(int(size)):
-        t.forward(1)
-        if i < size / 2:
-            t.right(0.1)
-        else:
-            t.left(0.1)
-    # Sharp hook
-    t.setheading(225)
-    t.forward(0.2 * size)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "heng_gou", size)
 
 def stroke_heng_zhe_gou(t: turtle.Turtle, size: float):
     """横折钩 - Horizontal, vertical, hook."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(0)
-    t.pendown()
-    t.forward(size)
-    t.setheading(270)
-    t.forward(2.5 * size)
-    t.setheading(135)
-    t.forward(0.3 * size)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "heng_zhe_gou", size)
 
 def stroke_heng_zhe_ti(t: turtle.Turtle, size: float):
     """横折提 ㇊ - Horizontal, vertical, then rise."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(0)
-    t.pendown()
-    t.forward(size)
-    t.setheading(270)
-    t.forward(1.5 * size)
-    t.setheading(30)
-    t.forward(0.6 * size)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
-
+    draw_stroke(t, "heng_zhe_ti", size)
 
 def stroke_heng_zhe_zhe(t: turtle.Turtle, size: float):
     """横折折 ㇅ - Two right angles."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(0)
-    t.pendown()
-    t.forward(size)
-    t.setheading(270)
-    t.forward(0.8 * size)
-    t.setheading(0)
-    t.forward(0.8 * size)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "heng_zhe_zhe", size)
 
 def stroke_heng_xie_gou(t: turtle.Turtle, size: float):
     """横斜钩 ⺄ - Horizontal, slanted curve with hook."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
+    draw_stroke(t, "heng_xie_gou", size)
 
-    t.setheading(0)
-    t.pendown()
-    t.forward(0.8 * size)
-    # Slanted curve
-    t.setheading(270)  
-    t.circle(2.4 * size, 40)
-    # Hook up
-    t.setheading(90)
-    t.forward(0.2 * size)
-    t.penup()
-    
 def stroke_heng_zhe_wan_gou(t: turtle.Turtle, size: float):
     """横折弯钩 ㇈ - Horizontal, slant, curve, hook."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(10)
-    t.pendown()
-    t.forward(0.7 * size)
-    t.setheading(260)
-    t.forward(1 * size)
-    # Curve to east
-    t.setheading(-30)
-    t.circle(1 * size, 60)
-    # Hook up
-    t.setheading(95)
-    t.forward(0.1 * size)
-    t.penup()
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "heng_zhe_wan_gou", size)
 
 def stroke_heng_pie_wan_gou(t: turtle.Turtle, size: float):
     """横撇弯钩 ㇌ - Short horizontal, throw, belly curve, hook."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(0)
-    t.pendown()
-    t.forward(1.9 * size)
-    t.setheading(240)
-    t.forward(1.75 * size)
-    # Belly curve
-    t.setheading(-45)
-    t.circle(-2.5 * size, 60)
-    # Hook
-    t.setheading(145)
-    t.forward(0.75 * size)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "heng_pie_wan_gou", size)
 
 def stroke_heng_zhe_zhe_pie(t: turtle.Turtle, size: float):
     """横折折撇 ㇋ - Horizontal, slant down, slide right, long throw."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(0)
-    t.pendown()
-    t.forward(0.25 * size)
-    t.setheading(240)
-    t.forward(0.3 * size)
-    t.setheading(0)
-    t.forward(0.1 * size)
-    t.setheading(90)
-    t.circle(0.4 * size, -80)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "heng_zhe_zhe_pie", size)
 
 def stroke_heng_zhe_zhe_zhe_gou(t: turtle.Turtle, size: float):
     """横折折折钩 𠄎 - Multiple folds with hook."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(8)
-    t.pendown()
-    t.forward(1.8 * size)
-    t.setheading(250)
-    t.forward(1.5 * size)
-    t.setheading(0)
-    t.forward(0.72 * size)
-    t.setheading(270)
-    t.circle(-6 * size, 20)
-    # Hook up
-    t.setheading(120)
-    t.forward(0.6 * size)
-    t.penup()
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "heng_zhe_zhe_zhe_gou", size)
 
 def stroke_heng_zhe_zhe_zhe(t: turtle.Turtle, size: float):
     """横折折折 ㇎ - Same as above but no hook."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(8)
-    t.pendown()
-    t.forward(1.8 * size)
-    t.setheading(250)
-    t.forward(1.5 * size)
-    t.setheading(0)
-    t.forward(0.72 * size)
-    t.setheading(270)
-    t.circle(-6 * size, 20)
-    t.penup()
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "heng_zhe_zhe_zhe", size)
 
 # Group B: Vertical-Based Folds (竖折)
 
 def stroke_shu_ti(t: turtle.Turtle, size: float):
     """竖提 𠄌 - Long vertical then rise."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(270)
-    t.pendown()
-    t.forward(1.5 * size)
-    t.setheading(30)
-    t.forward(0.6 * size)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "shu_ti", size)
 
 def stroke_shu_zhe(t: turtle.Turtle, size: float):
     """竖折 𠃊 - Vertical then horizontal."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(270)
-    t.pendown()
-    t.forward(size)
-    t.setheading(0)
-    t.forward(1.5 * size)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "shu_zhe", size)
 
 def stroke_shu_gou(t: turtle.Turtle, size: float):
     """竖钩 亅 - Long vertical with hook."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(270)
-    t.pendown()
-    t.forward(2.0 * size)
-    t.setheading(135)
-    t.forward(0.3 * size)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
-
+    draw_stroke(t, "shu_gou", size)
 
 def stroke_shu_wan_gou(t: turtle.Turtle, size: float):
     """竖弯钩 乚 - Vertical, curve, horizontal, hook."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(270)
-    t.pendown()
-    t.forward(size)
-    t.circle(0.3 * size, 90)
-    t.setheading(0)
-    t.circle(3 * size, 10)
-    t.setheading(90)
-    t.forward(0.2 * size)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "shu_wan_gou", size)
 
 def stroke_shu_zhe_pie(t: turtle.Turtle, size: float):
     """竖折撇 ㄣ - Vertical, horizontal, then throw."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(250)
-    t.pendown()
-    t.forward(1.0 * size)
-    t.setheading(0)
-    t.forward(0.8 * size)
-    t.setheading(250)
-    t.forward(1 * size)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "shu_zhe_pie", size)
 
 def stroke_shu_zhe_zhe(t: turtle.Turtle, size: float):
     """竖折折 𠃑 - Vertical, horizontal, vertical."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(270)
-    t.pendown()
-    t.forward(size)
-    t.setheading(0)
-    t.forward(0.8 * size)
-    t.setheading(270)
-    t.forward(0.8 * size)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
-
+    draw_stroke(t, "shu_zhe_zhe", size)
 
 def stroke_shu_zhe_zhe_gou(t: turtle.Turtle, size: float):
     """竖折折钩 ㇉ - Vertical, horizontal, vertical, hook."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(250)
-    t.pendown()
-    t.forward(0.8 * size)
-    t.setheading(0)
-    t.forward(0.6 * size)
-    t.setheading(90)
-    t.circle(3.0 * size, -20)
-    t.setheading(135)
-    t.forward(0.2 * size)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "shu_zhe_zhe_gou", size)
 
 # Group C: Slanted & Curved Hooks (斜弯折)
 
 def stroke_pie_dian(t: turtle.Turtle, size: float):
     """撇点 𡿨 - Throw then long dot."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(225)
-    t.pendown()
-    t.forward(size)
-    t.setheading(315)
-    t.forward(1.2 * size)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "pie_dian", size)
 
 def stroke_pie_zhe(t: turtle.Turtle, size: float):
     """撇折 𠃋 - Throw then rise."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(225)
-    t.pendown()
-    t.forward(size)
-    t.setheading(0)
-    t.forward(0.8 * size)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "pie_zhe", size)
 
 def stroke_xie_gou(t: turtle.Turtle, size: float):
     """斜钩 ㇂ - Long convex arc with hook."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(270)
-    t.pendown()
-    t.circle(2.7 * size, 30)
-    # Hook up
-    t.setheading(90)
-    t.forward(0.2 * size)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "xie_gou", size)
 
 def stroke_wan_gou(t: turtle.Turtle, size: float):
     """弯钩 ㇁ - Arc bulging right, hook left-up."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-
-    t.setheading(270)
-    t.pendown()
-    t.circle(-3 * size, 20)
-    # Hook up
-    t.setheading(110)
-    t.forward(0.2 * size)
-    t.penup()
-
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+    draw_stroke(t, "wan_gou", size)
 
 def stroke_wo_gou(t: turtle.Turtle, size: float):
     """卧钩 ㇃ - Lying curve with hook."""
-    t.pencolor("black")
-    t.pensize(3)
-    start_x, start_y = t.position()
-    t.setheading(-45)
-    t.pendown()
-    t.circle(1.5 * size, 60)
-    # Hook
-    t.setheading(135)
-    t.forward(0.2 * size)
-    t.penup()
+    draw_stroke(t, "wo_gou", size)
 
-    # Reset
-    t.goto(start_x, start_y)
-    t.setheading(90)
-    t.pensize(1)
+# ==========================================
+# Stroke Table
+# ==========================================
+
+# All 32 strokes: (name, character, meaning, function, size range)
+STROKES = [
+    # Basic Strokes (6)
+    ("Dian", "点", "dot", stroke_dian, (10, 25)),
+    ("Heng", "横", "horizontal", stroke_heng, (40, 100)),
+    ("Shu", "竖", "vertical", stroke_shu, (40, 100)),
+    ("Pie", "撇", "throw/left-falling", stroke_pie, (40, 100)),
+    ("Na", "捺", "press/right-falling", stroke_na, (40, 100)),
+    ("Ti", "提", "rise", stroke_ti, (40, 100)),
+
+    # Compound Strokes Group A (13)
+    ("HengZhe", "横折", "horizontal-vertical fold", stroke_heng_zhe, (40, 80)),
+    ("HengPie", "横撇", "horizontal-throw", stroke_heng_pie, (40, 80)),
+    ("HengGou", "横钩", "horizontal hook", stroke_heng_gou, (40, 80)),
+    ("HengZheGou", "横折钩", "horizontal-vertical-hook", stroke_heng_zhe_gou, (30, 60)),
+    ("HengZheTi", "横折提", "horizontal-vertical-rise", stroke_heng_zhe_ti, (30, 60)),
+    ("HengZheZhe", "横折折", "horizontal double fold", stroke_heng_zhe_zhe, (30, 60)),
+    ("HengXieGou", "横斜钩", "horizontal slant hook", stroke_heng_xie_gou, (30, 60)),
+    ("HengZheWanGou", "横折弯钩", "horizontal fold curve hook", stroke_heng_zhe_wan_gou, (30, 60)),
+    ("HengPieWanGou", "横撇弯钩", "horizontal throw curve hook", stroke_heng_pie_wan_gou, (30, 60)),
+    ("HengZheZhePie", "横折折撇", "horizontal double fold throw", stroke_heng_zhe_zhe_pie, (30, 60)),
+    ("HengZheZheZheGou", "横折折折钩", "horizontal triple fold hook", stroke_heng_zhe_zhe_zhe_gou, (25, 50)),
+    ("HengZheZheZhe", "横折折折", "horizontal triple fold", stroke_heng_zhe_zhe_zhe, (25, 50)),
+
+    # Compound Strokes Group B (8)
+    ("ShuTi", "竖提", "vertical-rise", stroke_shu_ti, (30, 60)),
+    ("ShuZhe", "竖折", "vertical-horizontal fold", stroke_shu_zhe, (30, 60)),
+    ("ShuGou", "竖钩", "vertical hook", stroke_shu_gou, (40, 80)),
+    ("ShuWanGou", "竖弯钩", "vertical curve hook", stroke_shu_wan_gou, (30, 60)),
+    ("ShuZhePie", "竖折撇", "vertical fold throw", stroke_shu_zhe_pie, (30, 60)),
+    ("ShuZheZhe", "竖折折", "vertical double fold", stroke_shu_zhe_zhe, (30, 60)),
+    ("ShuZheZheGou", "竖折折钩", "vertical double fold hook", stroke_shu_zhe_zhe_gou, (30, 60)),
+
+    # Compound Strokes Group C (5)
+    ("PieDian", "撇点", "throw-dot", stroke_pie_dian, (30, 60)),
+    ("PieZhe", "撇折", "throw-rise", stroke_pie_zhe, (30, 60)),
+    ("XieGou", "斜钩", "slant hook", stroke_xie_gou, (40, 80)),
+    ("WanGou", "弯钩", "curved hook", stroke_wan_gou, (40, 80)),
+    ("WoGou", "卧钩", "lying hook", stroke_wo_gou, (40, 80)),
+]
 
 # ==========================================
 # Generator Class
 # ==========================================
 
 class ChineseStrokeGenerator:
-    def __init__(self, seed: int | None = None):
+    def __init__(self, seed: int | None = None, brush_width: float | None = None):
         if seed is not None:
             random.seed(seed)
+        self.seed = seed
+        self.brush_width = brush_width  # fill calligraphic outlines instead of pen lines
+        self.out_dir = OUT_DIR
         os.makedirs(OUT_DIR, exist_ok=True)
         self.screen = turtle.Screen()
         self.screen.setup(WIDTH, HEIGHT)
@@ -657,6 +365,7 @@ class ChineseStrokeGenerator:
         self.t.speed(0)
         self.metadata = []
         self.counters = {}
+        self.writer = None  # PngWriter while generate_all runs
 
     def _get_id(self, prefix):
         if prefix not in self.counters:
@@ -664,100 +373,144 @@ class ChineseStrokeGenerator:
         self.counters[prefix] += 1
         return f"{prefix}_{self.counters[prefix]}"
 
-    def _rand_pos(self, margin):
-        x = random.uniform(-WIDTH/2 + margin, WIDTH/2 - margin)
-        y = random.uniform(-HEIGHT/2 + margin, HEIGHT/2 - margin)
-        return x, y
+    def _draw(self, t, func, size):
+        if self.brush_width:
+            draw_stroke(t, func.__name__[len("stroke_"):], size, width=self.brush_width)
+        else:
+            func(t, size)
+
+    def _rand_pos(self, func, size):
+        """Random start point that keeps the whole stroke, pen or brush width included, on the canvas.
+
+        None if the stroke is larger than the canvas at this size.
+        """
+        box = record(self._draw, func, size).bbox()
+        return sample_offset(box, WIDTH, HEIGHT, random)
+
+    def _seed_task(self, fname, seed=None):
+        # Seeded runs give every sample its own RNG stream, so shards and
+        # workers reproduce the single-node output exactly
+        seed = self.seed if seed is None else seed
+        if seed is not None:
+            random.seed(task_seed(seed, fname))
+
+    def _reset(self):
+        self.t.clear()
+        self.t.penup()
+        self.t.home()
+        self.t.pendown()
 
     def _save(self, fname, level, prompt, params):
         turtle.update()
-        save_canvas_to_png(self.screen, os.path.join(OUT_DIR, fname))
+        path = os.path.join(self.out_dir, fname)
+        if self.writer:
+            self.writer.submit(canvas_postscript(self.screen), path)
+        else:
+            save_canvas_to_png(self.screen, path)
         self.metadata.append({
             "id": fname,
             "level": level,
             "prompt": prompt,
             "params": params
         })
-        self.t.clear()
+        self._reset()
+
+    def _task_stroke(self, stroke):
+        """Sample, place and draw one stroke; return (level, prompt, params)."""
+        name_en, char, meaning, func, size_range = stroke
+        size = random.uniform(size_range[0], size_range[1])
+        pos = self._rand_pos(func, size)
+        while pos is None:
+            # Too large to fit anywhere: shrink it (the prompt reports the final size)
+            size *= 0.9
+            pos = self._rand_pos(func, size)
+        x, y = pos
+
         self.t.penup()
-        self.t.home()
+        self.t.goto(x, y)
         self.t.pendown()
+        self._draw(self.t, func, size)
+
+        return (
+            1,
+            f"Draw Chinese stroke {char} ({name_en}/{meaning}) size {int(size)} at ({int(x)},{int(y)})",
+            {
+                "type": f"stroke_{name_en.lower()}",
+                "stroke": char,
+                "pinyin": name_en.lower(),
+                "meaning": meaning,
+                "size": size,
+                "x": x,
+                "y": y
+            }
+        )
+
+    def iter_samples(self, count, seed=None, prefetch=8):
+        """Yield `count` (RGBA ndarray, metadata) pairs without writing to OUT_DIR.
+
+        Stroke types are cycled in STROKES order. With a seed, the first
+        five passes match generate_all for that seed.
+        """
+        seed = self.seed if seed is None else seed
+        order = itertools.cycle(STROKES)
+
+        def render_next():
+            stroke = next(order)
+            fname = self._get_id(f"L1_Stroke_{stroke[0]}") + ".png"
+            self._seed_task(fname, seed)
+            level, prompt, params = self._task_stroke(stroke)
+            turtle.update()
+            ps = canvas_postscript(self.screen)
+            self._reset()
+            return ps, {"id": fname, "level": level, "prompt": prompt, "params": params}
+
+        return prefetch_samples(render_next, count, prefetch)
+
+    @staticmethod
+    def job_list(samples=5):
+        """Flat [(sample id, STROKES index)] list in generate_all order."""
+        return [(f"L1_Stroke_{stroke[0]}_{k}.png", i)
+                for i, stroke in enumerate(STROKES) for k in range(1, samples + 1)]
+
+    def render_job(self, job):
+        """Draw one job on this screen; return (postscript, metadata)."""
+        fname, stroke_index = job
+        self._seed_task(fname)
+        level, prompt, params = self._task_stroke(STROKES[stroke_index])
+        turtle.update()
+        ps = canvas_postscript(self.screen)
+        self._reset()
+        return ps, {"id": fname, "level": level, "prompt": prompt, "params": params}
 
-    def generate_all(self):
+    def generate_all(self, encode_workers=4, shard=0, num_shards=1, catalog=DEFAULT_CATALOG, dedupe=None):
         print("🖌️  Generating Chinese Strokes (30 types × 5 samples)...")
-
-        # All 32 strokes with metadata
-        strokes = [
-            # Basic Strokes (6)
-            ("Dian", "点", "dot", stroke_dian, (10, 25)),
-            ("Heng", "横", "horizontal", stroke_heng, (40, 100)),
-            ("Shu", "竖", "vertical", stroke_shu, (40, 100)),
-            ("Pie", "撇", "throw/left-falling", stroke_pie, (40, 100)),
-            ("Na", "捺", "press/right-falling", stroke_na, (40, 100)),
-            ("Ti", "提", "rise", stroke_ti, (40, 100)),
-
-            # Compound Strokes Group A (13)
-            ("HengZhe", "横折", "horizontal-vertical fold", stroke_heng_zhe, (40, 80)),
-            ("HengPie", "横撇", "horizontal-throw", stroke_heng_pie, (40, 80)),
-            ("HengGou", "横钩", "horizontal hook", stroke_heng_gou, (40, 80)),
-            ("HengZheGou", "横折钩", "horizontal-vertical-hook", stroke_heng_zhe_gou, (30, 60)),
-            ("HengZheTi", "横折提", "horizontal-vertical-rise", stroke_heng_zhe_ti, (30, 60)),
-            ("HengZheZhe", "横折折", "horizontal double fold", stroke_heng_zhe_zhe, (30, 60)),
-            ("HengXieGou", "横斜钩", "horizontal slant hook", stroke_heng_xie_gou, (30, 60)),
-            ("HengZheWanGou", "横折弯钩", "horizontal fold curve hook", stroke_heng_zhe_wan_gou, (30, 60)),
-            ("HengPieWanGou", "横撇弯钩", "horizontal throw curve hook", stroke_heng_pie_wan_gou, (30, 60)),
-            ("HengZheZhePie", "横折折撇", "horizontal double fold throw", stroke_heng_zhe_zhe_pie, (30, 60)),
-            ("HengZheZheZheGou", "横折折折钩", "horizontal triple fold hook", stroke_heng_zhe_zhe_zhe_gou, (25, 50)),
-            ("HengZheZheZhe", "横折折折", "horizontal triple fold", stroke_heng_zhe_zhe_zhe, (25, 50)),
-
-            # Compound Strokes Group B (8)
-            ("ShuTi", "竖提", "vertical-rise", stroke_shu_ti, (30, 60)),
-            ("ShuZhe", "竖折", "vertical-horizontal fold", stroke_shu_zhe, (30, 60)),
-            ("ShuGou", "竖钩", "vertical hook", stroke_shu_gou, (40, 80)),
-            ("ShuWanGou", "竖弯钩", "vertical curve hook", stroke_shu_wan_gou, (30, 60)),
-            ("ShuZhePie", "竖折撇", "vertical fold throw", stroke_shu_zhe_pie, (30, 60)),
-            ("ShuZheZhe", "竖折折", "vertical double fold", stroke_shu_zhe_zhe, (30, 60)),
-            ("ShuZheZheGou", "竖折折钩", "vertical double fold hook", stroke_shu_zhe_zhe_gou, (30, 60)),
-
-            # Compound Strokes Group C (5)
-            ("PieDian", "撇点", "throw-dot", stroke_pie_dian, (30, 60)),
-            ("PieZhe", "撇折", "throw-rise", stroke_pie_zhe, (30, 60)),
-            ("XieGou", "斜钩", "slant hook", stroke_xie_gou, (40, 80)),
-            ("WanGou", "弯钩", "curved hook", stroke_wan_gou, (40, 80)),
-            ("WoGou", "卧钩", "lying hook", stroke_wo_gou, (40, 80)),
-        ]
-
-        # Generate 5 samples for each stroke
-        for name_en, char, meaning, func, size_range in strokes:
-            for i in range(5):
-                size = random.uniform(size_range[0], size_range[1])
-                x, y = self._rand_pos(max(size * 3, 100))
-
-                self.t.penup()
-                self.t.goto(x, y)
-                self.t.pendown()
-
-                func(self.t, size)
-
-                self._save(
-                    self._get_id(f"L1_Stroke_{name_en}") + ".png",
-                    1,
-                    f"Draw Chinese stroke {char} ({name_en}/{meaning}) size {int(size)} at ({int(x)},{int(y)})",
-                    {
-                        "type": f"stroke_{name_en.lower()}",
-                        "stroke": char,
-                        "pinyin": name_en.lower(),
-                        "meaning": meaning,
-                        "size": size,
-                        "x": x,
-                        "y": y
-                    }
-                )
+        jobs, positions = select_jobs(self.job_list(), shard, num_shards)
+        if num_shards > 1:
+            self.out_dir = shard_dir(OUT_DIR, shard, num_shards)
+            os.makedirs(self.out_dir, exist_ok=True)
+
+        # Generate 5 samples for each stroke; encoding and disk writes
+        # overlap with drawing the next sample
+        hashes = {} if dedupe else None
+        with PngWriter(workers=encode_workers, hashes=hashes) as self.writer:
+            for fname, stroke_index in jobs:
+                self._seed_task(fname)
+                level, prompt, params = self._task_stroke(STROKES[stroke_index])
+                self._save(fname, level, prompt, params)
+        self.writer = None
+        if dedupe:
+            for meta in self.metadata:
+                meta["phash"] = hashes.get(meta["id"])
+            self.metadata = resolve_dataset(dedupe, self.metadata, self.out_dir, num_shards)
 
         # Save metadata
-        metadata_path = os.path.join(OUT_DIR, "chinese_strokes.json")
+        metadata_path = os.path.join(self.out_dir, "chinese_strokes.json")
         with open(metadata_path, "w", encoding="utf-8") as f:
             json.dump(self.metadata, f, indent=2, ensure_ascii=False)
+        if num_shards > 1:
+            write_manifest(self.out_dir, shard, num_shards, self.seed, "chinese_strokes.json", positions, dedupe)
+        elif catalog:
+            write_catalog(self.metadata, metadata_path, catalog)
 
         print(f"✅ Generated {len(self.metadata)} Chinese stroke samples.")
         print(f"📊 Metadata saved to {metadata_path}")
@@ -767,6 +520,48 @@ class ChineseStrokeGenerator:
         except:
             pass
 
+def _worker_generator(seed, brush_width, worker):
+    # Seeded samples reseed per id; unseeded spawned workers get fresh OS entropy
+    return ChineseStrokeGenerator(seed=seed, brush_width=brush_width)
+
+def generate_parallel(workers=None, seed=None, shard=0, num_shards=1, catalog=DEFAULT_CATALOG,
+                      brush_width=None, dedupe=None):
+    """Render every stroke sample across worker processes through a shared-memory ring."""
+    print("🖌️  Generating Chinese Strokes in parallel...")
+    jobs, positions = select_jobs(ChineseStrokeGenerator.job_list(), shard, num_shards)
+    out_dir = shard_dir(OUT_DIR, shard, num_shards) if num_shards > 1 else OUT_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    metadata = render_parallel(functools.partial(_worker_generator, seed, brush_width), jobs,
+                               out_dir, (HEIGHT, WIDTH, 4), workers=workers, hashed=dedupe is not None)
+    if dedupe:
+        metadata = resolve_dataset(dedupe, metadata, out_dir, num_shards)
+
+    metadata_path = os.path.join(out_dir, "chinese_strokes.json")
+    with open(metadata_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    if num_shards > 1:
+        write_manifest(out_dir, shard, num_shards, seed, "chinese_strokes.json", positions, dedupe)
+    elif catalog:
+        write_catalog(metadata, metadata_path, catalog)
+
+    print(f"✅ Generated {len(metadata)} Chinese stroke samples.")
+    print(f"📊 Metadata saved to {metadata_path}")
+
 if __name__ == "__main__":
-    gen = ChineseStrokeGenerator()
-    gen.generate_all()
+    parser = argparse.ArgumentParser(description="Generate Chinese stroke samples.")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=0, help="render processes (0 = single process)")
+    parser.add_argument("--brush-width", type=float, default=None, help="draw calligraphic brush outlines of this max width")
+    add_shard_args(parser)
+    add_catalog_arg(parser)
+    add_dedupe_args(parser)
+    args = parser.parse_args()
+    check_shard_args(parser, args)
+
+    if args.workers:
+        generate_parallel(args.workers, args.seed, args.shard, args.num_shards, args.catalog, args.brush_width,
+                          deduper_from_args(args))
+    else:
+        gen = ChineseStrokeGenerator(args.seed, args.brush_width)
+        gen.generate_all(shard=args.shard, num_shards=args.num_shards, catalog=args.catalog,
+                         dedupe=deduper_from_args(args))
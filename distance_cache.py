@@ -0,0 +1,190 @@
+"""Distance-transform cache for chamfer/Hausdorff scoring of strokes and characters.
+
+Pixel IoU punishes a stroke drawn two pixels off as hard as a missing one.
+Here every ground-truth image of a dataset is turned once into a truncated
+Euclidean distance transform (distance to the nearest ink pixel, capped at
+`limit`), stacked into one float16 .npy next to the dataset and memory-mapped
+at scoring time. Scoring a candidate is then a gather of the reference
+distances at the candidate's ink pixels:
+
+    python distance_cache.py build chinese_strokes_dataset/chinese_strokes.json
+    python distance_cache.py score chinese_strokes_dataset/chinese_strokes.json attempts/ --out chamfer.json
+"""
+
+import os
+import json
+import argparse
+
+import numpy as np
+
+from scoring import foreground, load_images, metadata_ids
+
+EDT_LIMIT = 32      # pixels; farther ink counts as this far
+CACHE_DIR = "edt_cache"
+
+# ==========================================
+# Truncated Distance Transform
+# ==========================================
+
+def _column_distance(masks, limit):
+    # Vertical distance to the nearest ink pixel in the same column, capped at limit + 1
+    n, h, w = masks.shape
+    rows = np.arange(h)[None, :, None]
+    big = h + limit + 1
+    above = np.maximum.accumulate(np.where(masks, rows, -big), axis=1)
+    below = np.flip(np.minimum.accumulate(np.flip(np.where(masks, rows, 2 * big), axis=1), axis=1), axis=1)
+    return np.minimum(np.minimum(rows - above, below - rows), limit + 1).astype(np.float32)
+
+def truncated_edt(masks, limit=EDT_LIMIT):
+    """Exact Euclidean distance to the nearest True pixel of each (N, H, W) mask, capped at `limit`.
+
+    Separable: column distances g first, then d(x)^2 = min over |dx| <= limit
+    of dx^2 + g(x + dx)^2. Any point within `limit` is reached with |dx| <= limit,
+    so the truncated result is exact; the row pass is 2 * limit + 1 shifted minima.
+    """
+    g2 = _column_distance(masks, limit) ** 2
+    d2 = g2.copy()
+    for dx in range(1, int(limit) + 1):
+        step = np.float32(dx * dx)
+        np.minimum(d2[..., dx:], g2[..., :-dx] + step, out=d2[..., dx:])
+        np.minimum(d2[..., :-dx], g2[..., dx:] + step, out=d2[..., :-dx])
+    return np.minimum(np.sqrt(d2), limit)
+
+# ==========================================
+# Cache
+# ==========================================
+
+def cache_paths(metadata_path):
+    stem = os.path.splitext(os.path.basename(metadata_path))[0]
+    directory = os.path.join(os.path.dirname(os.path.abspath(metadata_path)), CACHE_DIR)
+    return os.path.join(directory, f"{stem}.npy"), os.path.join(directory, f"{stem}.json")
+
+def build_edt_cache(metadata_path, limit=EDT_LIMIT, batch_size=32):
+    """Distance-transform every image of a dataset into one float16 (N, H, W) .npy; return N."""
+    ids = metadata_ids(metadata_path)
+    image_dir = os.path.dirname(os.path.abspath(metadata_path))
+    ids = [i for i in ids if os.path.exists(os.path.join(image_dir, i))]
+    array_path, index_path = cache_paths(metadata_path)
+    os.makedirs(os.path.dirname(array_path), exist_ok=True)
+    if not ids:
+        return 0
+
+    first = load_images([os.path.join(image_dir, ids[0])])
+    shape = (len(ids),) + first.shape[1:3]
+    # Written through a memmap batch by batch, then renamed into place
+    tmp = f"{array_path}.{os.getpid()}.tmp"
+    out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float16, shape=shape)
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        images = load_images([os.path.join(image_dir, i) for i in batch], size=shape[:0:-1])
+        out[start:start + len(batch)] = truncated_edt(foreground(images), limit)
+    out.flush()
+    del out
+    os.replace(tmp, array_path)
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump({"limit": limit, "shape": shape, "ids": ids}, f, ensure_ascii=False)
+    return len(ids)
+
+class EdtCache:
+    """Memory-mapped reference distances of one dataset, indexed by image id."""
+
+    def __init__(self, metadata_path):
+        array_path, index_path = cache_paths(metadata_path)
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+        self.limit = index["limit"]
+        self.rows = {image_id: n for n, image_id in enumerate(index["ids"])}
+        self.distances = np.load(array_path, mmap_mode="r")
+
+    @property
+    def size(self):
+        """(W, H) of the cached images."""
+        return self.distances.shape[:0:-1]
+
+    def __contains__(self, image_id):
+        return image_id in self.rows
+
+    def distance(self, image_id):
+        return self.distances[self.rows[image_id]]
+
+    def directed(self, ids, masks):
+        """Candidate -> reference distances for (N, H, W) candidate ink masks.
+
+        Only the reference rows at the candidates' ink pixels are read from
+        the memmap. Returns (chamfer mean, Hausdorff max), NaN without ink.
+        """
+        rows = np.array([self.rows[i] for i in ids])
+        image, y, x = np.nonzero(masks)
+        return _per_image(image, self.distances[rows[image], y, x].astype(np.float32), len(ids))
+
+def _per_image(image, d, n):
+    # Mean and max of per-pixel distances grouped by image index; NaN for images without pixels
+    count = np.bincount(image, minlength=n)
+    mean = np.bincount(image, weights=d, minlength=n) / np.maximum(count, 1)
+    worst = np.zeros(n, dtype=np.float32)
+    np.maximum.at(worst, image, d)
+    empty = count == 0
+    return np.where(empty, np.nan, mean), np.where(empty, np.nan, worst)
+
+def chamfer_scores(cache, ids, candidates, symmetric=True):
+    """Chamfer and Hausdorff distances for an (N, H, W, 3) candidate stack.
+
+    Candidate -> reference is a gather from the cache. With `symmetric`, the
+    reference -> candidate direction needs the candidates' own (truncated)
+    transforms; chamfer is then the mean of both directions and Hausdorff the
+    max, with an empty side counting as `limit`.
+    """
+    fg = foreground(candidates)
+    chamfer, hausdorff = cache.directed(ids, fg)
+    scores = {"chamfer_cand": chamfer, "hausdorff_cand": hausdorff}
+    if symmetric:
+        cand_edt = truncated_edt(fg, cache.limit)
+        image, y, x = np.nonzero(np.stack([cache.distance(i) == 0 for i in ids]))
+        back, back_worst = _per_image(image, cand_edt[image, y, x], len(ids))
+        fill = lambda v: np.nan_to_num(v, nan=cache.limit)
+        scores["chamfer"] = (fill(chamfer) + fill(back)) / 2
+        scores["hausdorff"] = np.maximum(fill(hausdorff), fill(back_worst))
+    return scores
+
+def score_chamfer(metadata_path, candidate_dir, symmetric=True, batch_size=32):
+    """Per-id chamfer/Hausdorff rows for every candidate named like a cached reference."""
+    cache = EdtCache(metadata_path)
+    present = set(os.listdir(candidate_dir))
+    todo = [i for i in cache.rows if i in present]
+    rows = []
+    for start in range(0, len(todo), batch_size):
+        batch = todo[start:start + batch_size]
+        candidates = load_images([os.path.join(candidate_dir, i) for i in batch], size=cache.size)
+        scores = chamfer_scores(cache, batch, candidates, symmetric)
+        for n, image_id in enumerate(batch):
+            rows.append({"id": image_id, **{k: None if np.isnan(v[n]) else round(float(v[n]), 3)
+                                            for k, v in scores.items()}})
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distance-transform cache and chamfer scoring.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="precompute reference distance transforms")
+    b.add_argument("metadata")
+    b.add_argument("--limit", type=float, default=EDT_LIMIT, help="truncation distance, pixels")
+    s = sub.add_parser("score", help="chamfer/Hausdorff of candidate PNGs named by image id")
+    s.add_argument("metadata")
+    s.add_argument("candidates")
+    s.add_argument("--one-sided", action="store_true", help="candidate -> reference only (gather, no candidate EDT)")
+    s.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        n = build_edt_cache(args.metadata, args.limit)
+        print(f"✅ Cached {n} distance transforms in {os.path.dirname(cache_paths(args.metadata)[0])}")
+    else:
+        rows = score_chamfer(args.metadata, args.candidates, not args.one_sided)
+        print(f"✅ Scored {len(rows)} candidates")
+        key = "chamfer_cand" if args.one_sided else "chamfer"
+        values = [r[key] for r in rows if r[key] is not None]
+        if values:
+            print(f"   mean {key}: {np.mean(values):.3f} px")
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(rows, f, indent=2, ensure_ascii=False)
+            print(f"📊 Scores saved to {args.out}")
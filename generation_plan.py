@@ -0,0 +1,135 @@
+"""Declarative generation plans for the DC-ACE generators.
+
+A plan (JSON, or YAML when PyYAML is installed) lists task families with
+their counts, parameter distributions and output mode:
+
+    {
+      "output": "png",
+      "families": [
+        {"family": "poly", "count": 25,
+         "params": {"n": {"choice": [3, 4, 5, 6]}, "size": {"uniform": [30, 100]},
+                    "color": {"choice": "COLORS"}}}
+      ]
+    }
+
+compile_plan() turns it into a flat list of Jobs, sorted most-expensive
+first, that the serial, parallel and sharded executors all consume. Task
+ids are assigned in plan order and each job samples from its own RNG
+(task_seed of "<id>/params", apart from the bare-id stream the generators
+draw with), so a job is identical however the list is later split or
+reordered.
+"""
+
+import json
+import math
+import random
+from collections import namedtuple
+
+from sharding import task_seed
+
+OUTPUT_MODES = ("png", "metadata")
+
+# id first, so jobs work with sharding.select_jobs and render_pipeline
+Job = namedtuple("Job", "id family params output cost index")
+
+# ==========================================
+# Loading
+# ==========================================
+
+def load_plan(plan):
+    """Return a plan dict from a dict, or a .json/.yaml/.yml path."""
+    if isinstance(plan, dict):
+        return plan
+    with open(plan, encoding="utf-8") as f:
+        if plan.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("YAML plans need PyYAML: pip install pyyaml")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+def scale_plan(plan, factor):
+    """Copy of `plan` with every family count multiplied by `factor` (rounded up)."""
+    plan = dict(plan)
+    plan["families"] = [{**entry, "count": math.ceil(entry["count"] * factor)} for entry in plan["families"]]
+    return plan
+
+# ==========================================
+# Distributions
+# ==========================================
+
+def sample_value(spec, rng, params, palettes):
+    """Draw one value from a distribution spec.
+
+    Supported specs: a constant; {"uniform": [lo, hi]}; {"randint": [lo, hi]};
+    {"choice": values}; {"sample": values, "k": k}. `values` may name a
+    palette (e.g. "COLORS"). A choice with "size": "<param>" draws a list as
+    long as that already-sampled parameter.
+    """
+    if not isinstance(spec, dict):
+        return spec
+    if "uniform" in spec:
+        return rng.uniform(*spec["uniform"])
+    if "randint" in spec:
+        return rng.randint(*spec["randint"])
+    if "choice" in spec:
+        values = palettes.get(spec["choice"], spec["choice"]) if isinstance(spec["choice"], str) else spec["choice"]
+        if "size" in spec:
+            return [rng.choice(values) for _ in range(params[spec["size"]])]
+        return rng.choice(values)
+    if "sample" in spec:
+        values = palettes.get(spec["sample"], spec["sample"]) if isinstance(spec["sample"], str) else spec["sample"]
+        return rng.sample(values, spec["k"])
+    raise ValueError(f"unknown distribution spec: {spec}")
+
+# ==========================================
+# Compilation
+# ==========================================
+
+def compile_plan(plan, families, seed=None, place=None, palettes=None, rejected=None):
+    """Compile a plan into Jobs sorted by descending cost.
+
+    `families` maps a family name to a registry entry with at least "prefix"
+    and "cost" (a number or a callable of the sampled params). `place(name,
+    params, rng, task_id)` may add placement params such as x/y, or return
+    None to reject the task; rejected ids are appended to `rejected` and
+    keep their number, so the other tasks' ids do not shift. Job.index is
+    the job's position in plan order, which is the order metadata is
+    written in.
+    """
+    plan = load_plan(plan)
+    palettes = palettes or {}
+    default_output = plan.get("output", "png")
+    counters = {}
+    jobs = []
+    for entry in plan["families"]:
+        name = entry["family"]
+        if name not in families:
+            raise KeyError(f"unknown task family '{name}' (known: {', '.join(sorted(families))})")
+        family = families[name]
+        output = entry.get("output", default_output)
+        if output not in OUTPUT_MODES:
+            raise ValueError(f"unknown output mode '{output}' for family '{name}'")
+        prefix = family["prefix"]
+        for _ in range(entry["count"]):
+            counters[prefix] = counters.get(prefix, 0) + 1
+            task_id = f"{prefix}_{counters[prefix]}.png"
+            # Its own stream: the bare id seeds the draw-time randomness, and
+            # sharing it would tie the sampled params to the drawn layout
+            rng = random.Random(task_seed(seed, f"{task_id}/params")) if seed is not None else random.Random()
+            params = {}
+            for key, spec in entry.get("params", {}).items():
+                params[key] = sample_value(spec, rng, params, palettes)
+            if place:
+                placement = place(name, params, rng, task_id)
+                if placement is None:
+                    if rejected is not None:
+                        rejected.append(task_id)
+                    continue
+                params.update(placement)
+            cost = family["cost"](params) if callable(family["cost"]) else family["cost"]
+            jobs.append(Job(task_id, name, params, output, cost, len(jobs)))
+    # Longest first: parallel workers pulling from the front finish together
+    jobs.sort(key=lambda job: -job.cost)
+    return jobs
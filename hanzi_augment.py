@@ -0,0 +1,110 @@
+"""Batch augmentation of character medians for DC-ACE.
+
+Glyph medians are padded into one (chars, strokes, points, 2) array, and
+every transform below is applied to all characters and samples at once:
+
+    global:     rotation, shear, anisotropic scale (one affine per sample)
+    per stroke: translation jitter, width variation
+    elastic:    a smooth displacement field made of a few random sine modes
+
+Coordinates are em-centered graphics.txt units (x - 512, y - 512; see
+hanzi_geometry.CharacterGeometryCache). All randomness comes from one
+seeded numpy Generator, so a (seed, batch) pair always gives the same
+variants.
+"""
+
+import numpy as np
+
+# Default strengths; angles in degrees, lengths in graphics.txt units
+AUGMENT_DEFAULTS = {
+    "rotate": 8.0,          # max |rotation|
+    "shear": 0.15,          # max |x-shear factor|
+    "scale": 0.12,          # log-uniform anisotropic scale in exp([-s, s])
+    "jitter": 12.0,         # std of per-stroke translation
+    "elastic": 10.0,        # amplitude of the displacement field
+    "elastic_modes": 4,     # sine modes summed into the field
+    "elastic_wavelength": 600.0,
+    "width": 0.2,           # std of log stroke-width factor
+}
+
+# ==========================================
+# Padding
+# ==========================================
+
+def pad_medians(glyphs):
+    """Pad a list of glyphs (each a list of (N, 2) strokes) into arrays.
+
+    Returns (points, mask): points (C, S, P, 2) float with zeros in padding,
+    mask (C, S, P) bool marking real points.
+    """
+    C = len(glyphs)
+    S = max((len(g) for g in glyphs), default=0)
+    P = max((len(s) for g in glyphs for s in g), default=0)
+    points = np.zeros((C, S, P, 2))
+    mask = np.zeros((C, S, P), dtype=bool)
+    for c, glyph in enumerate(glyphs):
+        for s, stroke in enumerate(glyph):
+            points[c, s, :len(stroke)] = stroke
+            mask[c, s, :len(stroke)] = True
+    return points, mask
+
+def unpad(points, mask):
+    """Back to nested lists: [char][sample][stroke] -> (N, 2), for (C, K, S, P, 2) input."""
+    C, K = points.shape[:2]
+    return [[[points[c, k, s][mask[c, s]] for s in range(mask.shape[1]) if mask[c, s].any()]
+             for k in range(K)] for c in range(C)]
+
+# ==========================================
+# Augmentation
+# ==========================================
+
+def augment_medians(points, mask, samples, seed=None, **strength):
+    """Draw `samples` augmented variants of every padded glyph.
+
+    Returns (variants, widths): variants (C, samples, S, P, 2) and per-stroke
+    width factors (C, samples, S) to multiply the pen or brush width by.
+    Padding stays zero. Keyword arguments override AUGMENT_DEFAULTS.
+    """
+    opts = {**AUGMENT_DEFAULTS, **strength}
+    rng = np.random.default_rng(seed)
+    C, S, P, _ = points.shape
+    K = samples
+    shape = (C, K)
+
+    # Global affine per (char, sample): rotation @ shear @ anisotropic scale
+    theta = np.radians(rng.uniform(-opts["rotate"], opts["rotate"], shape))
+    shear = rng.uniform(-opts["shear"], opts["shear"], shape)
+    sx, sy = np.exp(rng.uniform(-opts["scale"], opts["scale"], (2,) + shape))
+    cos, sin = np.cos(theta), np.sin(theta)
+    affine = np.empty(shape + (2, 2))
+    affine[..., 0, 0] = cos * sx
+    affine[..., 0, 1] = (cos * shear - sin) * sy
+    affine[..., 1, 0] = sin * sx
+    affine[..., 1, 1] = (sin * shear + cos) * sy
+    out = np.einsum("ckij,cspj->ckspi", affine, points)
+
+    # Per-stroke translation jitter
+    out += rng.normal(0.0, opts["jitter"], shape + (S, 1, 2))
+
+    # Elastic field: d(p) = sum_m a_m * sin(w_m . p + phi_m), smooth at the chosen wavelength
+    M = opts["elastic_modes"]
+    if M and opts["elastic"]:
+        freq = 2 * np.pi / opts["elastic_wavelength"]
+        w = rng.normal(0.0, freq, shape + (M, 2))
+        phi = rng.uniform(0, 2 * np.pi, shape + (M,))
+        amp = rng.normal(0.0, opts["elastic"] / np.sqrt(M), shape + (M, 2))
+        phase = np.einsum("ckspi,ckmi->ckspm", out, w) + phi[:, :, None, None, :]
+        out += np.einsum("ckspm,ckmi->ckspi", np.sin(phase), amp)
+
+    widths = np.exp(rng.normal(0.0, opts["width"], shape + (S,)))
+
+    out *= mask[:, None, :, :, None]
+    return out, widths
+
+def augment_glyphs(glyphs, samples, seed=None, **strength):
+    """Augment a list of glyphs; return [char][sample] -> (strokes, widths)."""
+    points, mask = pad_medians(glyphs)
+    variants, widths = augment_medians(points, mask, samples, seed, **strength)
+    nested = unpad(variants, mask)
+    return [[(nested[c][k], widths[c, k, :len(nested[c][k])]) for k in range(samples)]
+            for c in range(len(glyphs))]
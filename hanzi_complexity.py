@@ -0,0 +1,187 @@
+"""Per-character complexity index for automatic character selection.
+
+Features are computed once for every graphics.txt character (vectorized over
+the padded median array) and stored in a `glyph_features` table in the
+SQLite catalog, so picking characters for a difficulty level is an indexed
+range query instead of a hand-curated list:
+
+    python hanzi_complexity.py build draw_character/graphics.txt
+    python hanzi_complexity.py select --min-strokes 6 --max-strokes 9 --max-box 0.5
+"""
+
+import json
+import argparse
+
+import numpy as np
+
+from hanzi_augment import pad_medians
+from hanzi_tensors import load_glyphs
+from task_catalog import DEFAULT_CATALOG, open_catalog
+
+TURN_BINS = 8  # histogram of |turning angle| at median vertices over [0, 180°]
+
+# Default ranges per dataset level (stroke counts are inclusive)
+LEVEL_RANGES = {
+    1: {"min_strokes": 1, "max_strokes": 3},
+    2: {"min_strokes": 2, "max_strokes": 5},
+    3: {"min_strokes": 6, "max_strokes": 9},
+    4: {"min_strokes": 10, "max_strokes": 14},
+}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS glyph_features (
+    character     TEXT PRIMARY KEY,
+    strokes       INTEGER,
+    median_length REAL,   -- summed median polyline length, graphics.txt units
+    x0 REAL, y0 REAL, x1 REAL, y1 REAL,
+    box_area      REAL,   -- bbox area / 1024^2
+    aspect        REAL,   -- bbox width / height
+    turning       REAL,   -- total |turning angle| along medians, degrees
+    turn_hist     TEXT    -- JSON list of {TURN_BINS} vertex counts
+);
+CREATE INDEX IF NOT EXISTS idx_glyph_strokes ON glyph_features(strokes);
+CREATE INDEX IF NOT EXISTS idx_glyph_length ON glyph_features(median_length);
+CREATE INDEX IF NOT EXISTS idx_glyph_box ON glyph_features(box_area);
+CREATE INDEX IF NOT EXISTS idx_glyph_turning ON glyph_features(turning);
+"""
+
+# ==========================================
+# Features
+# ==========================================
+
+def glyph_features(glyphs):
+    """Feature columns for a list of glyphs (each a list of (N, 2) median strokes).
+
+    Returns a dict of arrays of length len(glyphs).
+    """
+    points, mask = pad_medians(glyphs)
+    C = len(glyphs)
+    strokes = mask.any(axis=2).sum(axis=1)
+
+    seg = np.diff(points, axis=2)
+    seg_ok = mask[:, :, 1:] & mask[:, :, :-1]
+    seg_len = np.hypot(seg[..., 0], seg[..., 1]) * seg_ok
+    median_length = seg_len.sum(axis=(1, 2))
+
+    big = np.where(mask[..., None], points, np.inf)
+    lo = big.reshape(C, -1, 2).min(axis=1)
+    hi = np.where(mask[..., None], points, -np.inf).reshape(C, -1, 2).max(axis=1)
+    size = np.maximum(hi - lo, 1e-9)
+
+    # Turning angles at interior vertices, wrapped to [0, pi]
+    heading = np.arctan2(seg[..., 1], seg[..., 0])
+    turn = np.abs((np.diff(heading, axis=2) + np.pi) % (2 * np.pi) - np.pi)
+    turn_ok = seg_ok[:, :, 1:] & seg_ok[:, :, :-1]
+    turn = np.where(turn_ok, turn, 0.0)
+    bins = np.minimum((turn / np.pi * TURN_BINS).astype(int), TURN_BINS - 1)
+    hist = np.zeros((C, TURN_BINS), dtype=int)
+    rows = np.broadcast_to(np.arange(C)[:, None, None], turn.shape)
+    np.add.at(hist, (rows[turn_ok], bins[turn_ok]), 1)
+
+    return {
+        "strokes": strokes,
+        "median_length": median_length,
+        "x0": lo[:, 0], "y0": lo[:, 1], "x1": hi[:, 0], "y1": hi[:, 1],
+        "box_area": size[:, 0] * size[:, 1] / 1024 ** 2,
+        "aspect": size[:, 0] / size[:, 1],
+        "turning": np.degrees(turn.sum(axis=(1, 2))),
+        "turn_hist": hist,
+    }
+
+# ==========================================
+# Index
+# ==========================================
+
+def build_feature_index(graphics_path, catalog=DEFAULT_CATALOG, chunk=2048):
+    """(Re)compute the feature table for every character in graphics.txt; return the row count."""
+    chars, glyphs = load_glyphs(graphics_path)
+    conn = open_catalog(catalog)
+    try:
+        conn.executescript(SCHEMA)
+        with conn:
+            conn.execute("DELETE FROM glyph_features")
+            # Chunked so the padded array stays small for the full ~9k corpus
+            for start in range(0, len(glyphs), chunk):
+                feats = glyph_features(glyphs[start:start + chunk])
+                rows = [(chars[start + i], int(feats["strokes"][i]), float(feats["median_length"][i]),
+                         float(feats["x0"][i]), float(feats["y0"][i]), float(feats["x1"][i]), float(feats["y1"][i]),
+                         float(feats["box_area"][i]), float(feats["aspect"][i]), float(feats["turning"][i]),
+                         json.dumps(feats["turn_hist"][i].tolist()))
+                        for i in range(len(feats["strokes"]))]
+                conn.executemany("INSERT INTO glyph_features VALUES (?,?,?,?,?,?,?,?,?,?,?)", rows)
+    finally:
+        conn.close()
+    return len(chars)
+
+def ensure_feature_index(graphics_path, catalog=DEFAULT_CATALOG):
+    """Build the feature table on first use; later runs reuse it (rebuild with `build`)."""
+    conn = open_catalog(catalog)
+    try:
+        conn.executescript(SCHEMA)
+        built = conn.execute("SELECT 1 FROM glyph_features LIMIT 1").fetchone()
+    finally:
+        conn.close()
+    if not built:
+        n = build_feature_index(graphics_path, catalog)
+        print(f"📐 Indexed complexity features for {n} characters")
+
+def select_characters(catalog=DEFAULT_CATALOG, level=None, min_strokes=None, max_strokes=None,
+                      min_length=None, max_length=None, max_box=None, max_turning=None, limit=None):
+    """Characters matching every given bound, simplest first (strokes, then turning)."""
+    bounds = dict(LEVEL_RANGES.get(level, {}))
+    for key, value in (("min_strokes", min_strokes), ("max_strokes", max_strokes)):
+        if value is not None:
+            bounds[key] = value
+    clauses, args = [], []
+    for column, op, value in (("strokes", ">=", bounds.get("min_strokes")), ("strokes", "<=", bounds.get("max_strokes")),
+                              ("median_length", ">=", min_length), ("median_length", "<=", max_length),
+                              ("box_area", "<=", max_box), ("turning", "<=", max_turning)):
+        if value is not None:
+            clauses.append(f"{column} {op} ?"); args.append(value)
+    sql = "SELECT character FROM glyph_features"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY strokes, turning"
+    if limit is not None:
+        sql += " LIMIT ?"; args.append(limit)
+    conn = open_catalog(catalog)
+    try:
+        conn.executescript(SCHEMA)
+        return [row[0] for row in conn.execute(sql, args)]
+    finally:
+        conn.close()
+
+def add_selection_args(parser):
+    parser.add_argument("--level", type=int, choices=sorted(LEVEL_RANGES), help="preset stroke-count range")
+    parser.add_argument("--min-strokes", type=int)
+    parser.add_argument("--max-strokes", type=int)
+    parser.add_argument("--min-length", type=float, help="min summed median length")
+    parser.add_argument("--max-length", type=float, help="max summed median length")
+    parser.add_argument("--max-box", type=float, help="max bbox area as a fraction of the em square")
+    parser.add_argument("--max-turning", type=float, help="max total turning, degrees")
+
+def selection_from_args(args, catalog, limit=None):
+    return select_characters(catalog, args.level, args.min_strokes, args.max_strokes, args.min_length,
+                             args.max_length, args.max_box, args.max_turning, limit)
+
+def has_selection(args):
+    return any(getattr(args, k) is not None for k in ("level", "min_strokes", "max_strokes", "min_length",
+                                                       "max_length", "max_box", "max_turning"))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DC-ACE character complexity index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="compute features for every graphics.txt character")
+    b.add_argument("graphics")
+    s = sub.add_parser("select", help="print characters matching the given ranges")
+    add_selection_args(s)
+    s.add_argument("--limit", type=int)
+    for p in (b, s):
+        p.add_argument("--catalog", default=DEFAULT_CATALOG)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        n = build_feature_index(args.graphics, args.catalog)
+        print(f"✅ Indexed {n} characters into {args.catalog}")
+    else:
+        print("".join(selection_from_args(args, args.catalog, args.limit)))
@@ -0,0 +1,234 @@
+"""Glyph geometry from MakeMeAHanzi graphics.txt.
+
+Each graphics.txt entry carries `strokes` (SVG outline paths with M/L/Q/C/Z
+commands) next to the `medians` the generators draw. This module parses the
+paths and flattens their Bézier segments into polygons, with the number of
+segments per curve chosen from a flatness bound so that the chord error
+stays under `tolerance` (graphics.txt units, 1024 per em).
+CharacterGeometryCache keeps the prepared geometry per character so that
+variations and later runs only pay for the affine transform and the fill.
+"""
+
+import os
+import re
+import json
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_TOLERANCE = 2.0
+
+# ==========================================
+# SVG Path Parsing
+# ==========================================
+
+_TOKEN = re.compile(r"[MLQCZmlqcz]|-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_ARITY = {"M": 1, "L": 1, "Q": 2, "C": 3, "Z": 0}
+
+def parse_path(d):
+    """Parse an SVG path into subpaths of segments.
+
+    Returns a list of subpaths; each is a list of (kind, points) with kind
+    "L", "Q" or "C" and points an (order + 1, 2) array starting at the
+    current point. Relative commands are resolved to absolute ones.
+    """
+    tokens = _TOKEN.findall(d)
+    subpaths, current = [], None
+    pos = start = np.zeros(2)
+    cmd = None
+    i = 0
+    while i < len(tokens):
+        if tokens[i].isalpha():
+            cmd = tokens[i]
+            i += 1
+        op = cmd.upper()
+        if op == "Z":
+            if current is not None and np.any(pos != start):
+                current.append(("L", np.array([pos, start])))
+            pos = start
+            current = None
+            continue
+        n = _ARITY[op]
+        pts = np.array(tokens[i:i + 2 * n], dtype=float).reshape(n, 2)
+        i += 2 * n
+        if cmd.islower():
+            pts = pts + pos
+        if op == "M":
+            current = []
+            subpaths.append(current)
+            pos = start = pts[0]
+            cmd = "l" if cmd.islower() else "L"  # extra pairs after M are line-tos
+            continue
+        if current is None:  # drawing after Z continues from the last start point
+            current = []
+            subpaths.append(current)
+        current.append((op, np.vstack((pos, pts))))
+        pos = pts[-1]
+    return [sub for sub in subpaths if sub]
+
+# ==========================================
+# Adaptive Flattening
+# ==========================================
+
+def _segment_counts(ctrl, order, tolerance):
+    # Uniform subdivision into n pieces keeps the chord error under
+    # max|B''| / (8 n^2); for a Bézier of degree k, |B''| <= k (k - 1) max|second difference|
+    if order == 1:
+        return np.ones(len(ctrl), dtype=int)
+    second = ctrl[:, :-2] - 2 * ctrl[:, 1:-1] + ctrl[:, 2:]
+    dd = np.hypot(second[..., 0], second[..., 1]).max(axis=1)
+    bound = order * (order - 1) * dd / (8 * tolerance)
+    return np.maximum(1, np.ceil(np.sqrt(bound))).astype(int)
+
+def _bezier_points(ctrl, order, counts):
+    # Evaluate every curve of one degree at its own parameter samples in one pass
+    # (t = 0 is the previous point, so samples run over (0, 1])
+    curve = np.repeat(np.arange(len(ctrl)), counts)
+    t = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + 1) / np.repeat(counts, counts)
+    t = t[:, None]
+    c = ctrl[curve]
+    if order == 1:
+        return c[:, 0] + (c[:, 1] - c[:, 0]) * t
+    if order == 2:
+        u = 1 - t
+        return u * u * c[:, 0] + 2 * u * t * c[:, 1] + t * t * c[:, 2]
+    u = 1 - t
+    return u ** 3 * c[:, 0] + 3 * u * u * t * c[:, 1] + 3 * u * t * t * c[:, 2] + t ** 3 * c[:, 3]
+
+def flatten_subpath(segments, tolerance=DEFAULT_TOLERANCE):
+    """Polygon (N, 2) approximating one subpath within `tolerance`."""
+    orders = {"L": 1, "Q": 2, "C": 3}
+    pieces = [None] * len(segments)
+    for kind, order in orders.items():
+        idx = [i for i, (k, _) in enumerate(segments) if k == kind]
+        if not idx:
+            continue
+        ctrl = np.stack([segments[i][1] for i in idx])
+        counts = _segment_counts(ctrl, order, tolerance)
+        pts = _bezier_points(ctrl, order, counts)
+        for i, chunk in zip(idx, np.split(pts, np.cumsum(counts)[:-1])):
+            pieces[i] = chunk
+    return np.vstack([segments[0][1][:1]] + pieces)
+
+def path_polygons(d, tolerance=DEFAULT_TOLERANCE):
+    """Flatten an SVG path string into a list of closed polygons."""
+    return [flatten_subpath(sub, tolerance) for sub in parse_path(d)]
+
+def glyph_polygons(strokes, tolerance=DEFAULT_TOLERANCE):
+    """Outline polygons of every stroke path of a glyph, in stroke order."""
+    return [path_polygons(d, tolerance) for d in strokes]
+
+def max_flattening_error(d, tolerance=DEFAULT_TOLERANCE, probe=64):
+    """Worst distance from densely sampled curve points to the flattened polygon.
+
+    A check for tuning `tolerance`, not used on the render path.
+    """
+    worst = 0.0
+    for sub in parse_path(d):
+        poly = flatten_subpath(sub, tolerance)
+        ctrl_pts = []
+        for kind, ctrl in sub:
+            order = {"L": 1, "Q": 2, "C": 3}[kind]
+            ctrl_pts.append(_bezier_points(ctrl[None], order, np.array([probe])))
+        dense = np.vstack(ctrl_pts)
+        a, b = poly[:-1], poly[1:]
+        ab = b - a
+        denom = np.maximum((ab ** 2).sum(axis=1), 1e-12)
+        t = np.clip(((dense[:, None] - a) * ab).sum(axis=2) / denom, 0, 1)
+        proj = a + t[..., None] * ab
+        dist = np.hypot(*(dense[:, None] - proj).transpose(2, 0, 1)).min(axis=1)
+        worst = max(worst, float(dist.max()))
+    return worst
+
+# ==========================================
+# Per-Character Geometry Cache
+# ==========================================
+
+GEOMETRY_KINDS = ("medians", "outlines")
+
+class CharacterGeometryCache:
+    """LRU of prepared glyph geometry, optionally backed by .npz files on disk.
+
+    Geometry is centered on the 1024-unit em (x - 512, y - 512), so drawing a
+    variation is `pts * scale + (offset_x, offset_y)`. "medians" is a list of
+    (N, 2) stroke skeletons; "outlines" is a list (per stroke) of flattened
+    polygons. Disk entries are keyed by a hash of the glyph data and the
+    tolerance, so edited graphics.txt entries are never served stale.
+    """
+
+    def __init__(self, data_map, maxsize=256, cache_dir=None, tolerance=DEFAULT_TOLERANCE):
+        self.data_map = data_map
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self.tolerance = tolerance
+        self._lru = OrderedDict()
+        self.hits = self.disk_hits = self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def medians(self, char):
+        return self.get(char, "medians")
+
+    def outlines(self, char):
+        return self.get(char, "outlines")
+
+    def get(self, char, kind):
+        key = (char, kind)
+        if key in self._lru:
+            self.hits += 1
+            self._lru.move_to_end(key)
+            return self._lru[key]
+        path = self._disk_path(char, kind)
+        if path and os.path.exists(path):
+            self.disk_hits += 1
+            geometry = _unpack(np.load(path), kind)
+        else:
+            self.misses += 1
+            geometry = self._prepare(char, kind)
+            if path:
+                # Write-then-rename so concurrent workers never read a partial file
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    np.savez(f, **_pack(geometry, kind))
+                os.replace(tmp, path)
+        self._lru[key] = geometry
+        if len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+        return geometry
+
+    def _prepare(self, char, kind):
+        entry = self.data_map[char]
+        if kind == "medians":
+            return [np.asarray(stroke, dtype=float) - 512 for stroke in entry["medians"]]
+        return [[poly - 512 for poly in stroke] for stroke in glyph_polygons(entry["strokes"], self.tolerance)]
+
+    def _disk_path(self, char, kind):
+        if not self.cache_dir:
+            return None
+        entry = self.data_map[char]
+        source = entry["medians"] if kind == "medians" else [entry["strokes"], self.tolerance]
+        digest = hashlib.sha256(json.dumps([char, kind, source]).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{kind}-{digest}.npz")
+
+    def stats(self):
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "size": len(self._lru)}
+
+def _pack(geometry, kind):
+    # Ragged lists -> one point array plus length arrays
+    if kind == "medians":
+        polys, per_stroke = geometry, [1] * len(geometry)
+    else:
+        polys, per_stroke = [p for stroke in geometry for p in stroke], [len(stroke) for stroke in geometry]
+    return {
+        "points": np.vstack(polys) if polys else np.empty((0, 2)),
+        "lengths": np.array([len(p) for p in polys], dtype=np.int64),
+        "per_stroke": np.array(per_stroke, dtype=np.int64),
+    }
+
+def _unpack(data, kind):
+    polys = np.split(data["points"], np.cumsum(data["lengths"])[:-1]) if len(data["lengths"]) else []
+    if kind == "medians":
+        return polys
+    bounds = np.concatenate(([0], np.cumsum(data["per_stroke"])))
+    return [polys[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
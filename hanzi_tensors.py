@@ -0,0 +1,132 @@
+"""Dense median tensors for sequence and trajectory models.
+
+graphics.txt medians have a different number of unevenly spaced points per
+stroke. This exporter resamples every stroke by arc length — to a fixed
+point count or a fixed spacing — in one vectorized pass over the padded
+(chars, strokes, points, 2) array, and saves the corpus as a single .npz:
+
+    python hanzi_tensors.py draw_character/graphics.txt medians.npz --points 32
+    python hanzi_tensors.py draw_character/graphics.txt medians.npz --spacing 16
+
+Arrays in the file:
+    characters  (C,)          the glyphs, in graphics.txt order
+    points      (C, S, P, 2)  float32 graphics.txt coordinates (1024 em, y up), zero padded
+    mask        (C, S, P)     bool, real points
+    stroke_order(C, S)        int16 stroke index in writing order, -1 for padding
+    strokes     (C,)          int16 stroke counts
+"""
+
+import json
+import argparse
+
+import numpy as np
+
+from hanzi_augment import pad_medians
+
+# ==========================================
+# Arc-Length Resampling
+# ==========================================
+
+def resample_medians(points, mask, count=None, spacing=None):
+    """Resample padded strokes (C, S, P, 2) by arc length.
+
+    With `count`, every stroke gets exactly `count` evenly spaced points.
+    With `spacing`, points are `spacing` units apart along the stroke (the
+    last one lands on the stroke end), so longer strokes get more points.
+    Returns (resampled (C, S, K, 2), mask (C, S, K)).
+    """
+    if (count is None) == (spacing is None):
+        raise ValueError("give exactly one of count or spacing")
+    C, S, P, _ = points.shape
+    seg = np.diff(points, axis=2)
+    seg_len = np.hypot(seg[..., 0], seg[..., 1]) * (mask[..., 1:] & mask[..., :-1])
+    cum = np.concatenate((np.zeros((C, S, 1)), np.cumsum(seg_len, axis=2)), axis=2)
+    total = cum[..., -1]
+    n = mask.sum(axis=2)
+
+    # Target arc-length fractions u in [0, 1] per output sample
+    if count is not None:
+        K = count
+        u = np.broadcast_to(np.linspace(0.0, 1.0, K), (C, S, K))
+        out_mask = np.broadcast_to((n > 0)[..., None], (C, S, K))
+    else:
+        steps = np.where(n > 0, np.ceil(total / spacing).astype(int) + 1, 0)
+        K = max(int(steps.max(initial=0)), 1)
+        k = np.arange(K)
+        u = np.minimum(k * spacing, total[..., None]) / np.maximum(total, 1e-12)[..., None]
+        out_mask = k < steps[..., None]
+
+    # One searchsorted over all strokes: each row's normalized arc length is
+    # offset by 2 * row so rows stay sorted; padding sits at 1.5 inside its row
+    rows = C * S
+    norm = np.where(mask, cum / np.maximum(total, 1e-12)[..., None], 1.5).reshape(rows, P)
+    offset = 2.0 * np.arange(rows)
+    keys = (norm + offset[:, None]).ravel()
+    flat_u = u.reshape(rows, K)
+    j = np.searchsorted(keys, (flat_u + offset[:, None]).ravel(), side="right").reshape(rows, K) - 1
+    j -= (np.arange(rows) * P)[:, None]
+    last = np.maximum(n.reshape(rows) - 1, 0)[:, None]
+    j = np.clip(j, 0, np.maximum(last - 1, 0))
+    j1 = np.minimum(j + 1, last)
+
+    r = np.arange(rows)[:, None]
+    a, b = norm[r, j], norm[r, j1]
+    frac = np.where(b > a, (flat_u - a) / np.where(b > a, b - a, 1.0), 0.0)
+    flat_pts = points.reshape(rows, P, 2)
+    out = flat_pts[r, j] + frac[..., None] * (flat_pts[r, j1] - flat_pts[r, j])
+
+    out_mask = np.ascontiguousarray(out_mask)
+    out = out.reshape(C, S, K, 2) * out_mask[..., None]
+    return out, out_mask
+
+# ==========================================
+# Export
+# ==========================================
+
+def load_glyphs(graphics_path):
+    """(characters, glyphs) for every graphics.txt entry with medians."""
+    chars, glyphs = [], []
+    with open(graphics_path, encoding="utf-8") as f:
+        for line in f:
+            item = json.loads(line)
+            if item.get("medians"):
+                chars.append(item["character"])
+                glyphs.append([np.asarray(s, dtype=float) for s in item["medians"]])
+    return chars, glyphs
+
+def export_tensors(graphics_path, output_path, count=None, spacing=None):
+    """Resample the whole corpus and write one .npz; return its array shapes."""
+    chars, glyphs = load_glyphs(graphics_path)
+    padded, mask = pad_medians(glyphs)
+    points, point_mask = resample_medians(padded, mask, count, spacing)
+    strokes = mask.any(axis=2)
+    order = np.where(strokes, np.arange(strokes.shape[1]), -1).astype(np.int16)
+    arrays = {
+        "characters": np.array(chars),
+        "points": points.astype(np.float32),
+        "mask": point_mask,
+        "stroke_order": order,
+        "strokes": strokes.sum(axis=1).astype(np.int16),
+    }
+    # Uncompressed: loading is one read per array, no inflate step
+    np.savez(output_path, **arrays)
+    return {k: v.shape for k, v in arrays.items()}
+
+def load_tensors(path):
+    """Load an exported corpus as a dict of arrays."""
+    with np.load(path) as data:
+        return {k: data[k] for k in data.files}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export arc-length resampled median tensors.")
+    parser.add_argument("graphics", help="MakeMeAHanzi graphics.txt")
+    parser.add_argument("output", help=".npz path")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--points", type=int, help="fixed points per stroke")
+    group.add_argument("--spacing", type=float, help="fixed spacing along each stroke, graphics.txt units")
+    args = parser.parse_args()
+
+    shapes = export_tensors(args.graphics, args.output, args.points, args.spacing)
+    print(f"✅ Exported {shapes['points'][0]} characters to {args.output}")
+    for name, shape in shapes.items():
+        print(f"   {name}: {shape}")
@@ -0,0 +1,10 @@
+"""Turtle color palette shared by the DC-ACE generators and tools.
+
+Kept apart from task_factory so scoring and retrieval import it without
+turtle or tkinter (headless scoring machines).
+"""
+
+COLORS = [
+    "red", "green", "blue", "orange", "purple",
+    "brown", "black", "cyan", "magenta", "gold", "navy", "lime"
+]
@@ -0,0 +1,290 @@
+"""Perceptual-hash deduplication of generated samples.
+
+Families whose only free parameters are size and position (draw_tv,
+draw_donut, draw_target) and the near-identical Chinese variations keep
+producing the same drawing moved or slightly resized. Each image gets a
+key while it is being written, stored in its metadata as "phash" (hex):
+
+    colors   which COLORS entries make up its ink (a bit each)
+    full     64-bit DCT pHash of the whole canvas (position and size count)
+    shape    the same pHash of the ink's bounding box (they do not)
+
+Two images are only compared when their colors match, since prompts and
+color IoU depend on them. The shape hash is used, within one family, only
+for the position/size-invariant families (INVARIANT_TYPES, --dedupe-invariant);
+every other family compares whole canvases. Hashes of kept images live in
+BK-trees (metric trees over Hamming distance), so finding a kept image
+within `radius` bits visits only a few branches instead of every earlier
+sample.
+
+Verdicts are decided after generation, over the metadata in job order
+(Deduper.resolve), so the first image of a group is kept however the
+render workers were scheduled; sharded runs only hash, and sharding.merge
+decides across all shards. A Deduper either flags near-duplicates
+(metadata gains "duplicate_of" and "phash_distance") or rejects them (the
+PNG, already written, is deleted and the entry dropped). The generators
+take it as --dedupe flag|reject:
+
+    python task_factory.py --dedupe flag --dedupe-radius 4
+"""
+
+import os
+
+import numpy as np
+from PIL import Image, ImageColor, ImageOps
+
+from palette import COLORS
+
+HASH_SIZE = 8       # 8x8 low-frequency DCT coefficients -> 64 bits
+SAMPLE_SIZE = 32    # images are box-downsampled to 32x32 grayscale first
+HASH_VERSION = 2    # key layout: colors | full | shape
+DEDUPE_RADIUS = 4   # bits
+DEDUPE_MODES = ("flag", "reject")
+# Families (params "type") whose duplicates are the same drawing moved or resized
+INVARIANT_TYPES = ("tv", "donut", "target")
+
+INK_THRESHOLD = 60      # a pixel is ink when some channel is this far below white
+COLOR_TOLERANCE = 40    # RGB distance to a palette color; antialiased blends fall outside
+COLOR_SHARE = 0.05      # share of solid ink pixels a color needs to count as present
+
+# ==========================================
+# pHash
+# ==========================================
+
+def _dct_matrix(n):
+    k, x = np.meshgrid(np.arange(n), np.arange(n), indexing="ij")
+    return np.cos(np.pi * (2 * x + 1) * k / (2 * n))
+
+_DCT = _dct_matrix(SAMPLE_SIZE)[:HASH_SIZE]
+_PALETTE = np.array([ImageColor.getrgb(c) for c in COLORS], dtype=np.float32)
+_DIGITS = HASH_SIZE * HASH_SIZE // 4
+
+def _on_white(image):
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    if image.mode in ("RGBA", "LA"):
+        # Transparent canvas areas count as the white background
+        image = Image.alpha_composite(Image.new("RGBA", image.size, "white"), image.convert("RGBA"))
+    return image.convert("RGB")
+
+def phash(image, crop=False):
+    """64-bit perceptual hash (int) of a PIL image or an RGB(A)/grayscale uint8 array.
+
+    The image is box-downsampled to 32x32 grayscale (box sampling keeps thin
+    turtle lines from vanishing); the hash is its 8x8 lowest DCT coefficients
+    thresholded at their median (DC term excluded). With `crop`, the ink's
+    bounding box, padded to a square, is hashed instead, so the same drawing
+    at another position or size hashes alike (the pen width does not scale
+    with the drawing, so a much smaller copy still differs by a few bits).
+    """
+    gray = _on_white(image).convert("L")
+    box = ImageOps.invert(gray).getbbox() if crop else None
+    if box:
+        x0, y0, x1, y1 = box
+        side = max(x1 - x0, y1 - y0)
+        cx, cy = (x0 + x1) // 2, (y0 + y1) // 2
+        square = Image.new("L", (side, side), 255)
+        square.paste(gray.crop(box), (side // 2 - (cx - x0), side // 2 - (cy - y0)))
+        gray = square
+    pixels = np.asarray(gray.resize((SAMPLE_SIZE, SAMPLE_SIZE), Image.BOX), dtype=float)
+    coeffs = (_DCT @ pixels @ _DCT.T).ravel()
+    bits = coeffs > np.median(coeffs[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def ink_colors(image):
+    """Bit mask of the COLORS entries that make up at least COLOR_SHARE of the solid ink."""
+    rgb = np.asarray(_on_white(image), dtype=np.float32).reshape(-1, 3)
+    ink = rgb[rgb.min(axis=1) < 255 - INK_THRESHOLD]
+    if not len(ink):
+        return 0
+    # Squared distances to every palette color, without an (N, colors, 3) temporary
+    dist = (ink ** 2).sum(axis=1)[:, None] - 2 * ink @ _PALETTE.T + (_PALETTE ** 2).sum(axis=1)
+    nearest = dist.argmin(axis=1)
+    solid = dist[np.arange(len(ink)), nearest] <= COLOR_TOLERANCE ** 2
+    counts = np.bincount(nearest[solid], minlength=len(COLORS))
+    present = np.flatnonzero(counts >= max(1, COLOR_SHARE * solid.sum()))
+    return sum(1 << int(i) for i in present)
+
+def sample_hash(image):
+    """Metadata key of an image: hex colors | full-canvas pHash | shape pHash."""
+    image = _on_white(image)
+    return f"{ink_colors(image):04x}{phash(image):0{_DIGITS}x}{phash(image, crop=True):0{_DIGITS}x}"
+
+def split_hash(key):
+    """(colors, full, shape) ints of a sample_hash key."""
+    return int(key[:4], 16), int(key[4:4 + _DIGITS], 16), int(key[4 + _DIGITS:], 16)
+
+def file_phash(path):
+    """sample_hash of an image file (for images written without hashing)."""
+    with Image.open(path) as image:
+        return sample_hash(image)
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+# ==========================================
+# BK-Tree
+# ==========================================
+
+class BKTree:
+    """Hashes with keys, searchable by Hamming radius.
+
+    Each node's children are keyed by their distance to it; by the triangle
+    inequality, a match within r of the query can only sit under children
+    keyed d - r .. d + r, where d is the query's distance to the node.
+    """
+
+    def __init__(self):
+        self.root = None  # [hash, key, {distance: child}]
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, h, key):
+        self.size += 1
+        if self.root is None:
+            self.root = [h, key, {}]
+            return
+        node = self.root
+        while True:
+            d = hamming(h, node[0])
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [h, key, {}]
+                return
+            node = child
+
+    def nearest(self, h, radius):
+        """(key, distance) of the closest hash within `radius`, or None."""
+        best = None
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            d = hamming(h, node[0])
+            if d <= radius and (best is None or d < best[1]):
+                best = (node[1], d)
+                if d == 0:
+                    break
+            limit = radius if best is None else min(radius, best[1] - 1)
+            stack.extend(child for dist, child in node[2].items() if d - limit <= dist <= d + limit)
+        return best
+
+# ==========================================
+# Deduper
+# ==========================================
+
+class Deduper:
+    """Near-duplicate decisions for one dataset.
+
+    Samples are compared only within a group: the same ink colors, plus the
+    same family for the `invariant` families, which compare shape hashes.
+    Only kept images enter the trees, so every duplicate points at a kept
+    original. `duplicates` maps each flagged or rejected id to its original
+    and distance.
+    """
+
+    def __init__(self, radius=DEDUPE_RADIUS, mode="flag", invariant=INVARIANT_TYPES):
+        if mode not in DEDUPE_MODES:
+            raise ValueError(f"mode must be one of {DEDUPE_MODES}")
+        self.radius = radius
+        self.mode = mode
+        self.invariant = tuple(invariant)
+        self.trees = {}
+        self.duplicates = {}
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config["radius"], config["mode"], config["invariant"])
+
+    @property
+    def reject(self):
+        return self.mode == "reject"
+
+    def config(self):
+        """JSON form, for shard manifests and the corpus hash sidecar."""
+        return {"mode": self.mode, "radius": self.radius, "invariant": list(self.invariant),
+                "hash": HASH_VERSION}
+
+    def check(self, key, h, group=None):
+        """Record sample `key` with hash `h` in `group`; return (original, distance) if it is a near-duplicate."""
+        tree = self.trees.setdefault(group, BKTree())
+        match = tree.nearest(h, self.radius)
+        if match is None:
+            tree.add(h, key)
+            return None
+        self.duplicates[key] = {"duplicate_of": match[0], "phash_distance": match[1]}
+        return match
+
+    def _compare(self, entry):
+        # (group, hash) an entry is matched by
+        colors, full, shape = split_hash(entry["phash"])
+        family = (entry.get("params") or {}).get("type")
+        if family in self.invariant:
+            return (colors, family), shape
+        return (colors, None), full
+
+    def resolve(self, entries, image_dir=None, key="id"):
+        """Decide near-duplicates over metadata entries in job order; return the kept entries.
+
+        Entries carry their hash as "phash"; those without one (metadata-only
+        tasks) are kept as they are. Verdicts of an earlier resolve are
+        replaced, so resolving a resumed dataset again gives the same flags.
+        With `image_dir`, the PNGs of rejected entries are deleted.
+        """
+        kept = []
+        for entry in entries:
+            if entry.get("phash") is None:
+                kept.append(entry)
+                continue
+            entry.pop("duplicate_of", None)
+            entry.pop("phash_distance", None)
+            group, h = self._compare(entry)
+            if self.check(entry[key], h, group):
+                if self.reject:
+                    if image_dir:
+                        try:
+                            os.remove(os.path.join(image_dir, entry[key]))
+                        except FileNotFoundError:
+                            pass
+                    continue
+                entry.update(self.duplicates[entry[key]])
+            kept.append(entry)
+        return kept
+
+    def resolve_characters(self, metadata, image_dir=None):
+        """resolve() for the characters.json schema: samples in character order, keyed by filename."""
+        for entry in metadata["characters"]:
+            entry["samples"] = self.resolve(entry["samples"], image_dir, key="filename")
+        metadata["total_images"] = sum(len(entry["samples"]) for entry in metadata["characters"])
+        return metadata
+
+    def summary(self):
+        verb = "Rejected" if self.reject else "Flagged"
+        return f"{verb} {len(self.duplicates)} near-duplicates (pHash radius {self.radius})"
+
+def resolve_dataset(dedupe, metadata, image_dir, num_shards=1):
+    """A generator's final dedupe step over metadata in job order (tasks.json or characters.json schema).
+
+    Shards keep only their hashes: `sharding.py merge` decides across all
+    of them, so sharded and single-node runs keep the same images.
+    """
+    if num_shards > 1:
+        return metadata
+    if isinstance(metadata, dict):
+        metadata = dedupe.resolve_characters(metadata, image_dir)
+    else:
+        metadata = dedupe.resolve(metadata, image_dir)
+    print(f"🔁 {dedupe.summary()}")
+    return metadata
+
+def add_dedupe_args(parser):
+    parser.add_argument("--dedupe", choices=DEDUPE_MODES, default=None,
+                        help="flag or reject same-colored images within --dedupe-radius pHash bits; decided "
+                             "after generation in job order, so rejected PNGs are written first, then deleted")
+    parser.add_argument("--dedupe-radius", type=int, default=DEDUPE_RADIUS, help="pHash Hamming radius, bits")
+    parser.add_argument("--dedupe-invariant", nargs="*", default=list(INVARIANT_TYPES), metavar="TYPE",
+                        help="families matched regardless of position and size (default: %(default)s)")
+
+def deduper_from_args(args):
+    return Deduper(args.dedupe_radius, args.dedupe, args.dedupe_invariant) if args.dedupe else None
@@ -0,0 +1,348 @@
+"""Sandboxed parallel executor for model-written turtle programs.
+
+Each program is Python source that draws with a turtle `t` (or defines
+`draw(t)`), using the task_factory primitives (draw_house, ...) and the
+chinese_strock strokes (stroke_heng, ...). Programs run in a pool of worker
+processes on a RecordingTurtle, so no display is needed, with:
+
+    - a restricted namespace: the drawing APIs, math, a seeded `random`,
+      and a small set of builtins (no import, open, eval, ...)
+    - a step limit on turtle moves and turns
+    - a CPU-time limit per program (RLIMIT_CPU, caught via SIGXCPU)
+    - a wall-clock timeout, after which the worker is killed and respawned
+
+so an infinite loop or a crash costs one result, never the batch. Before
+running, a program's syntax tree is checked: dunder names and attributes,
+private (_x) attributes, frame/generator introspection, str.format,
+attribute assignment, bare `except:` and jumps out of `finally` are
+rejected, and the drawing functions are exposed through wrappers. This
+keeps well-meaning programs on the drawing API; it is NOT isolation. The
+worker processes run as the calling user with its filesystem and network
+access, so run untrusted programs inside a container or VM. Results are
+the recorded command stream or a raster ready for scoring:
+
+    python program_executor.py attempts.jsonl --metadata "<OUT_DIR>/tasks.json" --out results.json
+"""
+
+import os
+import json
+import math
+import ast
+import time
+import random
+import signal
+import builtins
+import inspect
+import argparse
+import resource
+import multiprocessing as mp
+from multiprocessing.connection import wait
+
+import numpy as np
+from PIL import Image
+
+import task_factory
+import chinese_strock
+from scoring import load_images, score_batch
+from sharding import task_seed
+from turtle_recorder import RecordingTurtle, StepLimitExceeded
+
+MAX_STEPS = 200_000
+CPU_SECONDS = 5
+WALL_SECONDS = 15
+
+SAFE_BUILTINS = {name: getattr(builtins, name) for name in (
+    "abs", "all", "any", "bool", "dict", "divmod", "enumerate", "filter", "float", "int", "isinstance", "len",
+    "list", "map", "max", "min", "pow", "range", "reversed", "round", "set", "sorted", "str", "sum", "tuple",
+    "zip", "Exception", "ValueError")}
+
+# Attributes that lead from an object to frames, code or module globals
+BLOCKED_ATTRIBUTES = {
+    "gi_frame", "gi_code", "gi_yieldfrom", "cr_frame", "cr_code", "cr_await", "ag_frame", "ag_code",
+    "f_globals", "f_locals", "f_builtins", "f_back", "f_code", "tb_frame", "tb_next",
+    "format", "format_map", "mro"}
+
+class CpuLimitExceeded(BaseException):
+    """Raised in the worker when a program uses up its CPU-time budget.
+
+    A BaseException, like StepLimitExceeded, so `except Exception` in a
+    program cannot swallow it.
+    """
+
+class UnsafeProgram(ValueError):
+    """Raised for a program that reaches outside the drawing API."""
+
+# ==========================================
+# Namespace
+# ==========================================
+
+def _wrap(fn):
+    # The raw function would hand its module globals (os, ...) to the program
+    def call(*args, **kwargs):
+        return fn(*args, **kwargs)
+    call.__name__ = fn.__name__
+    return call
+
+def drawing_api():
+    """Public drawing functions (wrapped) and palettes a program may call."""
+    api = {"COLORS": list(task_factory.COLORS), "ICE_CREAM_FLAVORS": list(task_factory.ICE_CREAM_FLAVORS)}
+    for module, prefix in ((task_factory, "draw_"), (chinese_strock, "stroke_")):
+        for name, fn in inspect.getmembers(module, inspect.isfunction):
+            if name.startswith(prefix) and fn.__module__ == module.__name__:
+                api[name] = _wrap(fn)
+    api["draw_stroke"] = _wrap(chinese_strock.draw_stroke)
+    return api
+
+def check_program(source):
+    """Parse a program and reject constructs that escape the namespace; return the AST.
+
+    Raises SyntaxError or UnsafeProgram.
+    """
+    tree = ast.parse(source, "<program>")
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id.startswith("__"):
+            raise UnsafeProgram(f"line {node.lineno}: name '{node.id}' is not allowed")
+        if isinstance(node, ast.Attribute):
+            if node.attr.startswith("_") or node.attr in BLOCKED_ATTRIBUTES:
+                raise UnsafeProgram(f"line {node.lineno}: attribute '{node.attr}' is not allowed")
+            if not isinstance(node.ctx, ast.Load):
+                raise UnsafeProgram(f"line {node.lineno}: assigning attributes is not allowed")
+        if isinstance(node, (ast.Import, ast.ImportFrom, ast.Global, ast.Nonlocal)):
+            raise UnsafeProgram(f"line {node.lineno}: {type(node).__name__.lower()} is not allowed")
+        if isinstance(node, ast.ExceptHandler) and node.type is None:
+            raise UnsafeProgram(f"line {node.lineno}: bare except is not allowed")
+        if isinstance(node, ast.Try):
+            for inner in (n for stmt in node.finalbody for n in ast.walk(stmt)):
+                if isinstance(inner, (ast.Return, ast.Break, ast.Continue)):
+                    raise UnsafeProgram(f"line {inner.lineno}: leaving a finally block is not allowed")
+    return tree
+
+def sandbox_namespace(t, seed, api):
+    return {"__builtins__": dict(SAFE_BUILTINS), "__name__": "program", "t": t, "math": math,
+            "random": random.Random(seed), **api}
+
+# ==========================================
+# Worker
+# ==========================================
+
+def _on_xcpu(signum, frame):
+    raise CpuLimitExceeded("CPU time limit exceeded")
+
+def _set_cpu_budget(seconds):
+    # Soft limit only: the hard limit could never be raised again for the next program
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if seconds is None:
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+def run_program(source, seed=0, max_steps=MAX_STEPS, entry="draw", api=None):
+    """Execute one program on a fresh RecordingTurtle; return (status, error, turtle).
+
+    status is "ok", "rejected", "error", "step_limit" or "cpu_limit". Runs in
+    the calling process; the CPU limit is only enforced inside executor workers.
+    """
+    t = RecordingTurtle(max_steps)
+    try:
+        tree = check_program(source)
+    except UnsafeProgram as e:
+        return "rejected", str(e), t
+    except SyntaxError as e:
+        return "error", f"SyntaxError: {e}", t
+    namespace = sandbox_namespace(t, seed, drawing_api() if api is None else api)
+    try:
+        exec(compile(tree, "<program>", "exec"), namespace)
+        if callable(namespace.get(entry)):
+            namespace[entry](t)
+    except StepLimitExceeded as e:
+        return "step_limit", str(e), t
+    except CpuLimitExceeded as e:
+        return "cpu_limit", str(e), t
+    except Exception as e:
+        return "error", f"{type(e).__name__}: {e}", t
+    return "ok", None, t
+
+def _worker(conn, max_steps, cpu_seconds, output, size, seed):
+    signal.signal(signal.SIGXCPU, _on_xcpu)
+    api = drawing_api()
+    for task_id, source in iter(conn.recv, None):
+        _set_cpu_budget(cpu_seconds)
+        try:
+            status, error, t = run_program(source, task_seed(seed, task_id), max_steps, api=api)
+        except CpuLimitExceeded as e:  # raised outside the program's own try
+            status, error, t = "cpu_limit", str(e), RecordingTurtle()
+        except StepLimitExceeded as e:
+            status, error, t = "step_limit", str(e), RecordingTurtle()
+        except Exception as e:
+            status, error, t = "error", f"{type(e).__name__}: {e}", RecordingTurtle()
+        finally:
+            _set_cpu_budget(None)
+        result = {"id": task_id, "status": status, "error": error, "steps": t.steps}
+        if output == "raster":
+            result["image"] = np.asarray(t.to_image(size).convert("RGB"))
+        else:
+            result["items"] = t.items
+        conn.send(result)
+
+# ==========================================
+# Executor
+# ==========================================
+
+class ProgramExecutor:
+    """A pool of sandbox workers; `run` streams results as programs finish.
+
+    `output` is "items" (the recorded command stream) or "raster" (an RGB
+    array of `size`, turtle origin at the center). Stuck or crashed workers
+    are killed and replaced.
+    """
+
+    def __init__(self, workers=None, max_steps=MAX_STEPS, cpu_seconds=CPU_SECONDS, wall_seconds=WALL_SECONDS,
+                 output="items", size=(task_factory.WIDTH, task_factory.HEIGHT), seed=0):
+        self.n_workers = workers or os.cpu_count() or 1
+        self.wall_seconds = wall_seconds
+        self._args = (max_steps, cpu_seconds, output, size, seed)
+        self._ctx = mp.get_context("spawn")
+        self._workers = [self._spawn() for _ in range(self.n_workers)]
+
+    def _spawn(self):
+        parent, child = self._ctx.Pipe()
+        proc = self._ctx.Process(target=_worker, args=(child,) + self._args, daemon=True)
+        proc.start()
+        child.close()
+        return {"proc": proc, "conn": parent, "task": None, "start": 0.0}
+
+    def _replace(self, i):
+        w = self._workers[i]
+        w["proc"].kill()
+        w["proc"].join()
+        w["conn"].close()
+        self._workers[i] = self._spawn()
+
+    def run(self, programs):
+        """Yield one result dict per (task_id, source) pair, in completion order."""
+        pending = list(programs)[::-1]
+        busy = 0
+        while pending or busy:
+            for w in self._workers:
+                if w["task"] is None and pending:
+                    w["task"] = pending.pop()
+                    w["start"] = time.monotonic()
+                    w["conn"].send(w["task"])
+                    busy += 1
+            ready = wait([w["conn"] for w in self._workers if w["task"] is not None], timeout=0.5)
+            now = time.monotonic()
+            for i, w in enumerate(self._workers):
+                if w["task"] is None:
+                    continue
+                task_id = w["task"][0]
+                if w["conn"] in ready:
+                    try:
+                        result = w["conn"].recv()
+                    except (EOFError, OSError):
+                        result = {"id": task_id, "status": "crashed", "error": "worker exited", "steps": None}
+                        self._replace(i)
+                elif now - w["start"] > self.wall_seconds:
+                    result = {"id": task_id, "status": "timeout",
+                              "error": f"no result after {self.wall_seconds}s", "steps": None}
+                    self._replace(i)
+                else:
+                    continue
+                self._workers[i]["task"] = None
+                busy -= 1
+                yield result
+
+    def close(self):
+        for w in self._workers:
+            try:
+                w["conn"].send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for w in self._workers:
+            w["proc"].join(timeout=2)
+            if w["proc"].is_alive():
+                w["proc"].kill()
+            w["conn"].close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ==========================================
+# Execute + Score
+# ==========================================
+
+def score_programs(programs, metadata_path, workers=None, batch_size=64, **limits):
+    """Run programs named by task id and score their rasters against the dataset images.
+
+    Returns one row per program: status, error, steps and the scoring
+    metrics (None for programs that did not finish).
+    """
+    programs = list(programs)
+    if not programs:
+        return []
+    ref_dir = os.path.dirname(os.path.abspath(metadata_path))
+    with Image.open(os.path.join(ref_dir, programs[0][0])) as first:
+        size = first.size
+    rows, batch = [], []
+
+    def flush():
+        refs = load_images([os.path.join(ref_dir, r["id"]) for r in batch], size=size)
+        scores = score_batch(np.stack([r.pop("image") for r in batch]), refs)
+        scores.pop("per_color")
+        for n, r in enumerate(batch):
+            r.update({k: None if np.isnan(v[n]) else round(float(v[n]), 4) for k, v in scores.items()})
+        rows.extend(batch)
+        batch.clear()
+
+    with ProgramExecutor(workers, output="raster", size=size, **limits) as executor:
+        for result in executor.run(programs):
+            if result["status"] == "ok":
+                batch.append(result)
+                if len(batch) >= batch_size:
+                    flush()
+            else:
+                result.pop("image", None)
+                rows.append(result)
+    if batch:
+        flush()
+    return rows
+
+def load_programs(path):
+    """(task_id, source) pairs from a JSONL file of {"id": ..., "code": ...} lines."""
+    with open(path, encoding="utf-8") as f:
+        return [(entry["id"], entry["code"]) for entry in (json.loads(line) for line in f if line.strip())]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run model-written turtle programs in a sandboxed pool.")
+    parser.add_argument("programs", help='JSONL of {"id": <task image id>, "code": <python source>}')
+    parser.add_argument("--metadata", default=None, help="score rasters against this dataset (tasks.json, ...)")
+    parser.add_argument("--out", default=None, help="write results as JSON")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-steps", type=int, default=MAX_STEPS)
+    parser.add_argument("--cpu-seconds", type=int, default=CPU_SECONDS)
+    parser.add_argument("--wall-seconds", type=float, default=WALL_SECONDS)
+    args = parser.parse_args()
+
+    programs = load_programs(args.programs)
+    limits = {"max_steps": args.max_steps, "cpu_seconds": args.cpu_seconds, "wall_seconds": args.wall_seconds}
+    start = time.monotonic()
+    if args.metadata:
+        rows = score_programs(programs, args.metadata, args.workers, **limits)
+    else:
+        with ProgramExecutor(args.workers, **limits) as executor:
+            rows = list(executor.run(programs))
+    statuses = {}
+    for row in rows:
+        statuses[row["status"]] = statuses.get(row["status"], 0) + 1
+    print(f"✅ Ran {len(rows)} programs in {time.monotonic() - start:.1f}s: "
+          + ", ".join(f"{k} {v}" for k, v in sorted(statuses.items())))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2, ensure_ascii=False)
+        print(f"📊 Results saved to {args.out}")
@@ -0,0 +1,416 @@
+"""Shared rendering pipeline for the DC-ACE generators.
+
+Turtle draws on a Tk canvas, which may only be touched from the thread that
+created it. Everything after the PostScript snapshot (EPS decode through
+Ghostscript, PNG encode, disk I/O) is Tk-free and can run on other threads.
+"""
+
+import io
+import os
+import time
+import queue
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from perceptual_hash import sample_hash
+
+# ==========================================
+# Snapshot & Decode
+# ==========================================
+
+def canvas_postscript(screen) -> str:
+    """Snapshot the turtle screen as PostScript (call on the Tk thread)."""
+    return screen.getcanvas().postscript(colormode="color")
+
+def postscript_to_image(ps: str) -> Image.Image:
+    """Rasterize a canvas PostScript snapshot into an RGBA image."""
+    img = Image.open(io.BytesIO(ps.encode("utf-8")))
+    img.load(scale=1)
+    return img.convert("RGBA")
+
+# ==========================================
+# Streaming Iterator
+# ==========================================
+
+def prefetch_samples(render_next, count, prefetch=8, workers=4):
+    """Yield `count` (RGBA ndarray, metadata) pairs without touching disk.
+
+    `render_next()` draws one sample on the caller's Tk thread and returns
+    (postscript, metadata). Up to `prefetch` snapshots are rasterized by a
+    background pool while the consumer works on earlier samples.
+    """
+    pending = deque()
+    produced = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            while produced < count or pending:
+                while produced < count and len(pending) < prefetch:
+                    ps, meta = render_next()
+                    pending.append((pool.submit(postscript_to_image, ps), meta))
+                    produced += 1
+                fut, meta = pending.popleft()
+                yield np.asarray(fut.result()), meta
+        finally:
+            for fut, _ in pending:
+                fut.cancel()
+
+# ==========================================
+# Draw -> Encode -> Write Pipeline
+# ==========================================
+
+def encode_png(ps: str) -> bytes:
+    """Decode a PostScript snapshot and encode it as PNG bytes."""
+    return _encode(ps)[0]
+
+def _encode(ps, hashed=False):
+    # PNG bytes, plus the perceptual hash when deduplicating (computed here, on the pool)
+    img = postscript_to_image(ps)
+    buf = io.BytesIO()
+    img.save(buf, "PNG")
+    return buf.getvalue(), sample_hash(img) if hashed else None
+
+class PngWriter:
+    """Staged saver: the Tk thread snapshots, a pool encodes, one thread writes.
+
+    Ghostscript runs out of process and Pillow releases the GIL while
+    encoding, so the pool overlaps with the next task's drawing. submit()
+    blocks once `max_pending` frames are queued, bounding memory.
+
+    With a `hashes` dict, frames are also perceptually hashed on the pool
+    and the writer records {file name: hex key} in it, for
+    perceptual_hash.Deduper.resolve.
+    """
+
+    def __init__(self, workers=4, max_pending=16, hashes=None):
+        self.hashes = hashes
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def submit(self, ps, path):
+        """Queue a snapshot for encoding and writing to `path`."""
+        self._queue.put((path, self._pool.submit(_encode, ps, self.hashes is not None)))
+
+    def _write_loop(self):
+        # Writes happen in submission order
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            path, fut = item
+            try:
+                data, h = fut.result()
+                with open(path, "wb") as f:
+                    f.write(data)
+                if self.hashes is not None:
+                    self.hashes[os.path.basename(path)] = h
+            except Exception as e:
+                print(f"Error saving {path}: {e}")
+
+    def close(self):
+        """Flush every queued frame to disk and stop the stages."""
+        self._queue.put(None)
+        self._writer.join()
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ==========================================
+# Raster Canvas (progressive frames)
+# ==========================================
+
+FRAME_FORMATS = ("png", "gif", "apng")
+
+class RasterCanvas:
+    """A persistent PIL image drawn with turtle coordinates (origin at the center, y up).
+
+    Used where one drawing is snapshotted many times (one frame per stroke):
+    each stroke is rasterized once into the same buffer, so n frames cost n
+    strokes instead of re-rendering a growing PostScript prefix n times.
+    """
+
+    def __init__(self, size=600, background="white"):
+        # `size` is the side of a square canvas or a (width, height) pair
+        self.width, self.height = (size, size) if isinstance(size, int) else size
+        self.image = Image.new("RGBA", (self.width, self.height), background)
+        self._draw = ImageDraw.Draw(self.image)
+
+    def _px(self, points):
+        pts = np.asarray(points, dtype=float)
+        return [(x + self.width / 2, self.height / 2 - y) for x, y in pts.tolist()]
+
+    def polyline(self, points, width, color="black"):
+        # Round joins and caps like the Tk pen
+        pts = self._px(points)
+        w = max(1, round(width))
+        if len(pts) > 1:
+            self._draw.line(pts, fill=color, width=w, joint="curve")
+        r = w / 2
+        for x, y in (pts[0], pts[-1]):
+            self._draw.ellipse((x - r, y - r, x + r, y + r), fill=color)
+
+    def fill(self, polygon, color="black"):
+        if len(polygon) >= 3:
+            self._draw.polygon(self._px(polygon), fill=color)
+
+    def dot(self, center, size, color="black"):
+        (x, y), = self._px([center])
+        r = size / 2
+        self._draw.ellipse((x - r, y - r, x + r, y + r), fill=color)
+
+    def snapshot(self):
+        return self.image.copy()
+
+def save_frames(frames, output_path, fmt="png", frame_ms=400):
+    """Write frames as a numbered PNG sequence (stem_01.png, ...), a GIF or an APNG; return the paths."""
+    if fmt == "png":
+        stem = os.path.splitext(output_path)[0]
+        paths = []
+        for k, frame in enumerate(frames, 1):
+            paths.append(f"{stem}_{k:02d}.png")
+            frame.save(paths[-1], "PNG")
+        return paths
+    frames = list(frames)
+    if not frames:
+        return []
+    if fmt == "gif":
+        frames = [f.convert("RGB") for f in frames]
+    frames[0].save(output_path, "GIF" if fmt == "gif" else "PNG", save_all=True,
+                   append_images=frames[1:], duration=frame_ms, loop=0)
+    return [output_path]
+
+# ==========================================
+# Progress
+# ==========================================
+
+def _fmt_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+class Progress:
+    """Throttled progress line with rate and ETA for long renders."""
+
+    def __init__(self, total, label="Rendering", every=2.0):
+        self.total = total
+        self.label = label
+        self.every = every
+        self.done = 0
+        self.start = self._last = time.monotonic()
+
+    def update(self, n=1):
+        self.done += n
+        now = time.monotonic()
+        if now - self._last >= self.every or self.done == self.total:
+            self._last = now
+            rate = self.done / max(now - self.start, 1e-9)
+            eta = (self.total - self.done) / rate if rate else 0
+            print(f"⏳ {self.label}: {self.done}/{self.total} ({100 * self.done / max(self.total, 1):.1f}%) "
+                  f"{rate:.1f} img/s, ETA {_fmt_duration(eta)}", flush=True)
+
+    def summary(self):
+        elapsed = time.monotonic() - self.start
+        rate = self.done / max(elapsed, 1e-9)
+        print(f"📈 {self.label}: {self.done} images in {_fmt_duration(elapsed)} ({rate:.1f} img/s)", flush=True)
+
+# ==========================================
+# Multiprocess Rendering (shared-memory ring)
+# ==========================================
+
+class FrameRing:
+    """A ring of RGBA frame slots in one shared-memory block.
+
+    Render workers claim a free slot, copy a decoded frame into it and send
+    only (slot, shape, metadata) to the writer; the writer encodes straight
+    from the shared buffer and hands the slot back. Pixel data never goes
+    through a pickle.
+    """
+
+    def __init__(self, ctx, slots, frame_shape):
+        self.slots = slots
+        self.frame_shape = tuple(frame_shape)
+        self.slot_bytes = int(np.prod(self.frame_shape))
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * self.slot_bytes)
+        self.name = self._shm.name
+        self.free = ctx.Queue()
+        for i in range(slots):
+            self.free.put(i)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_shm"] = None
+        return state
+
+    def _buf(self):
+        if self._shm is None:
+            self._shm = shared_memory.SharedMemory(name=self.name)
+        return self._shm.buf
+
+    def view(self, slot, shape=None):
+        """ndarray view of a slot; `shape` defaults to the full frame shape."""
+        shape = tuple(shape or self.frame_shape)
+        return np.ndarray(shape, dtype=np.uint8, buffer=self._buf(), offset=slot * self.slot_bytes)
+
+    def store(self, frame):
+        """Block for a free slot, copy `frame` in and return (slot, shape)."""
+        h, w = self.frame_shape[:2]
+        frame = frame[:h, :w]  # Tk snapshots can be a few pixels over the nominal size
+        slot = self.free.get()
+        self.view(slot, frame.shape)[...] = frame
+        return slot, frame.shape
+
+    def release(self, slot):
+        self.free.put(slot)
+
+    def close(self, unlink=False):
+        if self._shm is not None:
+            self._shm.close()
+            if unlink:
+                self._shm.unlink()
+            self._shm = None
+
+# How often render_parallel checks that its worker processes are still alive
+POLL_SECONDS = 1.0
+
+def _render_worker(factory, worker, jobs, ring, done):
+    """Render process: own Tk screen, decode locally, publish frames by slot.
+
+    Jobs are pulled from the shared `jobs` queue until its None sentinel;
+    the worker's index on `done` marks it finished.
+    """
+    try:
+        gen = factory(worker)
+        for job in iter(jobs.get, None):
+            try:
+                ps, meta = gen.render_job(job)
+                slot, shape = ring.store(np.asarray(postscript_to_image(ps)))
+                done.put((slot, shape, meta))
+            except Exception as e:
+                print(f"Error rendering {job}: {e}")
+    finally:
+        ring.close()
+        done.put(worker)
+
+def _write_worker(ring, done, n_workers, out_dir, results, progress=None, hashed=False):
+    """Writer process: encode frames from shared memory and write PNGs.
+
+    With `hashed`, each frame's perceptual hash goes into its metadata.
+    Runs until every renderer is marked finished, by itself or, when it was
+    killed, by render_parallel.
+    """
+    metadata = []
+    finished = set()
+    while len(finished) < n_workers:
+        item = done.get()
+        if isinstance(item, int):
+            finished.add(item)
+            continue
+        slot, shape, meta = item
+        path = os.path.join(out_dir, meta["id"])
+        try:
+            frame = ring.view(slot, shape)
+            image = Image.frombuffer("RGBA", (shape[1], shape[0]), frame, "raw", "RGBA", 0, 1)
+            if hashed:
+                meta["phash"] = sample_hash(image)
+            # Write-then-rename: a killed run never leaves a truncated PNG behind
+            image.save(path + ".part", "PNG")
+            os.replace(path + ".part", path)
+            metadata.append(meta)
+        except Exception as e:
+            print(f"Error saving {path}: {e}")
+        finally:
+            image = frame = None  # drop the views before the slot is reused
+            ring.release(slot)
+            if progress:
+                progress.update()
+    if progress:
+        progress.summary()
+    ring.close()
+    results.put(metadata)
+
+def _collect(writer, renderers, done, results):
+    # Wait for the writer's metadata without trusting every process to exit
+    # cleanly: a renderer killed before its sentinel is marked finished here,
+    # and a dead writer stops the renderers, which may be blocked on a slot
+    marked = set()
+    while True:
+        try:
+            metadata = results.get(timeout=POLL_SECONDS)
+            break
+        except queue.Empty:
+            pass
+        for w, p in enumerate(renderers):
+            if p.exitcode is not None and w not in marked:
+                marked.add(w)
+                if p.exitcode != 0:
+                    print(f"❌ Render worker {w} died (exit code {p.exitcode}); its current jobs are lost")
+                done.put(w)
+        if writer.exitcode is not None:
+            try:
+                metadata = results.get(timeout=POLL_SECONDS)  # written just before a clean exit
+                break
+            except queue.Empty:
+                for p in renderers:
+                    p.kill()
+                    p.join()
+                raise RuntimeError(f"PNG writer process died (exit code {writer.exitcode})")
+    for p in renderers:
+        p.join(timeout=POLL_SECONDS)
+        if p.is_alive():
+            p.kill()
+            p.join()
+    writer.join()
+    return metadata
+
+def render_parallel(factory, jobs, out_dir, frame_shape, workers=None, slots=None, progress=None, hashed=False):
+    """Render `jobs` across worker processes into `out_dir`; return metadata in job order.
+
+    Each job is a tuple whose first item is its output file name (the task
+    id). `factory(worker_index)` builds a generator exposing render_job(job)
+    -> (postscript, metadata); it runs inside each spawned worker, so it must
+    be picklable. Workers pull jobs from one shared queue in list order, so
+    a list sorted most-expensive first keeps every worker busy to the end.
+    With a `progress` label the writer reports progress, rate and ETA. With
+    `hashed`, metadata carries each frame's perceptual hash ("phash") for
+    perceptual_hash.Deduper.resolve.
+
+    A renderer that dies (segfault, OOM kill) loses its current jobs and the
+    rest return as partial results; a writer that dies raises RuntimeError.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    slots = slots or 2 * workers
+    ctx = mp.get_context("spawn")  # never fork a live Tk interpreter
+    ring = FrameRing(ctx, slots, frame_shape)
+    done, results, queued = ctx.Queue(), ctx.Queue(), ctx.Queue()
+    # Jobs or marks nobody reads after a failure must not hold up interpreter exit
+    queued.cancel_join_thread()
+    done.cancel_join_thread()
+    for job in jobs:
+        queued.put(job)
+    for _ in range(workers):
+        queued.put(None)
+    tracker = Progress(len(jobs), progress) if progress else None
+    try:
+        writer = ctx.Process(target=_write_worker, args=(ring, done, workers, out_dir, results, tracker, hashed))
+        renderers = [ctx.Process(target=_render_worker, args=(factory, w, queued, ring, done))
+                     for w in range(workers)]
+        writer.start()
+        for p in renderers:
+            p.start()
+        metadata = _collect(writer, renderers, done, results)
+    finally:
+        ring.close(unlink=True)
+    order = {job[0]: i for i, job in enumerate(jobs)}
+    return sorted(metadata, key=lambda meta: order[meta["id"]])
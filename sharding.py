@@ -0,0 +1,192 @@
+"""Coordinator-free sharding for the DC-ACE generators.
+
+Every task id maps to exactly one shard through a stable hash, and every task
+draws from its own RNG stream seeded by (seed, task id). A shard therefore
+renders exactly the pixels a single-node run with the same seed would, and
+the partitions can be merged back into one catalog.
+
+    python task_factory.py --seed 7 --shard 0 --num-shards 4   # on node 0
+    ...
+    python sharding.py merge "<OUT_DIR>" --num-shards 4
+"""
+
+import os
+import json
+import glob
+import random
+import shutil
+import hashlib
+import argparse
+
+from perceptual_hash import Deduper
+from task_catalog import DEFAULT_CATALOG, write_catalog
+
+MANIFEST = "shard.json"
+
+# ==========================================
+# Partitioning
+# ==========================================
+
+def _digest(text: str) -> int:
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+
+def shard_of(task_id: str, num_shards: int) -> int:
+    """Stable shard index of a task id (independent of PYTHONHASHSEED)."""
+    return _digest(task_id) % num_shards
+
+def task_seed(seed: int, task_id: str) -> int:
+    """Per-task RNG seed, so a task's sample never depends on which tasks ran before it."""
+    return _digest(f"{seed}:{task_id}")
+
+def run_seed(seed):
+    """`seed`, or a fresh one from OS entropy for an unseeded run.
+
+    Drawn once per run, so every stage that replays a task's stream (e.g.
+    placement measuring a drawing, then rendering it) sees the same one.
+    """
+    if seed is not None:
+        return seed
+    seed = random.SystemRandom().getrandbits(63)
+    print(f"🎲 Unseeded run, using --seed {seed}")
+    return seed
+
+def shard_dir(out_dir: str, shard: int, num_shards: int) -> str:
+    return os.path.join(out_dir, "shards", f"shard-{shard:03d}-of-{num_shards:03d}")
+
+def select_jobs(jobs, shard, num_shards):
+    """Keep the jobs owned by `shard`; return (jobs, {task id: position in full list}).
+
+    Each job is a tuple whose first item is the task id. Jobs that carry an
+    `index` (generation_plan.Job) keep their plan position even when the list
+    has been reordered, e.g. sorted by cost.
+    """
+    owned, positions = [], {}
+    for i, job in enumerate(jobs):
+        if shard_of(job[0], num_shards) == shard:
+            owned.append(job)
+            positions[job[0]] = getattr(job, "index", i)
+    return owned, positions
+
+def check_shard_args(parser, args):
+    """Validate --shard/--num-shards (and require --seed) for a generator CLI."""
+    if args.num_shards < 1 or not 0 <= args.shard < args.num_shards:
+        parser.error("--shard must be in [0, --num-shards)")
+    if args.num_shards > 1 and getattr(args, "seed", 0) is None:
+        parser.error("sharded runs need --seed so every shard samples the same tasks")
+
+def add_shard_args(parser):
+    parser.add_argument("--shard", type=int, default=0, help="index of this shard")
+    parser.add_argument("--num-shards", type=int, default=1, help="total shards in the run")
+
+def write_manifest(partition_dir, shard, num_shards, seed, metadata_name, positions, dedupe=None):
+    """Record what a shard produced so `merge` can rebuild single-node order.
+
+    With a perceptual_hash.Deduper, the shard's images were only hashed;
+    `merge` decides near-duplicates across all shards with its settings.
+    """
+    manifest = {
+        "shard": shard,
+        "num_shards": num_shards,
+        "seed": seed,
+        "metadata": metadata_name,
+        "positions": positions,
+        "dedupe": dedupe.config() if dedupe else None,
+    }
+    with open(os.path.join(partition_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+# ==========================================
+# Merge
+# ==========================================
+
+def _merge_characters(parts):
+    """Merge character-dataset partitions (characters.json schema)."""
+    merged = None
+    by_index = {}
+    for meta, _ in parts:
+        if merged is None:
+            merged = {k: v for k, v in meta.items() if k != "characters"}
+        for entry in meta["characters"]:
+            slot = by_index.setdefault(entry["index"], {**entry, "samples": []})
+            slot["samples"].extend(entry["samples"])
+    characters = [by_index[i] for i in sorted(by_index)]
+    for entry in characters:
+        entry["samples"].sort(key=lambda s: s["filename"])
+    # Keep the single-node key order
+    out = {}
+    for key in merged:
+        out[key] = merged[key]
+        if key == "total_images":
+            out[key] = sum(len(c["samples"]) for c in characters)
+    out["characters"] = characters
+    return out
+
+def merge_shards(out_dir, num_shards, keep_partitions=False, catalog=DEFAULT_CATALOG):
+    """Move every partition's images into `out_dir` and write the merged metadata.
+
+    The merged dataset also replaces its rows in the SQLite `catalog` (if set).
+    Shards generated with --dedupe are deduplicated here, in single-node
+    order, so the result matches an unsharded run.
+
+    Returns the path of the merged metadata file.
+    """
+    manifests = []
+    for path in sorted(glob.glob(os.path.join(out_dir, "shards", f"shard-*-of-{num_shards:03d}", MANIFEST))):
+        with open(path, encoding="utf-8") as f:
+            manifests.append((os.path.dirname(path), json.load(f)))
+    found = sorted(m["shard"] for _, m in manifests)
+    if found != list(range(num_shards)):
+        raise FileNotFoundError(f"expected shards 0..{num_shards - 1} in {out_dir}, found {found}")
+    if len({m["seed"] for _, m in manifests}) != 1 or len({m["metadata"] for _, m in manifests}) != 1:
+        raise ValueError("shards were generated with different seeds or generators")
+    if len({json.dumps(m.get("dedupe"), sort_keys=True) for _, m in manifests}) != 1:
+        raise ValueError("shards were generated with different --dedupe settings")
+
+    metadata_name = manifests[0][1]["metadata"]
+    parts = []
+    for part_dir, manifest in manifests:
+        with open(os.path.join(part_dir, metadata_name), encoding="utf-8") as f:
+            parts.append((json.load(f), manifest["positions"]))
+
+    if isinstance(parts[0][0], dict):
+        merged = _merge_characters(parts)
+    else:
+        positions = {k: v for _, pos in parts for k, v in pos.items()}
+        merged = sorted((entry for meta, _ in parts for entry in meta), key=lambda e: positions[e["id"]])
+
+    for part_dir, _ in manifests:
+        for name in os.listdir(part_dir):
+            if name.endswith(".png"):
+                shutil.move(os.path.join(part_dir, name), os.path.join(out_dir, name))
+
+    config = manifests[0][1].get("dedupe")
+    if config:
+        dedupe = Deduper.from_config(config)
+        if isinstance(merged, dict):
+            dedupe.resolve_characters(merged, out_dir)
+        else:
+            merged = dedupe.resolve(merged, out_dir)
+        print(f"🔁 {dedupe.summary()}")
+
+    metadata_path = os.path.join(out_dir, metadata_name)
+    with open(metadata_path, "w", encoding="utf-8") as f:
+        json.dump(merged, f, indent=2, ensure_ascii=False)
+    if catalog:
+        write_catalog(merged, metadata_path, catalog)
+
+    if not keep_partitions:
+        shutil.rmtree(os.path.join(out_dir, "shards"))
+    return metadata_path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge sharded generator outputs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    m = sub.add_parser("merge", help="combine shard partitions into one dataset")
+    m.add_argument("out_dir", help="the generator's OUT_DIR (contains shards/)")
+    m.add_argument("--num-shards", type=int, required=True)
+    m.add_argument("--keep-partitions", action="store_true")
+    m.add_argument("--catalog", default=DEFAULT_CATALOG, help="SQLite task catalog ('' to skip)")
+    args = parser.parse_args()
+
+    path = merge_shards(args.out_dir, args.num_shards, args.keep_partitions, args.catalog)
+    print(f"✅ Merged {args.num_shards} shards into {path}")
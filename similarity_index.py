@@ -0,0 +1,208 @@
+"""Nearest-neighbor retrieval of generated tasks by image similarity.
+
+For the memory experiments: given a new task image, fetch the most similar
+past tasks. Every PNG of a dataset is reduced once to a compact descriptor
+
+    occupancy   GRID x GRID ink fraction (downsampled foreground)
+    color       share of ink pixels per COLORS entry
+    moments     ink area, centroid, spread and x/y correlation
+
+and the (N, D) float32 matrix is saved next to the metadata. Queries are
+exact: squared distances for a whole batch of queries come from one matrix
+product per block of the index, so top-k over 100k+ tasks takes milliseconds.
+
+    python similarity_index.py build "<OUT_DIR>/tasks.json"
+    python similarity_index.py query "<OUT_DIR>/tasks.json" L1_Star_12.png --k 5
+    python similarity_index.py query "<OUT_DIR>/tasks.json" --image attempt.png
+"""
+
+import os
+import json
+import argparse
+
+import numpy as np
+
+from scoring import _lookup, foreground, load_images, metadata_ids
+from palette import COLORS
+
+GRID = 16
+INDEX_DIR = "knn_index"
+# Relative weight of each descriptor block. Occupancy and color are scaled to
+# unit length first; the six moments are left raw (area, centroid and spread
+# in canvas fractions, correlation in [-1, 1]), so their block norm varies.
+WEIGHTS = {"occupancy": 1.0, "color": 0.5, "moments": 0.5}
+
+# ==========================================
+# Descriptors
+# ==========================================
+
+def _unit(x):
+    return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+def descriptors(images, grid=GRID):
+    """(N, grid * grid + len(COLORS) + 6) float32 descriptors of an (N, H, W, 3) uint8 stack."""
+    fg = foreground(images)
+    n, h, w = fg.shape
+    ink = fg.astype(np.float32)
+
+    bh, bw = h // grid, w // grid
+    occupancy = ink[:, :grid * bh, :grid * bw].reshape(n, grid, bh, grid, bw).mean(axis=(2, 4)).reshape(n, -1)
+
+    k = len(COLORS) + 1
+    image = np.nonzero(fg)[0]
+    hist = np.bincount(image * k + _lookup(images[fg]), minlength=n * k).reshape(n, k)[:, 1:].astype(np.float32)
+    color = hist / np.maximum(hist.sum(axis=1, keepdims=True), 1)
+
+    # Moments from the row/column profiles, in canvas-relative coordinates
+    mass = np.maximum(ink.sum(axis=(1, 2)), 1)
+    ys, xs = (np.arange(h, dtype=np.float32) + 0.5) / h, (np.arange(w, dtype=np.float32) + 0.5) / w
+    rows, cols = ink.sum(axis=2), ink.sum(axis=1)
+    cy, cx = rows @ ys / mass, cols @ xs / mass
+    sy = np.sqrt(np.maximum(rows @ ys ** 2 / mass - cy ** 2, 0))
+    sx = np.sqrt(np.maximum(cols @ xs ** 2 / mass - cx ** 2, 0))
+    cov = (ink @ xs) @ ys / mass - cx * cy  # (N, H) row sums of x, then over y
+    corr = cov / np.maximum(sx * sy, 1e-6)
+    moments = np.stack((fg.mean(axis=(1, 2)), cx, cy, sx, sy, corr), axis=1)
+
+    return np.hstack((WEIGHTS["occupancy"] * _unit(occupancy), WEIGHTS["color"] * _unit(color),
+                      WEIGHTS["moments"] * moments)).astype(np.float32)
+
+# ==========================================
+# Index
+# ==========================================
+
+def index_paths(metadata_path):
+    stem = os.path.splitext(os.path.basename(metadata_path))[0]
+    directory = os.path.join(os.path.dirname(os.path.abspath(metadata_path)), INDEX_DIR)
+    return os.path.join(directory, f"{stem}.npy"), os.path.join(directory, f"{stem}.json")
+
+def _stamp(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+def build_index(metadata_path, grid=GRID, batch_size=64, workers=8, rebuild=False):
+    """Describe every image of a dataset and save the index; return (indexed, newly described).
+
+    Images already in an index built with the same grid, and unchanged since
+    (same mtime and file size), are not decoded again.
+    """
+    image_dir = os.path.dirname(os.path.abspath(metadata_path))
+    ids = [i for i in metadata_ids(metadata_path) if os.path.exists(os.path.join(image_dir, i))]
+    stamps = {i: _stamp(os.path.join(image_dir, i)) for i in ids}
+    array_path, info_path = index_paths(metadata_path)
+    os.makedirs(os.path.dirname(array_path), exist_ok=True)
+
+    known, size = {}, None
+    if not rebuild and os.path.exists(info_path):
+        with open(info_path, encoding="utf-8") as f:
+            info = json.load(f)
+        if info["grid"] == grid and "stamps" in info:
+            vectors = np.load(array_path)
+            # A regenerated dataset reuses file names, so the stamp must match too
+            known = {i: vectors[n] for n, (i, stamp) in enumerate(zip(info["ids"], info["stamps"]))
+                     if stamps.get(i) == stamp}
+            size = tuple(info["size"]) if info["size"] else None
+    todo = [i for i in ids if i not in known]
+    if todo and size is None:
+        size = load_images([os.path.join(image_dir, todo[0])]).shape[2:0:-1]
+    for start in range(0, len(todo), batch_size):
+        batch = todo[start:start + batch_size]
+        images = load_images([os.path.join(image_dir, i) for i in batch], size=size, workers=workers)
+        known.update(zip(batch, descriptors(images, grid)))
+
+    dim = grid * grid + len(COLORS) + 6
+    vectors = np.stack([known[i] for i in ids]) if ids else np.empty((0, dim), dtype=np.float32)
+    tmp = f"{array_path}.{os.getpid()}.tmp.npy"
+    np.save(tmp, vectors)
+    os.replace(tmp, array_path)
+    with open(info_path, "w", encoding="utf-8") as f:
+        json.dump({"grid": grid, "size": size, "ids": ids, "stamps": [stamps[i] for i in ids]}, f,
+                  ensure_ascii=False)
+    return len(ids), len(todo)
+
+class SimilarityIndex:
+    """An in-memory descriptor matrix with exact batched kNN."""
+
+    def __init__(self, metadata_path):
+        array_path, info_path = index_paths(metadata_path)
+        with open(info_path, encoding="utf-8") as f:
+            info = json.load(f)
+        self.grid = info["grid"]
+        self.size = tuple(info["size"]) if info["size"] else None
+        self.ids = info["ids"]
+        self.rows = {image_id: n for n, image_id in enumerate(self.ids)}
+        self.vectors = np.ascontiguousarray(np.load(array_path), dtype=np.float32)
+        self.sq_norms = (self.vectors ** 2).sum(axis=1)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def query(self, queries, k=10, exclude=None, block=65536):
+        """Top-k rows for each (M, D) query; returns (rows, distances), both (M, k), nearest first.
+
+        `exclude` optionally gives one index row per query to leave out (the
+        query itself). The index is scanned in blocks of `block` rows, keeping
+        a running top-k, so memory stays at M x block distances.
+        """
+        q = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        m, k = len(q), min(k, len(self) - (exclude is not None))
+        q_sq = (q ** 2).sum(axis=1, keepdims=True)
+        best_d = np.full((m, 0), np.inf, dtype=np.float32)
+        best_i = np.empty((m, 0), dtype=np.int64)
+        for start in range(0, len(self), block):
+            x = self.vectors[start:start + block]
+            d = q_sq + self.sq_norms[start:start + block] - 2 * q @ x.T
+            if exclude is not None:
+                hit = (exclude >= start) & (exclude < start + len(x))
+                d[np.flatnonzero(hit), exclude[hit] - start] = np.inf
+            d = np.hstack((best_d, d))
+            i = np.hstack((best_i, np.broadcast_to(np.arange(start, start + len(x)), (m, len(x)))))
+            top = np.argpartition(d, k - 1, axis=1)[:, :k] if k < d.shape[1] else np.argsort(d, axis=1)
+            best_d, best_i = np.take_along_axis(d, top, 1), np.take_along_axis(i, top, 1)
+        order = np.argsort(best_d, axis=1)
+        dist = np.sqrt(np.maximum(np.take_along_axis(best_d, order, 1), 0))
+        return np.take_along_axis(best_i, order, 1), dist
+
+    def neighbors(self, image_ids, k=10):
+        """Most similar other tasks for indexed image ids: one [(id, distance), ...] list per id."""
+        rows = np.array([self.rows[i] for i in image_ids])
+        found, dist = self.query(self.vectors[rows], k, exclude=rows)
+        return self._named(found, dist)
+
+    def similar_images(self, paths, k=10, workers=8):
+        """Most similar indexed tasks for new image files."""
+        images = load_images(list(paths), size=self.size, workers=workers)
+        found, dist = self.query(descriptors(images, self.grid), k)
+        return self._named(found, dist)
+
+    def _named(self, found, dist):
+        return [[(self.ids[i], round(float(d), 4)) for i, d in zip(row_i, row_d)] for row_i, row_d in zip(found, dist)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Image-descriptor kNN index over generated tasks.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="describe every dataset image (only new ones when an index exists)")
+    b.add_argument("metadata")
+    b.add_argument("--grid", type=int, default=GRID, help="occupancy grid cells per side")
+    b.add_argument("--rebuild", action="store_true")
+    q = sub.add_parser("query", help="most similar past tasks")
+    q.add_argument("metadata")
+    q.add_argument("ids", nargs="*", help="indexed task ids")
+    q.add_argument("--image", action="append", default=[], help="a new image file (repeatable)")
+    q.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        total, new = build_index(args.metadata, args.grid, rebuild=args.rebuild)
+        print(f"✅ Indexed {total} images ({new} newly described) in {os.path.dirname(index_paths(args.metadata)[0])}")
+    else:
+        index = SimilarityIndex(args.metadata)
+        results = []
+        if args.ids:
+            results += zip(args.ids, index.neighbors(args.ids, args.k))
+        if args.image:
+            results += zip(args.image, index.similar_images(args.image, args.k))
+        for name, hits in results:
+            print(f"📂 {name}")
+            for image_id, distance in hits:
+                print(f"   {distance:.4f}  {image_id}")
@@ -0,0 +1,266 @@
+"""Persistent memory of solved tasks: task -> turtle program that drew it.
+
+Agent runs look up prior solutions here instead of scanning transcripts.
+Each solution (a draw_* program's source and/or its recorded command
+stream) is one JSON line in an append-only log; in memory the store keeps
+
+    offsets    record number -> byte offset in the log (one seek per read)
+    by_key     family + parameters (position included) -> record numbers, for exact reuse
+    postings   inverted index: prompt tokens, family:, level:, char: and
+               param: tokens -> record numbers, for related solutions
+    hot        an LRU tier of recently read records
+
+Several processes may append to one log (writes take an flock); `refresh`
+picks up what others appended since the last read.
+
+    python solution_memory.py add "<OUT_DIR>/tasks.json" attempts.jsonl --results results.json --min-iou 0.8
+    python solution_memory.py lookup --prompt "Draw a red star" --k 3
+"""
+
+import os
+import re
+import json
+import math
+import time
+import fcntl
+import heapq
+import argparse
+from collections import OrderedDict, defaultdict
+
+from task_catalog import catalog_rows
+
+MEMORY_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "memory", "solutions.jsonl")
+HOT_SIZE = 1024
+POSITION_KEYS = ("x", "y", "offset_x", "offset_y")
+
+# ==========================================
+# Keys and Tokens
+# ==========================================
+
+def task_key(family, params):
+    """Exact-reuse key: the family and all its parameters.
+
+    Position is part of the key: stored programs draw at absolute canvas
+    coordinates, so one only reproduces a task placed at the same spot.
+    """
+    return f"{family}|{json.dumps(params or {}, sort_keys=True, ensure_ascii=False)}"
+
+def tokenize(text):
+    """Words of a prompt; bare numbers (coordinates, sizes) are dropped."""
+    return re.findall(r"[^\W\d]\w*", (text or "").lower())
+
+def record_tokens(record):
+    """Index terms of a record: prompt words plus family, level, character and parameter fields."""
+    tokens = set(tokenize(record.get("prompt")))
+    tokens.add(f"family:{record.get('family')}")
+    if record.get("level") is not None:
+        tokens.add(f"level:{record['level']}")
+    if record.get("character"):
+        tokens.add(f"char:{record['character']}")
+    for k, v in (record.get("params") or {}).items():
+        # Continuous values (positions, scales) would only make singleton postings
+        if k not in POSITION_KEYS and isinstance(v, (str, int)) and not isinstance(v, bool):
+            tokens.add(f"param:{k}={v}")
+    return tokens
+
+# ==========================================
+# Store
+# ==========================================
+
+class SolutionMemory:
+    """Append-only solution log with an inverted index and an LRU hot tier."""
+
+    def __init__(self, path=MEMORY_LOG, hot_size=HOT_SIZE):
+        self.path = path
+        self.hot_size = hot_size
+        self.offsets = []
+        self.by_key = defaultdict(list)
+        self.postings = defaultdict(list)
+        self.hot = OrderedDict()
+        self._end = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        open(path, "a").close()
+        self.refresh()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _index(self, record, offset):
+        n = len(self.offsets)
+        self.offsets.append(offset)
+        # Recomputed, so records logged under an older key scheme still match
+        self.by_key[task_key(record.get("family"), record.get("params"))].append(n)
+        for token in record_tokens(record):
+            self.postings[token].append(n)
+        return n
+
+    def refresh(self):
+        """Index records appended to the log since the last read; return how many."""
+        added = 0
+        with open(self.path, "rb") as f:
+            f.seek(self._end)
+            offset = self._end
+            for line in f:
+                if not line.endswith(b"\n"):  # a write in progress
+                    break
+                try:
+                    record = json.loads(line) if line.strip() else None
+                except ValueError:  # a torn write, joined to the next record by an older version
+                    record = None
+                if record is not None:
+                    self._index(record, offset)
+                    added += 1
+                offset += len(line)
+            self._end = offset
+        return added
+
+    def add(self, family, params, program=None, items=None, prompt=None, level=None, character=None,
+            task_id=None, score=None, **extra):
+        """Append one solution; return its record number."""
+        record = {"key": task_key(family, params), "task_id": task_id, "family": family, "level": level,
+                  "character": character, "prompt": prompt, "params": params, "program": program,
+                  "items": items, "score": score, "time": round(time.time(), 3), **extra}
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with open(self.path, "ab") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                self.refresh()  # index what other writers appended first, so record numbers match the log
+                # Under the lock, an unterminated tail is a writer that crashed mid-line: drop it
+                if os.fstat(f.fileno()).st_size > self._end:
+                    os.ftruncate(f.fileno(), self._end)
+                f.seek(0, os.SEEK_END)
+                offset = f.tell()
+                f.write(line)
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        self._end = offset + len(line)
+        n = self._index(record, offset)
+        self._remember(n, record)
+        return n
+
+    def add_task(self, entry, program=None, items=None, score=None, **extra):
+        """Append a solution for one tasks.json-style entry (id, level, prompt, params)."""
+        row = next(catalog_rows([entry], "", ""))
+        return self.add(row["family"], entry.get("params", {}), program, items, row["prompt"], row["level"],
+                        row["character"], entry["id"], score, **extra)
+
+    def _remember(self, n, record):
+        self.hot[n] = record
+        self.hot.move_to_end(n)
+        if len(self.hot) > self.hot_size:
+            self.hot.popitem(last=False)
+
+    def get(self, n):
+        """Record number `n`, from the hot tier or with one seek into the log."""
+        if n in self.hot:
+            self.hot.move_to_end(n)
+            return self.hot[n]
+        with open(self.path, "rb") as f:
+            f.seek(self.offsets[n])
+            record = json.loads(f.readline())
+        self._remember(n, record)
+        return record
+
+    def _exact(self, family, params):
+        numbers = self.by_key.get(task_key(family, params), [])
+        # Best score first, newest first among equals
+        return sorted(reversed(numbers), key=lambda n: -(self.get(n)["score"] or 0.0))
+
+    def exact(self, family, params):
+        """Solutions for exactly this family and these parameters, best score first."""
+        return [self.get(n) for n in self._exact(family, params)]
+
+    def lookup(self, prompt=None, family=None, params=None, level=None, character=None, k=5):
+        """The k most relevant solutions.
+
+        Exact family + parameter matches come first, then records ranked by
+        IDF-weighted overlap of index terms. Terms in more than half of all
+        records are only scored when the rarer terms match too few records to
+        fill `k`: their long postings cost the most and move the ranking least,
+        and a more specific query never returns fewer results.
+        """
+        found = self._exact(family, params)[:k] if family is not None and params is not None else []
+        query = record_tokens({"prompt": prompt, "family": family, "params": params, "level": level,
+                               "character": character})
+        if family is None:
+            query.discard("family:None")
+        total = len(self)
+        postings = [self.postings[t] for t in query if t in self.postings]
+        rare = [p for p in postings if len(p) <= total / 2]
+        common = [p for p in postings if len(p) > total / 2]
+        scores = defaultdict(float)
+        exact = set(found)
+        if len(found) < k:
+            for group in (rare, common):
+                for posting in group:
+                    weight = math.log(1 + total / len(posting))
+                    for n in posting:
+                        scores[n] += weight
+                if len(scores.keys() - exact) >= k - len(found):
+                    break
+        found += heapq.nsmallest(k - len(found), (n for n in scores if n not in exact), key=lambda n: (-scores[n], -n))
+        return [self.get(n) for n in found]
+
+# ==========================================
+# Ingest
+# ==========================================
+
+def ingest(memory, metadata_path, programs_path, results_path=None, min_iou=None):
+    """Store programs (program_executor JSONL) for the tasks of a metadata file; return the count.
+
+    With executor/scoring results, only programs that ran ok (and reach
+    `min_iou`) are kept, and their IoU is stored as the score.
+    """
+    with open(metadata_path, encoding="utf-8") as f:
+        metadata = json.load(f)
+    if isinstance(metadata, dict):  # characters.json: one tasks.json-style entry per sample
+        metadata = [{"id": row["id"], "level": row["level"], "prompt": row["prompt"], "params": json.loads(row["params"])}
+                    for row in catalog_rows(metadata, "", "")]
+    tasks = {entry["id"]: entry for entry in metadata}
+    results = {}
+    if results_path:
+        with open(results_path, encoding="utf-8") as f:
+            results = {row["id"]: row for row in json.load(f)}
+    added = 0
+    with open(programs_path, encoding="utf-8") as f:
+        programs = [json.loads(line) for line in f if line.strip()]
+    for program in programs:
+        task_id, source = program["id"], program["code"]
+        result = results.get(task_id, {})
+        if task_id not in tasks or (results and result.get("status") != "ok"):
+            continue
+        iou = result.get("iou")
+        if min_iou is not None and (iou is None or iou < min_iou):
+            continue
+        memory.add_task(tasks[task_id], program=source, items=result.get("items"), score=iou)
+        added += 1
+    return added
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solution memory: task -> turtle program reuse.")
+    parser.add_argument("--log", default=MEMORY_LOG, help="append-only solution log (JSONL)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    a = sub.add_parser("add", help="store programs written for a dataset's tasks")
+    a.add_argument("metadata")
+    a.add_argument("programs", help='JSONL of {"id": <task image id>, "code": <python source>}')
+    a.add_argument("--results", default=None, help="program_executor results (keeps programs that ran ok)")
+    a.add_argument("--min-iou", type=float, default=None)
+    q = sub.add_parser("lookup", help="relevant prior solutions")
+    q.add_argument("--prompt", default=None)
+    q.add_argument("--family", default=None)
+    q.add_argument("--params", default=None, help="parameters as JSON")
+    q.add_argument("--level", type=int, default=None)
+    q.add_argument("--char", default=None)
+    q.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    memory = SolutionMemory(args.log)
+    if args.command == "add":
+        n = ingest(memory, args.metadata, args.programs, args.results, args.min_iou)
+        print(f"✅ Stored {n} solutions ({len(memory)} in {args.log})")
+    else:
+        params = json.loads(args.params) if args.params else None
+        for record in memory.lookup(args.prompt, args.family, params, args.level, args.char, args.k):
+            print(f"📂 {record['task_id']}  [{record['family']}]  score={record['score']}")
+            print(f"   {record['prompt']}")
@@ -0,0 +1,222 @@
+"""Stroke-order and direction scoring against graphics.txt medians.
+
+Pixel metrics cannot tell a character written in the wrong order from a
+correct one. This scorer compares a candidate's stroke polylines (e.g.
+RecordingTurtle.strokes() from program_executor) with the reference medians:
+
+    1. both glyphs are resampled to `points` per stroke (hanzi_tensors) and
+       the candidate is mapped onto the reference's bounding box
+    2. DTW between every candidate and reference stroke, forward and against
+       the reversed reference, batched over all stroke pairs of many
+       characters (one anti-diagonal wavefront)
+    3. a minimum-cost assignment of candidate to reference strokes
+    4. order errors = inversions of the assigned reference indices in the
+       candidate's drawing order; reversals = pairs that matched better backwards
+
+Deviations are DTW cost per sample point, in graphics.txt units (1024 em).
+
+    python stroke_order.py results.json draw_character/graphics.txt --out order.json
+"""
+
+import json
+import argparse
+
+import numpy as np
+
+from hanzi_augment import pad_medians
+from hanzi_tensors import load_glyphs, resample_medians
+
+DTW_POINTS = 32
+
+# ==========================================
+# Normalization
+# ==========================================
+
+def _bbox(strokes):
+    pts = np.vstack(strokes)
+    lo, hi = pts.min(axis=0), pts.max(axis=0)
+    return lo, max(float((hi - lo).max()), 1e-9)
+
+def to_reference_frame(candidate, reference):
+    """Map candidate strokes onto the reference's bounding box (uniform scale, aligned corners)."""
+    c_lo, c_side = _bbox(candidate)
+    r_lo, r_side = _bbox(reference)
+    return [(np.asarray(s, dtype=float) - c_lo) * (r_side / c_side) + r_lo for s in candidate]
+
+# ==========================================
+# Batched DTW
+# ==========================================
+
+def dtw(cost):
+    """DTW distance for a batch of (B, P, Q) cost matrices."""
+    return _dtw_grid(np.ascontiguousarray(cost.transpose(1, 2, 0)))
+
+def _dtw_grid(grid):
+    # DTW over a (P, Q, B) cost grid, one anti-diagonal at a time: diagonal k
+    # holds cells (i, k - i) indexed by i, so the up, left and diagonal
+    # predecessors are shifted slices of the two previous diagonals, and the
+    # batch is the contiguous last axis
+    P, Q, B = grid.shape
+    prev2 = np.full((P + 1, B), np.inf, dtype=grid.dtype)
+    prev = np.full((P + 1, B), np.inf, dtype=grid.dtype)
+    prev2[0] = 0.0  # D[0, 0]
+    for k in range(2, P + Q + 1):
+        lo, hi = max(1, k - Q), min(P, k - 1) + 1
+        i = np.arange(lo, hi)
+        cur = np.full((P + 1, B), np.inf, dtype=grid.dtype)
+        best = np.minimum(np.minimum(prev[lo - 1:hi - 1], prev[lo:hi]), prev2[lo - 1:hi - 1])
+        cur[lo:hi] = grid[i - 1, k - i - 1] + best
+        prev2, prev = prev, cur
+    return prev[P]
+
+# ==========================================
+# Assignment
+# ==========================================
+
+def assign(cost):
+    """Minimum-cost matching of rows to columns (Hungarian method, O(n^3)).
+
+    Works on rectangular matrices; returns (rows, cols) of the min(n, m) pairs,
+    sorted by row.
+    """
+    cost = np.asarray(cost, dtype=float)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+    u, v = np.zeros(n + 1), np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=int)  # row (1-based) matched to each column, 0 = free
+    way = np.zeros(m + 1, dtype=int)
+    for row in range(1, n + 1):
+        owner[0] = row
+        col = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while owner[col]:
+            used[col] = True
+            r = owner[col]
+            free = ~used
+            free[0] = False
+            reduced = cost[r - 1] - u[r] - v[1:]
+            better = free[1:] & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = col
+            nxt = np.flatnonzero(free)[np.argmin(minv[free])]
+            delta = minv[nxt]
+            done = np.flatnonzero(used)
+            u[owner[done]] += delta
+            v[done] -= delta
+            minv[free] -= delta
+            col = nxt
+        while col:
+            prev = way[col]
+            owner[col] = owner[prev]
+            col = prev
+    cols = np.flatnonzero(owner[1:])
+    rows = owner[1:][cols] - 1
+    if transposed:
+        rows, cols = cols, rows
+    order = np.argsort(rows)
+    return rows[order], cols[order]
+
+def inversions(seq):
+    """Number of out-of-order pairs in a sequence."""
+    seq = np.asarray(seq)
+    return int(np.triu(seq[:, None] > seq[None, :], k=1).sum())
+
+# ==========================================
+# Scoring
+# ==========================================
+
+def stroke_order_scores(candidates, references, points=DTW_POINTS, chunk=32):
+    """Score candidate glyphs against reference glyphs (lists of (N, 2) stroke arrays).
+
+    Candidates must already be in the reference frame (see to_reference_frame).
+    Returns one dict per character.
+    """
+    results = []
+    for start in range(0, len(candidates), chunk):
+        cand = candidates[start:start + chunk]
+        ref = references[start:start + chunk]
+        cp, cm = resample_medians(*pad_medians(cand), count=points)
+        rp, rm = resample_medians(*pad_medians(ref), count=points)
+        c_ok, r_ok = cm.any(axis=2), rm.any(axis=2)
+
+        # Every valid (char, candidate stroke, reference stroke) pair, flattened
+        # in character order; each pair is scored against the reference stroke
+        # and its reverse in one (P, P, 2B) grid
+        ch, ci, rj = np.nonzero(c_ok[:, :, None] & r_ok[:, None, :])
+        a = np.tile(cp[ch, ci].astype(np.float32).transpose(2, 1, 0), 2)   # (2, P, 2B)
+        b = rp[ch, rj].astype(np.float32).transpose(2, 1, 0)
+        b = np.concatenate((b, b[:, ::-1]), axis=2)
+        grid = np.sqrt((a[0, :, None] - b[0, None]) ** 2 + (a[1, :, None] - b[1, None]) ** 2)
+        forward, backward = np.split(_dtw_grid(grid) / points, 2)
+        bounds = np.cumsum(np.bincount(ch, minlength=len(cand)))
+
+        for c in range(len(cand)):
+            sel = slice(bounds[c - 1] if c else 0, bounds[c])
+            n_c, n_r = int(c_ok[c].sum()), int(r_ok[c].sum())
+            pair = np.minimum(forward[sel], backward[sel]).reshape(n_c, n_r)
+            flipped = (backward[sel] < forward[sel]).reshape(n_c, n_r)
+            rows, cols = assign(pair) if n_c and n_r else (np.array([], int), np.array([], int))
+            matched = len(rows)
+            dev = pair[rows, cols]
+            rev = flipped[rows, cols]
+            errors = inversions(cols)  # rows are in candidate drawing order
+            results.append({
+                "strokes": n_r,
+                "candidate_strokes": n_c,
+                "missing": n_r - matched,
+                "extra": n_c - matched,
+                "order_errors": errors,
+                "order_score": 1.0 - errors / max(matched * (matched - 1) / 2, 1),
+                "reversed": int(rev.sum()),
+                "deviation": float(dev.mean()) if matched else None,
+                "per_stroke": [{"candidate": int(i), "reference": int(j), "deviation": round(float(d), 2),
+                                "reversed": bool(r)} for i, j, d, r in zip(rows, cols, dev, rev)],
+            })
+    return results
+
+def recorded_strokes(items):
+    """Pen-down polylines from RecordingTurtle items (or their JSON form)."""
+    return [np.asarray(item[1], dtype=float) for item in items if item[0] == "line" and len(item[1]) > 1]
+
+def character_of(image_id):
+    """Character in a generator file name: 01_一_1.png, 04E00_一_a2.png."""
+    return image_id.split("_")[1]
+
+def score_results(results, graphics_path, points=DTW_POINTS):
+    """Stroke-order rows for program_executor results (command-stream output) on character tasks."""
+    chars, glyphs = load_glyphs(graphics_path)
+    medians = dict(zip(chars, glyphs))
+    ids, cands, refs = [], [], []
+    for result in results:
+        strokes = recorded_strokes(result.get("items") or [])
+        char = character_of(result["id"])
+        if char in medians and strokes:
+            ids.append(result["id"])
+            refs.append(medians[char])
+            cands.append(to_reference_frame(strokes, medians[char]))
+    return [{"id": i, **row} for i, row in zip(ids, stroke_order_scores(cands, refs, points))]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score stroke order and direction against graphics.txt medians.")
+    parser.add_argument("results", help="program_executor results JSON (command-stream output)")
+    parser.add_argument("graphics", help="MakeMeAHanzi graphics.txt")
+    parser.add_argument("--points", type=int, default=DTW_POINTS, help="resampled points per stroke")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    with open(args.results, encoding="utf-8") as f:
+        rows = score_results(json.load(f), args.graphics, args.points)
+    print(f"✅ Scored stroke order for {len(rows)} characters")
+    if rows:
+        print(f"   order errors: {sum(r['order_errors'] for r in rows)} inversions, "
+              f"{sum(r['order_errors'] > 0 for r in rows)} characters out of order")
+        print(f"   reversed strokes: {sum(r['reversed'] for r in rows)}")
+        devs = [r["deviation"] for r in rows if r["deviation"] is not None]
+        print(f"   mean deviation: {np.mean(devs):.1f} units")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2, ensure_ascii=False)
+        print(f"📊 Scores saved to {args.out}")
@@ -0,0 +1,199 @@
+"""SQLite catalog shared by every DC-ACE generator.
+
+tasks.json, chinese_strokes.json, characters.json and characters_L3.json use
+three different schemas. Each generator also writes its samples into one
+`tasks` table here (one row per image), so evaluation subsets are indexed
+queries instead of full JSON parses:
+
+    python task_catalog.py import dataset_pilot/tasks.json Chinese_2/characters.json
+    python task_catalog.py query --level 3
+    python task_catalog.py query --dataset chinese_strokes --min-size 60
+    python task_catalog.py query --dataset tasks --min-x 0 --max-y -100
+"""
+
+import os
+import json
+import sqlite3
+import argparse
+
+# One catalog next to the generators unless a run passes --catalog
+DEFAULT_CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    dataset    TEXT NOT NULL,   -- metadata file stem: tasks, chinese_strokes, characters, ...
+    id         TEXT NOT NULL,   -- image file name
+    level      INTEGER,
+    family     TEXT,            -- params.type, or 'character'
+    character  TEXT,            -- stroke or character glyph
+    prompt     TEXT,
+    image_path TEXT,
+    size       REAL,
+    x          REAL,
+    y          REAL,
+    scale      REAL,
+    params     TEXT,            -- full params as JSON
+    PRIMARY KEY (dataset, id)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_level ON tasks(level);
+CREATE INDEX IF NOT EXISTS idx_tasks_family ON tasks(family);
+CREATE INDEX IF NOT EXISTS idx_tasks_character ON tasks(character);
+CREATE INDEX IF NOT EXISTS idx_tasks_size ON tasks(size);
+CREATE INDEX IF NOT EXISTS idx_tasks_x ON tasks(x);
+CREATE INDEX IF NOT EXISTS idx_tasks_y ON tasks(y);
+"""
+
+COLUMNS = ("dataset", "id", "level", "family", "character", "prompt", "image_path",
+           "size", "x", "y", "scale", "params")
+
+def open_catalog(path=DEFAULT_CATALOG):
+    """Connect to (and create if needed) the catalog at `path`."""
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+# ==========================================
+# Schema Normalization
+# ==========================================
+
+def _task_rows(metadata, dataset, image_dir):
+    # tasks.json / chinese_strokes.json: [{"id", "level", "prompt", "params"}]
+    for entry in metadata:
+        params = entry.get("params", {})
+        yield {
+            "dataset": dataset,
+            "id": entry["id"],
+            "level": entry.get("level"),
+            "family": params.get("type"),
+            "character": params.get("stroke", params.get("character")),
+            "prompt": entry.get("prompt"),
+            "image_path": os.path.join(image_dir, entry["id"]),
+            "size": params.get("size"),
+            "x": params.get("x"),
+            "y": params.get("y"),
+            "scale": None,
+            "params": json.dumps(params, ensure_ascii=False),
+        }
+
+def _character_rows(metadata, dataset, image_dir):
+    # characters.json / characters_L3.json: one entry per character, samples nested.
+    # The basic character set predates the "level" key and is level 2.
+    level = metadata.get("level", 2)
+    for entry in metadata["characters"]:
+        for sample in entry["samples"]:
+            params = {k: entry[k] for k in ("index", "pinyin", "meaning", "description")}
+            params.update(sample)
+            yield {
+                "dataset": dataset,
+                "id": sample["filename"],
+                "level": level,
+                "family": "character",
+                "character": entry["character"],
+                "prompt": entry["prompt"],
+                "image_path": os.path.join(image_dir, sample["filename"]),
+                "size": None,
+                "x": sample.get("offset_x"),
+                "y": sample.get("offset_y"),
+                "scale": sample.get("scale"),
+                "params": json.dumps(params, ensure_ascii=False),
+            }
+
+def catalog_rows(metadata, dataset, image_dir):
+    """Rows for any of the generators' metadata schemas (list or character dict)."""
+    if isinstance(metadata, dict):
+        return _character_rows(metadata, dataset, image_dir)
+    return _task_rows(metadata, dataset, image_dir)
+
+# ==========================================
+# Write / Import
+# ==========================================
+
+def write_catalog(metadata, metadata_path, catalog=DEFAULT_CATALOG):
+    """Replace the rows of the dataset stored at `metadata_path` with `metadata`.
+
+    The dataset name is the metadata file stem and images are looked up
+    next to it, matching how every generator lays out its output.
+    """
+    dataset = os.path.splitext(os.path.basename(metadata_path))[0]
+    image_dir = os.path.dirname(os.path.abspath(metadata_path))
+    rows = [tuple(row[c] for c in COLUMNS) for row in catalog_rows(metadata, dataset, image_dir)]
+    conn = open_catalog(catalog)
+    try:
+        with conn:
+            conn.execute("DELETE FROM tasks WHERE dataset = ?", (dataset,))
+            conn.executemany(f"INSERT INTO tasks ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+    finally:
+        conn.close()
+    return len(rows)
+
+def import_json(metadata_path, catalog=DEFAULT_CATALOG):
+    """Load an existing metadata JSON file into the catalog; return the row count."""
+    with open(metadata_path, encoding="utf-8") as f:
+        return write_catalog(json.load(f), metadata_path, catalog)
+
+# ==========================================
+# Query
+# ==========================================
+
+def query(catalog=DEFAULT_CATALOG, dataset=None, level=None, family=None, character=None,
+          min_size=None, max_size=None, limit=None, min_x=None, max_x=None, min_y=None, max_y=None):
+    """Select catalog rows as dicts (params decoded); every filter is optional.
+
+    x/y are placement centers for tasks and strokes, offsets for characters.
+    """
+    clauses, args = [], []
+    for column, value in (("dataset", dataset), ("level", level), ("family", family), ("character", character)):
+        if value is not None:
+            clauses.append(f"{column} = ?"); args.append(value)
+    for column, op, value in (("size", ">=", min_size), ("size", "<=", max_size), ("x", ">=", min_x),
+                              ("x", "<=", max_x), ("y", ">=", min_y), ("y", "<=", max_y)):
+        if value is not None:
+            clauses.append(f"{column} {op} ?"); args.append(value)
+    sql = "SELECT * FROM tasks"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY dataset, rowid"
+    if limit is not None:
+        sql += " LIMIT ?"; args.append(limit)
+    conn = open_catalog(catalog)
+    try:
+        rows = [dict(row) for row in conn.execute(sql, args)]
+    finally:
+        conn.close()
+    for row in rows:
+        row["params"] = json.loads(row["params"])
+    return rows
+
+def add_catalog_arg(parser):
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG, help="SQLite task catalog ('' to skip)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DC-ACE SQLite task catalog.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="load existing metadata JSON files")
+    imp.add_argument("paths", nargs="+")
+    q = sub.add_parser("query", help="print matching tasks as JSON lines")
+    q.add_argument("--dataset")
+    q.add_argument("--level", type=int)
+    q.add_argument("--family")
+    q.add_argument("--character")
+    q.add_argument("--min-size", type=float)
+    q.add_argument("--max-size", type=float)
+    q.add_argument("--min-x", type=float)
+    q.add_argument("--max-x", type=float)
+    q.add_argument("--min-y", type=float)
+    q.add_argument("--max-y", type=float)
+    q.add_argument("--limit", type=int)
+    for p in (imp, q):
+        p.add_argument("--catalog", default=DEFAULT_CATALOG)
+    args = parser.parse_args()
+
+    if args.command == "import":
+        for path in args.paths:
+            n = import_json(path, args.catalog)
+            print(f"✅ Imported {n} rows from {path}")
+    else:
+        for row in query(args.catalog, args.dataset, args.level, args.family, args.character,
+                         args.min_size, args.max_size, args.limit, args.min_x, args.max_x, args.min_y, args.max_y):
+            print(json.dumps(row, ensure_ascii=False))
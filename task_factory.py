@@ -4,22 +4,28 @@ Generates procedural turtle/logo tasks and saves ground-truth PNGs and metadata.
 """
 
 import os
-import io
 import math
 import random
 import json
+import argparse
+import functools
 import turtle
-from PIL import Image
+
+from render_pipeline import (PngWriter, canvas_postscript, postscript_to_image, prefetch_samples,
+                             render_parallel)
+from sharding import add_shard_args, check_shard_args, run_seed, select_jobs, shard_dir, task_seed, write_manifest
+from generation_plan import compile_plan, load_plan, scale_plan
+from task_catalog import DEFAULT_CATALOG, add_catalog_arg, write_catalog
+from perceptual_hash import add_dedupe_args, deduper_from_args, resolve_dataset
+from turtle_recorder import record, sample_offset
+from palette import COLORS
 
 WIDTH = 800
 HEIGHT = 600
 # Save dataset into user's Documents folder as requested
 OUT_DIR = "/Users/peilinwu/Documents/AI memory research/dataset_pilot"
-
-COLORS = [
-    "red", "green", "blue", "orange", "purple",
-    "brown", "black", "cyan", "magenta", "gold", "navy", "lime"
-]
+# Families, counts and parameter distributions of the pilot dataset
+DEFAULT_PLAN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plans", "pilot.json")
 
 # ==========================================
 # 1. Core Rendering & Helper Functions
@@ -27,14 +33,8 @@ COLORS = [
 
 def save_canvas_to_png(screen: turtle.Screen, path: str) -> None:
     """Save the current turtle screen to a PNG using postscript + PIL."""
-    canvas = screen.getcanvas()
     try:
-        ps = canvas.postscript(colormode="color")
-        b = io.BytesIO(ps.encode("utf-8"))
-        img = Image.open(b)
-        img.load(scale=1)
-        rgba = img.convert("RGBA")
-        rgba.save(path, "PNG")
+        postscript_to_image(canvas_postscript(screen)).save(path, "PNG")
     except Exception as e:
         print(f"Error saving {path}: {e}")
 
@@ -683,13 +683,280 @@ def draw_enchanted_garden(t, tree_count, pot_count, insect_count):
             draw_dragonfly(t, random.uniform(20, 30))
 
     t.penup(); t.goto(cx, cy); t.setheading(90); t.pendown()
+
+# ==========================================
+# 4. Task Family Registry
+# ==========================================
+# Each family: id prefix, level, relative render cost, draw adapter,
+# prompt and metadata params. Counts and parameter distributions live in
+# the generation plan (plans/pilot.json); centers are sampled where the
+# recorded drawing fits the canvas (_place_job).
+
+ICE_CREAM_FLAVORS = {"pink":"strawberry", "lightgreen":"mint", "sienna":"chocolate", "cornsilk":"vanilla"}
+
+TASK_FAMILIES = {
+    # --- Level 1 ---
+    "poly": {
+        "prefix": "L1_Poly", "level": 1, "cost": 1,
+        "draw": lambda t, p: draw_regular_polygon(t, p["n"], p["size"], p["color"]),
+        "prompt": lambda p: f"Draw a {p['color']} {p['n']}-sided regular polygon size {int(p['size'])} at ({int(p['x'])},{int(p['y'])}).",
+        "meta": lambda p: {"type": "poly", "n": p["n"], "size": p["size"], "color": p["color"]},
+    },
+    "rect": {
+        "prefix": "L1_Rect", "level": 1, "cost": 1,
+        "draw": lambda t, p: draw_rectangle(t, p["w"], p["h"], p["color"]),
+        "prompt": lambda p: f"Draw a {p['color']} rectangle {int(p['w'])}x{int(p['h'])} at ({int(p['x'])},{int(p['y'])}).",
+        "meta": lambda p: {"type": "rect", "w": p["w"], "h": p["h"]},
+    },
+    "circle": {
+        "prefix": "L1_Circle", "level": 1, "cost": 1,
+        "draw": lambda t, p: draw_circle(t, p["size"], p["color"]),
+        "prompt": lambda p: f"Draw a {p['color']} Circle size {int(p['size'])} at ({int(p['x'])},{int(p['y'])}).",
+        "meta": lambda p: {"type": "circle", "size": p["size"], "color": p["color"]},
+    },
+    "star": {
+        "prefix": "L1_Star", "level": 1, "cost": 1,
+        "draw": lambda t, p: draw_star(t, p["size"], p["color"]),
+        "prompt": lambda p: f"Draw a {p['color']} Star size {int(p['size'])} at ({int(p['x'])},{int(p['y'])}).",
+        "meta": lambda p: {"type": "star", "size": p["size"], "color": p["color"]},
+    },
+    "leaf": {
+        "prefix": "L1_Leaf", "level": 1, "cost": 2,
+        "draw": lambda t, p: draw_leaf(t, p["size"], p["angle"], p["color"]),
+        "prompt": lambda p: f"Draw a {p['color']} leaf angle {p['angle']} size {int(p['size'])} at ({int(p['x'])},{int(p['y'])}).",
+        "meta": lambda p: {"type": "leaf", "size": p["size"], "angle": p["angle"]},
+    },
+    # --- Level 2 ---
+    "house": {
+        "prefix": "L2_House", "level": 2, "cost": 2,
+        "draw": lambda t, p: draw_house(t, p["size"], *p["colors"]),
+        "prompt": lambda p: f"House size {int(p['size'])} {p['colors'][0]}/{p['colors'][1]}",
+        "meta": lambda p: {"type": "house"},
+    },
+    "badge": {
+        "prefix": "L2_Badge", "level": 2, "cost": 2,
+        "draw": lambda t, p: draw_badge(t, p["size"], *p["colors"]),
+        "prompt": lambda p: f"Badge size {int(p['size'])} {p['colors'][0]}/{p['colors'][1]}",
+        "meta": lambda p: {"type": "badge"},
+    },
+    "window": {
+        "prefix": "L2_Window", "level": 2, "cost": 5,
+        "draw": lambda t, p: draw_window(t, p["size"], *p["colors"]),
+        "prompt": lambda p: f"Window size {int(p['size'])} {p['colors'][0]}/{p['colors'][1]}",
+        "meta": lambda p: {"type": "window"},
+    },
+    "flower": {
+        "prefix": "L2_Flower", "level": 2, "cost": lambda p: 2 * p["count"],
+        "draw": lambda t, p: draw_flower(t, p["count"], p["size"], p["angle"], p["colors"]),
+        "prompt": lambda p: f"Flower {p['count']} petals size {int(p['size'])}",
+        "meta": lambda p: {"type": "flower"},
+    },
+    "snowman": {
+        "prefix": "L2_Snowman", "level": 2, "cost": 3,
+        "draw": lambda t, p: draw_snowman(t, p["base"]),
+        "prompt": lambda p: f"Snowman base {int(p['base'])}",
+        "meta": lambda p: {"type": "snowman"},
+    },
+    "pine": {
+        "prefix": "L2_Pine", "level": 2, "cost": 4,
+        "draw": lambda t, p: draw_pine_tree(t, p["size"]),
+        "prompt": lambda p: f"Pine Tree size {int(p['size'])}",
+        "meta": lambda p: {"type": "pine"},
+    },
+    "icecream": {
+        "prefix": "L2_IceCream", "level": 2, "cost": 2,
+        "draw": lambda t, p: draw_ice_cream(t, p["size"], p["flavor"]),
+        "prompt": lambda p: f"Ice Cream size {int(p['size'])} {ICE_CREAM_FLAVORS[p['flavor']]}",
+        "meta": lambda p: {"type": "icecream"},
+    },
+    "traffic": {
+        "prefix": "L2_Traffic", "level": 2, "cost": 4,
+        "draw": lambda t, p: draw_traffic_light(t, p["height"]),
+        "prompt": lambda p: f"Traffic Light height {int(p['height'])}",
+        "meta": lambda p: {"type": "traffic"},
+    },
+    "rocket": {
+        "prefix": "L2_Rocket", "level": 2, "cost": 3,
+        "draw": lambda t, p: draw_rocket(t, p["w"], p["h"], p["color"]),
+        "prompt": lambda p: f"Rocket {int(p['w'])}x{int(p['h'])}",
+        "meta": lambda p: {"type": "rocket"},
+    },
+    "dumbbell": {
+        "prefix": "L2_Dumbbell", "level": 2, "cost": 3,
+        "draw": lambda t, p: draw_dumbbell(t, p["size"]),
+        "prompt": lambda p: f"Dumbbell size {int(p['size'])}",
+        "meta": lambda p: {"type": "dumbbell"},
+    },
+    "glasses": {
+        "prefix": "L2_Glasses", "level": 2, "cost": 3,
+        "draw": lambda t, p: draw_glasses(t, p["size"]),
+        "prompt": lambda p: f"Glasses size {int(p['size'])}",
+        "meta": lambda p: {"type": "glasses"},
+    },
+    "car": {
+        "prefix": "L2_Car", "level": 2, "cost": 3,
+        "draw": lambda t, p: draw_car(t, p["length"], p["color"]),
+        "prompt": lambda p: f"Car len {int(p['length'])} {p['color']}",
+        "meta": lambda p: {"type": "car"},
+    },
+    "bowtie": {
+        "prefix": "L2_Bowtie", "level": 2, "cost": 2,
+        "draw": lambda t, p: draw_bowtie(t, p["size"], p["color"]),
+        "prompt": lambda p: f"Bowtie size {int(p['size'])} {p['color']}",
+        "meta": lambda p: {"type": "bowtie"},
+    },
+    "candy": {
+        "prefix": "L2_Candy", "level": 2, "cost": 2,
+        "draw": lambda t, p: draw_candy(t, p["size"], p["color"]),
+        "prompt": lambda p: f"Candy size {int(p['size'])} {p['color']}",
+        "meta": lambda p: {"type": "candy"},
+    },
+    "tv": {
+        "prefix": "L2_TV", "level": 2, "cost": 2,
+        "draw": lambda t, p: draw_tv(t, p["width"]),
+        "prompt": lambda p: f"TV width {int(p['width'])}",
+        "meta": lambda p: {"type": "tv"},
+    },
+    "donut": {
+        "prefix": "L2_Donut", "level": 2, "cost": 2,
+        "draw": lambda t, p: draw_donut(t, p["size"]),
+        "prompt": lambda p: f"Donut size {int(p['size'])}",
+        "meta": lambda p: {"type": "donut"},
+    },
+    "target": {
+        "prefix": "L2_Target", "level": 2, "cost": 3,
+        "draw": lambda t, p: draw_target(t, p["size"]),
+        "prompt": lambda p: f"Target size {int(p['size'])}",
+        "meta": lambda p: {"type": "target"},
+    },
+    "framed_star": {
+        "prefix": "L2_FrameStar", "level": 2, "cost": 2,
+        "draw": lambda t, p: draw_framed_star(t, p["size"], p["color"]),
+        "prompt": lambda p: f"Framed Star size {int(p['size'])} {p['color']}",
+        "meta": lambda p: {"type": "framed_star"},
+    },
+    "door": {
+        "prefix": "L2_Door", "level": 2, "cost": 2,
+        "draw": lambda t, p: draw_door(t, p["w"], p["h"], p["color"]),
+        "prompt": lambda p: f"Door {int(p['w'])}x{int(p['h'])} {p['color']}",
+        "meta": lambda p: {"type": "door"},
+    },
+    "butterfly": {
+        "prefix": "L2_Butterfly", "level": 2, "cost": 8,
+        "draw": lambda t, p: draw_butterfly(t, p["size"], p["color"]),
+        "prompt": lambda p: f"Butterfly size {int(p['size'])} {p['color']}",
+        "meta": lambda p: {"type": "butterfly"},
+    },
+    "sun": {
+        "prefix": "L2_Sun", "level": 2, "cost": 9,
+        "draw": lambda t, p: draw_sun(t, p["radius"]),
+        "prompt": lambda p: f"Sun radius {int(p['radius'])}",
+        "meta": lambda p: {"type": "sun"},
+    },
+    "pot": {
+        "prefix": "L2_Pot", "level": 2, "cost": 12,
+        "draw": lambda t, p: draw_flower_pot(t, p["size"]),
+        "prompt": lambda p: f"Flower Pot size {int(p['size'])}",
+        "meta": lambda p: {"type": "pot"},
+    },
+    "dragonfly": {
+        "prefix": "L2_Dragonfly", "level": 2, "cost": 9,
+        "draw": lambda t, p: draw_dragonfly(t, p["size"]),
+        "prompt": lambda p: f"Dragonfly size {int(p['size'])}",
+        "meta": lambda p: {"type": "dragonfly"},
+    },
+    # --- LEVEL 3: SYSTEMIC PATTERNS ---
+    "village": {
+        "prefix": "L3_Village", "level": 3, "cost": lambda p: 2 * p["count"],
+        "draw": lambda t, p: draw_village_circle(t, p["radius"], p["count"], p["house_size"]),
+        "prompt": lambda p: f"Village circle radius {int(p['radius'])} count {p['count']}",
+        "meta": lambda p: {"type": "village"},
+    },
+    "garden": {
+        "prefix": "L3_Garden", "level": 3, "cost": lambda p: 14 * p["rows"] * p["cols"],
+        "draw": lambda t, p: draw_flower_grid(t, p["rows"], p["cols"], p["cell_size"]),
+        "prompt": lambda p: f"Flower Grid {p['rows']}x{p['cols']}",
+        "meta": lambda p: {"type": "garden"},
+    },
+    "family": {
+        "prefix": "L3_Family", "level": 3, "cost": lambda p: 3 * p["count"],
+        "draw": lambda t, p: draw_snow_family(t, p["count"], p["start_size"]),
+        "prompt": lambda p: f"Snowman Family count {p['count']}",
+        "meta": lambda p: {"type": "family"},
+    },
+    "galaxy": {
+        "prefix": "L3_Galaxy", "level": 3, "cost": lambda p: 9 + 2 * p["arms"] * p["stars"],
+        "draw": lambda t, p: draw_galaxy_spiral(t, p["arms"], p["stars"]),
+        "prompt": lambda p: f"Galaxy Spiral arms {p['arms']}",
+        "meta": lambda p: {"type": "galaxy"},
+    },
+    "traffic_scene": {
+        "prefix": "L3_Traffic", "level": 3, "cost": lambda p: 4 * p["lights"] + 3 * p["cars"],
+        "draw": lambda t, p: draw_traffic_scene(t, p["cars"], p["lights"]),
+        "prompt": lambda p: f"Draw a traffic scene with a full-width road, {p['lights']} traffic lights evenly spaced, and {p['cars']} non-overlapping cars that avoid both lights and other cars",
+        "meta": lambda p: {"type": "traffic_scene", "lights": p["lights"], "cars": p["cars"]},
+    },
+    "enchanted_garden": {
+        "prefix": "L3_Garden_Complex", "level": 3,
+        "cost": lambda p: 4 * p["trees"] + 12 * p["pots"] + 8 * p["insects"],
+        "draw": lambda t, p: draw_enchanted_garden(t, p["trees"], p["pots"], p["insects"]),
+        "prompt": lambda p: f"Draw an enchanted garden with {p['trees']} non-overlapping pine trees in the background, {p['pots']} flower pots that don't overlap with trees or each other, and {p['insects']} flying insects (butterflies/dragonflies) in the sky",
+        "meta": lambda p: {"type": "enchanted_garden", "trees": p["trees"], "pots": p["pots"], "insects": p["insects"]},
+    },
+}
+
+def _place_job(name, params, rng, task_id, seed=None):
+    """Sample a center from the region where the drawing fits the canvas; None if it fits nowhere.
+
+    The family is recorded once at the origin on a RecordingTurtle. Draw
+    functions work relative to the turtle's position, so the recorded
+    extent moves with the center and the feasible centers are a rectangle.
+    The task's own random stream is replayed (as _draw_job does), so the
+    randomly laid out L3 scenes are measured exactly as they render; callers
+    pick a run seed up front (sharding.run_seed) so one always exists.
+    """
+    state = random.getstate()
+    try:
+        if seed is not None: random.seed(task_seed(seed, task_id))
+        box = record(TASK_FAMILIES[name]["draw"], params).bbox()
+    finally:
+        random.setstate(state)
+    offset = sample_offset(box, WIDTH, HEIGHT, rng)
+    return None if offset is None else {"x": offset[0], "y": offset[1]}
+
+def compile_jobs(plan=None, seed=None, scale=1):
+    """Compile a generation plan (path or dict) into a cost-sorted Job list.
+
+    Tasks whose drawing cannot fit the canvas are dropped here, before
+    anything is rendered.
+    """
+    plan = load_plan(plan or DEFAULT_PLAN)
+    if scale != 1:
+        plan = scale_plan(plan, scale)
+    rejected = []
+    jobs = compile_plan(plan, TASK_FAMILIES, seed, place=functools.partial(_place_job, seed=seed),
+                        palettes={"COLORS": COLORS}, rejected=rejected)
+    if rejected:
+        print(f"❌ Rejected {len(rejected)} tasks larger than the canvas: {', '.join(rejected[:5])}"
+              + (" ..." if len(rejected) > 5 else ""))
+    return jobs
+
+def task_metadata(job):
+    """tasks.json entry for a compiled job; params include the placement center (x, y)."""
+    family = TASK_FAMILIES[job.family]
+    params = {**family["meta"](job.params), "x": job.params["x"], "y": job.params["y"]}
+    return {"id": job.id, "level": family["level"], "prompt": family["prompt"](job.params), "params": params}
+
 # ==========================================
-# 4. Generator Class
+# 5. Generator Class
 # ==========================================
 
 class TaskGenerator:
-    def __init__(self, seed: int | None = None):
-        if seed is not None: random.seed(seed)
+    def __init__(self, seed: int | None = None, plan=None):
+        self.seed = run_seed(seed)
+        random.seed(self.seed)
+        self.plan = plan or DEFAULT_PLAN
+        self.out_dir = OUT_DIR
         os.makedirs(OUT_DIR, exist_ok=True)
         self.screen = turtle.Screen()
         self.screen.setup(WIDTH, HEIGHT)
@@ -699,300 +966,141 @@ class TaskGenerator:
         self.t.hideturtle()
         self.t.speed(0)
         self.metadata = []
-        self.counters = {} # Track ID per type
+        self.writer = None # PngWriter while generate_all runs
 
-    def _get_id(self, prefix):
-        if prefix not in self.counters: self.counters[prefix] = 0
-        self.counters[prefix] += 1
-        return f"{prefix}_{self.counters[prefix]}"
+    def _seed_task(self, fname, seed=None):
+        # Every task gets its own RNG stream, so shards, workers and
+        # _place_job reproduce the single-node output exactly
+        random.seed(task_seed(self.seed if seed is None else seed, fname))
 
-    def _rand_pos(self, margin):
-        x = random.uniform(-WIDTH/2 + margin, WIDTH/2 - margin)
-        y = random.uniform(-HEIGHT/2 + margin, HEIGHT/2 - margin)
-        return x, y
-    
-    def _save(self, fname, level, prompt, params):
-        turtle.update()
-        save_canvas_to_png(self.screen, os.path.join(OUT_DIR, fname))
-        self.metadata.append({"id": fname, "level": level, "prompt": prompt, "params": params})
+    def _reset(self):
         self.t.clear()
         self.t.penup(); self.t.home(); self.t.pendown()
 
-    def generate_all(self):
-        print("🏭 Generating tasks...")
+    def _draw_job(self, job, seed=None):
+        self._seed_task(job.id, seed)
+        self.t.penup(); self.t.goto(job.params["x"], job.params["y"]); self.t.pendown()
+        TASK_FAMILIES[job.family]["draw"](self.t, job.params)
+        turtle.update()
 
-        # --- Level 1 ---
-        # Polygons (25)
-        for _ in range(25):
-            n = random.choice([3, 4, 5, 6,7,8,9,10])
-            s = random.uniform(30, 100)
-            c = random.choice(COLORS)
-            x, y = self._rand_pos(s+20)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown()
-            draw_regular_polygon(self.t, n, s, c)
-            self._save(self._get_id("L1_Poly") + ".png", 1, 
-                       f"Draw a {c} {n}-sided regular polygon size {int(s)} at ({int(x)},{int(y)}).", 
-                       {"type": "poly", "n": n, "size": s, "color": c})
-
-        # Rectangles (10)
-        for _ in range(10):
-            w, h = random.uniform(40,120), random.uniform(30,90)
-            c = random.choice(COLORS)
-            x, y = self._rand_pos(max(w,h)+20)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown()
-            draw_rectangle(self.t, w, h, c)
-            self._save(self._get_id("L1_Rect") + ".png", 1, 
-                       f"Draw a {c} rectangle {int(w)}x{int(h)} at ({int(x)},{int(y)}).", 
-                       {"type": "rect", "w": w, "h": h})
-
-        # Circle, Star, Leaf (5 each)
-        for type_name, func in [("Circle", draw_circle), ("Star", draw_star)]:
-            for _ in range(5):
-                s = random.uniform(40, 120)
-                c = random.choice(COLORS)
-                x, y = self._rand_pos(s)
-                self.t.penup(); self.t.goto(x, y); self.t.pendown()
-                func(self.t, s, c)
-                self._save(self._get_id(f"L1_{type_name}") + ".png", 1,
-                           f"Draw a {c} {type_name} size {int(s)} at ({int(x)},{int(y)}).",
-                           {"type": type_name.lower(), "size": s, "color": c})
-        
-        # Leaf needs extra param angle
-        for _ in range(5):
-            s = random.uniform(40, 100); ang = random.randint(60, 120); c = random.choice(COLORS)
-            x, y = self._rand_pos(s)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown()
-            draw_leaf(self.t, s, ang, c)
-            self._save(self._get_id("L1_Leaf") + ".png", 1,
-                       f"Draw a {c} leaf angle {ang} size {int(s)} at ({int(x)},{int(y)}).",
-                       {"type": "leaf", "size": s, "angle": ang})
-
-       
-
-        # --- Level 2 (5 samples each) ---
-        # Helper to simplify loop
-        def gen_l2(name, draw_fn, prompt_fn, param_fn):
-            for _ in range(5):
-                x, y = self._rand_pos(100)
-                self.t.penup(); self.t.goto(x, y); self.t.pendown()
-                draw_fn(self.t, x, y) # Pass center to helper wrapper
-                self._save(self._get_id(f"L2_{name}") + ".png", 2, prompt_fn(), param_fn())
-
-        # 1. House
-        for _ in range(5):
-            s = random.uniform(60, 120); c1, c2 = random.sample(COLORS, 2)
-            x, y = self._rand_pos(s)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown()
-            draw_house(self.t, s, c1, c2)
-            self._save(self._get_id("L2_House")+".png", 2, f"House size {int(s)} {c1}/{c2}", {"type":"house"})
-
-        # 2. Badge
-        for _ in range(5):
-            s = random.uniform(50, 120); c1, c2 = random.sample(COLORS, 2)
-            x, y = self._rand_pos(s)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown()
-            draw_badge(self.t, s, c1, c2)
-            self._save(self._get_id("L2_Badge")+".png", 2, f"Badge size {int(s)} {c1}/{c2}", {"type":"badge"})
-
-        # 3. Window
-        for _ in range(5):
-            s = random.uniform(80, 150); c1, c2 = random.sample(COLORS, 2)
-            x, y = self._rand_pos(s)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown()
-            draw_window(self.t, s, c1, c2)
-            self._save(self._get_id("L2_Window")+".png", 2, f"Window size {int(s)} {c1}/{c2}", {"type":"window"})
-
-        # 4. Flower
-        for _ in range(5):
-            cnt = random.randint(5, 12); s = random.uniform(40, 100); ang = random.randint(40, 90)
-            cols = [random.choice(COLORS) for _ in range(cnt)]
-            x, y = self._rand_pos(s)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown()
-            draw_flower(self.t, cnt, s, ang, cols)
-            self._save(self._get_id("L2_Flower")+".png", 2, f"Flower {cnt} petals size {int(s)}", {"type":"flower"})
-
-        # 5. Snowman
-        for _ in range(5):
-            b = random.uniform(50, 100); x,y = self._rand_pos(b)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown(); draw_snowman(self.t, b)
-            self._save(self._get_id("L2_Snowman")+".png", 2, f"Snowman base {int(b)}", {"type":"snowman"})
-
-        # 6. Pine Tree
-        for _ in range(5):
-            s = random.uniform(80, 150); x,y = self._rand_pos(s)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown(); draw_pine_tree(self.t, s)
-            self._save(self._get_id("L2_Pine")+".png", 2, f"Pine Tree size {int(s)}", {"type":"pine"})
-
-        # 7. Ice Cream
-        for _ in range(5):
-            s = random.uniform(50, 100)
-            f_color = random.choice(["pink", "lightgreen", "sienna", "cornsilk"]) 
-            f_name = {"pink":"strawberry", "lightgreen":"mint", "sienna":"chocolate", "cornsilk":"vanilla"}[f_color]
-            
-            x,y = self._rand_pos(s)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown()
-            draw_ice_cream(self.t, s, f_color)
-            self._save(self._get_id("L2_IceCream")+".png", 2, f"Ice Cream size {int(s)} {f_name}", {"type":"icecream"})
-
-        # 8. Traffic Light
-        for _ in range(5):
-            h = random.uniform(80, 150); x,y = self._rand_pos(h)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown(); draw_traffic_light(self.t, h)
-            self._save(self._get_id("L2_Traffic")+".png", 2, f"Traffic Light height {int(h)}", {"type":"traffic"})
-
-        # 9. Rocket
-        for _ in range(5):
-            w, h = random.uniform(30, 60), random.uniform(80, 150); c = random.choice(COLORS); x,y = self._rand_pos(h)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown(); draw_rocket(self.t, w, h, c)
-            self._save(self._get_id("L2_Rocket")+".png", 2, f"Rocket {int(w)}x{int(h)}", {"type":"rocket"})
-
-        # 10. Dumbbell
-        for _ in range(5):
-            s = random.uniform(30, 60); x,y = self._rand_pos(s*4)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown(); draw_dumbbell(self.t, s)
-            self._save(self._get_id("L2_Dumbbell")+".png", 2, f"Dumbbell size {int(s)}", {"type":"dumbbell"})
-
-        # 11. Spectacles
-        for _ in range(5):
-            s = random.uniform(30, 60); x,y = self._rand_pos(s*3)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown(); draw_glasses(self.t, s)
-            self._save(self._get_id("L2_Glasses")+".png", 2, f"Glasses size {int(s)}", {"type":"glasses"})
-
-        # 12. Car
-        for _ in range(5):
-            l = random.uniform(80, 150); c = random.choice(COLORS); x,y = self._rand_pos(l)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown(); draw_car(self.t, l, c)
-            self._save(self._get_id("L2_Car")+".png", 2, f"Car len {int(l)} {c}", {"type":"car"})
-
-        # 13. Bowtie
-        for _ in range(5):
-            s = random.uniform(40, 80); c = random.choice(COLORS); x,y = self._rand_pos(s)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown(); draw_bowtie(self.t, s, c)
-            self._save(self._get_id("L2_Bowtie")+".png", 2, f"Bowtie size {int(s)} {c}", {"type":"bowtie"})
-
-        # 14. Candy
-        for _ in range(5):
-            s = random.uniform(30, 60); c = random.choice(COLORS); x,y = self._rand_pos(s*3)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown(); draw_candy(self.t, s, c)
-            self._save(self._get_id("L2_Candy")+".png", 2, f"Candy size {int(s)} {c}", {"type":"candy"})
-
-        # 15. TV
-        for _ in range(5):
-            w = random.uniform(80, 150); x,y = self._rand_pos(w)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown(); draw_tv(self.t, w)
-            self._save(self._get_id("L2_TV")+".png", 2, f"TV width {int(w)}", {"type":"tv"})
-
-        # 16. Donut
-        for _ in range(5):
-            s = random.uniform(50, 120); x,y = self._rand_pos(s)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown(); draw_donut(self.t, s)
-            self._save(self._get_id("L2_Donut")+".png", 2, f"Donut size {int(s)}", {"type":"donut"})
-
-        # 17. Target
-        for _ in range(5):
-            s = random.uniform(60, 120); x,y = self._rand_pos(s)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown(); draw_target(self.t, s)
-            self._save(self._get_id("L2_Target")+".png", 2, f"Target size {int(s)}", {"type":"target"})
-
-        # 18. Framed Star
-        for _ in range(5):
-            s = random.uniform(60, 120); c=random.choice(COLORS); x,y = self._rand_pos(s)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown(); draw_framed_star(self.t, s, c)
-            self._save(self._get_id("L2_FrameStar")+".png", 2, f"Framed Star size {int(s)} {c}", {"type":"framed_star"})
-
-        # 19. Door
-        for _ in range(5):
-            w, h = random.uniform(40, 80), random.uniform(80, 140); c=random.choice(COLORS); x,y = self._rand_pos(h)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown(); draw_door(self.t, w, h, c)
-            self._save(self._get_id("L2_Door")+".png", 2, f"Door {int(w)}x{int(h)} {c}", {"type":"door"})
-
-        # 21. Butterfly (New)
-        for _ in range(5):
-            s = random.uniform(50, 100); c=random.choice(COLORS); x,y = self._rand_pos(s)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown(); draw_butterfly(self.t, s, c)
-            self._save(self._get_id("L2_Butterfly")+".png", 2, f"Butterfly size {int(s)} {c}", {"type":"butterfly"})
-            
-        # 22. Sun (New)
-        for _ in range(5):
-            r = random.uniform(30, 60); x,y = self._rand_pos(r*2)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown(); draw_sun(self.t, r)
-            self._save(self._get_id("L2_Sun")+".png", 2, f"Sun radius {int(r)}", {"type":"sun"})
-
-        # 23. Flower Pot (New)
-        for _ in range(5):
-            s = random.uniform(50, 100); x,y = self._rand_pos(s*2)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown(); draw_flower_pot(self.t, s)
-            self._save(self._get_id("L2_Pot")+".png", 2, f"Flower Pot size {int(s)}", {"type":"pot"})
-            
-        # 24. Dragonfly (New)
-        for _ in range(5):
-            s = random.uniform(60, 120); x,y = self._rand_pos(s)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown(); draw_dragonfly(self.t, s)
-            self._save(self._get_id("L2_Dragonfly")+".png", 2, f"Dragonfly size {int(s)}", {"type":"dragonfly"})
+    def _save(self, job):
+        path = os.path.join(self.out_dir, job.id)
+        if self.writer: self.writer.submit(canvas_postscript(self.screen), path)
+        else: save_canvas_to_png(self.screen, path)
+        self.metadata.append(task_metadata(job))
+        self._reset()
+
+    def render_job(self, job, seed=None):
+        """Draw one job on this screen; return (postscript, metadata)."""
+        self._draw_job(job, seed)
+        ps = canvas_postscript(self.screen)
+        self._reset()
+        return ps, task_metadata(job)
+
+    def iter_samples(self, count, seed=None, prefetch=8):
+        """Yield `count` (RGBA ndarray, metadata) pairs without writing to OUT_DIR.
+
+        Samples follow the plan's png tasks in plan order (scaled up when
+        `count` exceeds them); metadata has the same shape as a tasks.json
+        entry. `seed` overrides the generator's seed for this call only.
+        """
+        seed = self.seed if seed is None else seed
+        plan = load_plan(self.plan)
+        default = plan.get("output", "png")
+        total = sum(entry["count"] for entry in plan["families"] if entry.get("output", default) == "png")
+        if not total:
+            raise ValueError("the plan has no png families to sample")
+        scale = math.ceil(count / total)
+        while True:
+            jobs = sorted((job for job in compile_jobs(plan, seed, scale) if job.output == "png"),
+                          key=lambda job: job.index)
+            if not jobs:
+                raise ValueError("every png task in the plan is larger than the canvas")
+            if len(jobs) >= count:
+                break
+            scale *= 2 # tasks rejected at placement left the plan short
+        jobs = iter(jobs)
+        return prefetch_samples(lambda: self.render_job(next(jobs), seed), count, prefetch)
 
-        # --- LEVEL 3: SYSTEMIC PATTERNS ---
-        
-        # 25. Village
-        for _ in range(5):
-            r = random.uniform(100, 160); cnt = random.randint(5, 10); h_s = random.uniform(30, 50)
-            x, y = self._rand_pos(r + h_s + 20)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown()
-            draw_village_circle(self.t, r, cnt, h_s)
-            self._save(self._get_id("L3_Village")+".png", 3, f"Village circle radius {int(r)} count {cnt}", {"type":"village"})
-
-        # 26. Flower Grid
-        for _ in range(5):
-            rows = random.randint(2, 4); cols = random.randint(2, 4); sz = random.uniform(40, 60)
-            margin = max(rows, cols) * sz * 0.6 + 40
-            x, y = self._rand_pos(margin)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown()
-            draw_flower_grid(self.t, rows, cols, sz)
-            self._save(self._get_id("L3_Garden")+".png", 3, f"Flower Grid {rows}x{cols}", {"type":"garden"})
-
-        # 27. Snowman Family
-        for _ in range(5):
-            cnt = random.randint(3, 5); start_sz = random.uniform(60, 90)
-            x, y = self._rand_pos(cnt * start_sz/2 + 40)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown()
-            draw_snow_family(self.t, cnt, start_sz)
-            self._save(self._get_id("L3_Family")+".png", 3, f"Snowman Family count {cnt}", {"type":"family"})
-
-        # 29. Galaxy Spiral
-        for _ in range(5):
-            arms = random.randint(3, 5); stars = random.randint(5, 10)
-            x, y = self._rand_pos(260)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown()
-            draw_galaxy_spiral(self.t, arms, stars)
-            self._save(self._get_id("L3_Galaxy")+".png", 3, f"Galaxy Spiral arms {arms}", {"type":"galaxy"})
-
-        # 30. Traffic Scene (NEW)
-        for _ in range(5):
-            cars = random.randint(3, 6); lights = random.randint(2, 4)
-            x, y = self._rand_pos(350)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown()
-            draw_traffic_scene(self.t, cars, lights)
-            self._save(self._get_id("L3_Traffic") + ".png", 3,
-                       f"Draw a traffic scene with a full-width road, {lights} traffic lights evenly spaced, and {cars} non-overlapping cars that avoid both lights and other cars",
-                       {"type": "traffic_scene", "lights": lights, "cars": cars})
-
-        # 31. Enchanted Garden (NEW)
-        for _ in range(5):
-            trees = random.randint(3, 6); pots = random.randint(4, 8); insects = random.randint(3, 6)
-            x, y = self._rand_pos(350)
-            self.t.penup(); self.t.goto(x, y); self.t.pendown()
-            draw_enchanted_garden(self.t, trees, pots, insects)
-            self._save(self._get_id("L3_Garden_Complex") + ".png", 3,
-                       f"Draw an enchanted garden with {trees} non-overlapping pine trees in the background, {pots} flower pots that don't overlap with trees or each other, and {insects} flying insects (butterflies/dragonflies) in the sky",
-                       {"type": "enchanted_garden", "trees": trees, "pots": pots, "insects": insects})
-        # Metadata
-        with open(os.path.join(OUT_DIR, "tasks.json"), "w") as f:
+    def generate_all(self, encode_workers=4, shard=0, num_shards=1, catalog=DEFAULT_CATALOG, dedupe=None):
+        print("🏭 Generating tasks...")
+        jobs, positions = select_jobs(compile_jobs(self.plan, self.seed), shard, num_shards)
+        if num_shards > 1:
+            self.out_dir = shard_dir(OUT_DIR, shard, num_shards)
+            os.makedirs(self.out_dir, exist_ok=True)
+
+        # Encoding and disk writes overlap with drawing the next task
+        hashes = {} if dedupe else None
+        with PngWriter(workers=encode_workers, hashes=hashes) as self.writer:
+            for job in jobs:
+                if job.output == "metadata":
+                    self.metadata.append(task_metadata(job))
+                    continue
+                self._draw_job(job)
+                self._save(job)
+        self.writer = None
+
+        # Metadata, in plan order
+        self.metadata.sort(key=lambda meta: positions[meta["id"]])
+        if dedupe:
+            for meta in self.metadata:
+                if meta["id"] in hashes: meta["phash"] = hashes[meta["id"]]
+            self.metadata = resolve_dataset(dedupe, self.metadata, self.out_dir, num_shards)
+        metadata_path = os.path.join(self.out_dir, "tasks.json")
+        with open(metadata_path, "w") as f:
             json.dump(self.metadata, f, indent=2)
-        
+        if num_shards > 1:
+            write_manifest(self.out_dir, shard, num_shards, self.seed, "tasks.json", positions, dedupe)
+        elif catalog:
+            write_catalog(self.metadata, metadata_path, catalog)
+
         print(f"✅ Generated {len(self.metadata)} tasks.")
         try: self.screen.bye()
         except: pass
 
+def _worker_generator(seed, worker):
+    # Every task reseeds from (run seed, task id), as its placement was measured
+    return TaskGenerator(seed=seed)
+
+def generate_parallel(workers=None, seed=None, shard=0, num_shards=1, plan=None, catalog=DEFAULT_CATALOG,
+                      dedupe=None):
+    """Render every task across worker processes through a shared-memory ring."""
+    print("🏭 Generating tasks in parallel...")
+    seed = run_seed(seed)
+    jobs, positions = select_jobs(compile_jobs(plan, seed), shard, num_shards)
+    out_dir = shard_dir(OUT_DIR, shard, num_shards) if num_shards > 1 else OUT_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    png_jobs = [job for job in jobs if job.output == "png"]
+    metadata = render_parallel(functools.partial(_worker_generator, seed), png_jobs,
+                               out_dir, (HEIGHT, WIDTH, 4), workers=workers, hashed=dedupe is not None)
+    metadata += [task_metadata(job) for job in jobs if job.output == "metadata"]
+    metadata.sort(key=lambda meta: positions[meta["id"]])
+    if dedupe:
+        metadata = resolve_dataset(dedupe, metadata, out_dir, num_shards)
+    metadata_path = os.path.join(out_dir, "tasks.json")
+    with open(metadata_path, "w") as f:
+        json.dump(metadata, f, indent=2)
+    if num_shards > 1:
+        write_manifest(out_dir, shard, num_shards, seed, "tasks.json", positions, dedupe)
+    elif catalog:
+        write_catalog(metadata, metadata_path, catalog)
+    print(f"✅ Generated {len(metadata)} tasks.")
+
 if __name__ == "__main__":
-    gen = TaskGenerator()
-    gen.generate_all()
-    
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate LOGO-EVO turtle tasks.")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--plan", default=DEFAULT_PLAN, help="generation plan (.json, or .yaml with PyYAML)")
+    parser.add_argument("--workers", type=int, default=0, help="render processes (0 = single process)")
+    add_shard_args(parser)
+    add_catalog_arg(parser)
+    add_dedupe_args(parser)
+    args = parser.parse_args()
+    check_shard_args(parser, args)
+
+    if args.workers:
+        generate_parallel(args.workers, args.seed, args.shard, args.num_shards, args.plan, args.catalog,
+                          deduper_from_args(args))
+    else:
+        gen = TaskGenerator(args.seed, args.plan)
+        gen.generate_all(shard=args.shard, num_shards=args.num_shards, catalog=args.catalog,
+                         dedupe=deduper_from_args(args))
@@ -0,0 +1,27 @@
+import numpy as np
+
+from brush import brush_outline
+
+def _area(poly):
+    x, y = poly[:, 0], poly[:, 1]
+    return 0.5 * abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+def test_uniform_straight_stroke_is_a_rectangle():
+    outline = brush_outline([[0, 0], [100, 0]], 10)
+    assert np.allclose(np.abs(outline[:, 1]), 5)
+    assert np.isclose(_area(outline), 100 * 10)
+
+def test_profile_area_matches_its_integral():
+    # Taper: width * sqrt(1 - s), whose integral over [0, 1] is 2 / 3
+    outline = brush_outline(np.column_stack((np.linspace(0, 300, 200), np.zeros(200))), 12, "taper")
+    assert np.isclose(_area(outline), 300 * 12 * 2 / 3, rtol=0.01)
+
+def test_corners_are_mitred():
+    outline = brush_outline([[0, 0], [100, 0], [100, 100]], 10)
+    # Both sides meet at the mitre points, half * sqrt(2) from the vertex
+    for corner in ([105, -5], [95, 5]):
+        assert np.isclose(np.linalg.norm(outline - corner, axis=1).min(), 0)
+    assert np.isclose(_area(outline), 2 * 100 * 10)
+
+def test_degenerate_strokes_have_no_outline():
+    assert brush_outline([[5, 5], [5, 5]], 10).shape == (0, 2)
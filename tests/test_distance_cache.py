@@ -0,0 +1,50 @@
+import json
+
+import numpy as np
+from PIL import Image
+
+from distance_cache import EdtCache, build_edt_cache, chamfer_scores, truncated_edt
+
+def _edt_reference(mask, limit):
+    ys, xs = np.nonzero(mask)
+    h, w = mask.shape
+    gy, gx = np.mgrid[:h, :w]
+    if not len(ys):
+        return np.full((h, w), float(limit))
+    d = np.sqrt((gy[..., None] - ys) ** 2 + (gx[..., None] - xs) ** 2).min(axis=2)
+    return np.minimum(d, limit)
+
+def test_truncated_edt_matches_brute_force():
+    rng = np.random.default_rng(0)
+    masks = rng.random((6, 23, 31)) < 0.02
+    masks[0] = False            # no ink at all
+    masks[1, 11, 15] = True
+    for limit in (3, 8, 40):
+        out = truncated_edt(masks, limit)
+        expected = np.stack([_edt_reference(m, limit) for m in masks])
+        np.testing.assert_allclose(out, expected, rtol=1e-6, atol=1e-5)
+
+def _save(path, ink):
+    image = np.full(ink.shape + (3,), 255, dtype=np.uint8)
+    image[ink] = 0
+    Image.fromarray(image).save(path)
+
+def test_chamfer_against_brute_force(tmp_path):
+    ref = np.zeros((40, 40), dtype=bool)
+    ref[10:30, 20] = True
+    _save(tmp_path / "a.png", ref)
+    with open(tmp_path / "tasks.json", "w", encoding="utf-8") as f:
+        json.dump([{"id": "a.png"}], f)
+    assert build_edt_cache(str(tmp_path / "tasks.json"), limit=16) == 1
+
+    cand = np.zeros((40, 40), dtype=bool)
+    cand[10:30, 23] = True      # the same stroke three pixels to the right
+    image = np.full((1, 40, 40, 3), 255, dtype=np.uint8)
+    image[0][cand] = 0
+    scores = chamfer_scores(EdtCache(str(tmp_path / "tasks.json")), ["a.png"], image)
+
+    forward = _edt_reference(ref, 16)[cand]
+    backward = _edt_reference(cand, 16)[ref]
+    np.testing.assert_allclose(scores["chamfer_cand"], [forward.mean()], rtol=1e-3)
+    np.testing.assert_allclose(scores["chamfer"], [(forward.mean() + backward.mean()) / 2], rtol=1e-3)
+    np.testing.assert_allclose(scores["hausdorff"], [max(forward.max(), backward.max())], rtol=1e-3)
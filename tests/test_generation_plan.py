@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from generation_plan import compile_plan, sample_value, scale_plan
+
+FAMILIES = {
+    "poly": {"prefix": "poly", "cost": lambda p: p["n"]},
+    "circle": {"prefix": "circle", "cost": 1},
+}
+
+PLAN = {
+    "families": [
+        {"family": "poly", "count": 6, "params": {"n": {"choice": [3, 4, 5, 6]}, "size": {"uniform": [30, 100]}}},
+        {"family": "circle", "count": 4, "output": "metadata", "params": {"r": {"randint": [10, 50]}}},
+    ]
+}
+
+def test_ids_counts_and_cost_order():
+    jobs = compile_plan(PLAN, FAMILIES, seed=3)
+    assert sorted(job.index for job in jobs) == list(range(10))
+    by_index = sorted(jobs, key=lambda job: job.index)
+    assert [job.id for job in by_index] == [f"poly_{i}.png" for i in range(1, 7)] + \
+                                           [f"circle_{i}.png" for i in range(1, 5)]
+    assert [job.cost for job in jobs] == sorted((job.cost for job in jobs), reverse=True)
+    assert {job.output for job in jobs if job.family == "circle"} == {"metadata"}
+    assert {job.output for job in jobs if job.family == "poly"} == {"png"}
+
+def test_same_seed_same_jobs():
+    assert compile_plan(PLAN, FAMILIES, seed=3) == compile_plan(PLAN, FAMILIES, seed=3)
+    assert compile_plan(PLAN, FAMILIES, seed=3) != compile_plan(PLAN, FAMILIES, seed=4)
+
+def test_params_do_not_depend_on_other_tasks():
+    full = {job.id: job.params for job in compile_plan(PLAN, FAMILIES, seed=3)}
+    polys_only = {"families": PLAN["families"][:1]}
+    for job in compile_plan(polys_only, FAMILIES, seed=3):
+        assert full[job.id] == job.params
+
+def test_rejected_tasks_keep_their_numbers():
+    rejected = []
+    place = lambda name, params, rng, task_id: None if task_id == "poly_2.png" else {"x": 1, "y": 2}
+    jobs = compile_plan(PLAN, FAMILIES, seed=3, place=place, rejected=rejected)
+    assert rejected == ["poly_2.png"]
+    ids = {job.id for job in jobs}
+    assert "poly_2.png" not in ids and "poly_3.png" in ids and len(ids) == 9
+    assert all(job.params["x"] == 1 and job.params["y"] == 2 for job in jobs)
+
+def test_unknown_family_and_output():
+    with pytest.raises(KeyError):
+        compile_plan({"families": [{"family": "star", "count": 1}]}, FAMILIES, seed=0)
+    with pytest.raises(ValueError):
+        compile_plan({"families": [{"family": "circle", "count": 1, "output": "svg"}]}, FAMILIES, seed=0)
+
+def test_sample_value_specs():
+    rng = random.Random(0)
+    palettes = {"COLORS": ["red", "blue"]}
+    assert sample_value(7, rng, {}, palettes) == 7
+    assert 2 <= sample_value({"uniform": [2, 3]}, rng, {}, palettes) <= 3
+    assert sample_value({"choice": "COLORS"}, rng, {}, palettes) in ("red", "blue")
+    assert len(sample_value({"choice": "COLORS", "size": "n"}, rng, {"n": 4}, palettes)) == 4
+    assert sorted(sample_value({"sample": [1, 2, 3], "k": 3}, rng, {}, palettes)) == [1, 2, 3]
+    with pytest.raises(ValueError):
+        sample_value({"normal": [0, 1]}, rng, {}, palettes)
+
+def test_scale_plan_rounds_up():
+    scaled = scale_plan(PLAN, 0.5)
+    assert [e["count"] for e in scaled["families"]] == [3, 2]
+    assert [e["count"] for e in PLAN["families"]] == [6, 4]
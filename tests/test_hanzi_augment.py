@@ -0,0 +1,49 @@
+import numpy as np
+
+from hanzi_augment import augment_glyphs, augment_medians, pad_medians, unpad
+
+GLYPHS = [
+    [np.array([[100.0, 500.0], [900.0, 500.0]]), np.array([[500.0, 900.0], [500.0, 450.0], [300.0, 100.0]])],
+    [np.array([[200.0, 700.0], [800.0, 300.0], [820.0, 280.0], [850.0, 250.0]])],
+]
+STILL = {"rotate": 0, "shear": 0, "scale": 0, "jitter": 0, "elastic": 0, "width": 0}
+
+def _pairwise(points):
+    return np.linalg.norm(points[:, None] - points[None], axis=2)
+
+def test_pad_and_unpad_round_trip():
+    points, mask = pad_medians(GLYPHS)
+    assert points.shape == (2, 2, 4, 2) and mask.sum() == 9
+    nested = unpad(points[:, None], mask)
+    for glyph, (sample,) in zip(GLYPHS, nested):
+        assert len(glyph) == len(sample)
+        for a, b in zip(glyph, sample):
+            np.testing.assert_array_equal(a, b)
+
+def test_zero_strength_is_identity():
+    points, mask = pad_medians(GLYPHS)
+    variants, widths = augment_medians(points, mask, 3, seed=0, **STILL)
+    np.testing.assert_allclose(variants, np.broadcast_to(points[:, None], variants.shape), atol=1e-9)
+    np.testing.assert_allclose(widths, 1.0)
+
+def test_rotation_alone_is_rigid():
+    points, mask = pad_medians(GLYPHS)
+    variants, _ = augment_medians(points, mask, 4, seed=1, **{**STILL, "rotate": 30})
+    for c in range(len(GLYPHS)):
+        ref = points[c][mask[c]]
+        for k in range(4):
+            out = variants[c, k][mask[c]]
+            np.testing.assert_allclose(_pairwise(out), _pairwise(ref), atol=1e-6)
+            assert not np.allclose(out, ref)
+
+def test_seeded_and_padding_stays_zero():
+    points, mask = pad_medians(GLYPHS)
+    a, wa = augment_medians(points, mask, 5, seed=7)
+    b, wb = augment_medians(points, mask, 5, seed=7)
+    np.testing.assert_array_equal(a, b)
+    np.testing.assert_array_equal(wa, wb)
+    assert not a[~np.broadcast_to(mask[:, None], a.shape[:4])].any()
+    samples = augment_glyphs(GLYPHS, 2, seed=7)
+    assert [len(s) for s in samples] == [2, 2]
+    strokes, widths = samples[1][0]
+    assert len(strokes) == 1 and strokes[0].shape == (4, 2) and widths.shape == (1,)
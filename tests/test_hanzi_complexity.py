@@ -0,0 +1,52 @@
+import json
+import math
+
+import numpy as np
+
+from hanzi_complexity import TURN_BINS, build_feature_index, glyph_features, select_characters
+
+GLYPHS = {
+    "一": [[[100, 500], [900, 500]]],
+    "二": [[[200, 700], [800, 700]], [[100, 300], [900, 300]]],
+    "人": [[[500, 900], [450, 500], [150, 100]], [[480, 450], [850, 100]]],
+    "口": [[[200, 800], [200, 200]], [[200, 800], [800, 800], [800, 200]], [[200, 200], [800, 200]]],
+}
+
+def _reference(glyph):
+    length, turning, hist = 0.0, 0.0, [0] * TURN_BINS
+    for stroke in glyph:
+        for a, b in zip(stroke, stroke[1:]):
+            length += math.dist(a, b)
+        for a, b, c in zip(stroke, stroke[1:], stroke[2:]):
+            h1 = math.atan2(b[1] - a[1], b[0] - a[0])
+            h2 = math.atan2(c[1] - b[1], c[0] - b[0])
+            turn = abs((h2 - h1 + math.pi) % (2 * math.pi) - math.pi)
+            turning += math.degrees(turn)
+            hist[min(int(turn / math.pi * TURN_BINS), TURN_BINS - 1)] += 1
+    xs = [p[0] for s in glyph for p in s]
+    ys = [p[1] for s in glyph for p in s]
+    return len(glyph), length, (min(xs), min(ys), max(xs), max(ys)), turning, hist
+
+def test_features_match_per_glyph_loop():
+    glyphs = [[np.array(s, dtype=float) for s in g] for g in GLYPHS.values()]
+    feats = glyph_features(glyphs)
+    for i, glyph in enumerate(GLYPHS.values()):
+        strokes, length, box, turning, hist = _reference(glyph)
+        assert feats["strokes"][i] == strokes
+        assert np.isclose(feats["median_length"][i], length)
+        assert np.allclose([feats[k][i] for k in ("x0", "y0", "x1", "y1")], box)
+        assert np.isclose(feats["turning"][i], turning)
+        assert feats["turn_hist"][i].tolist() == hist
+
+def test_select_characters_filters_and_orders(tmp_path):
+    graphics = tmp_path / "graphics.txt"
+    with open(graphics, "w", encoding="utf-8") as f:
+        for char, medians in GLYPHS.items():
+            f.write(json.dumps({"character": char, "strokes": [], "medians": medians}, ensure_ascii=False) + "\n")
+    catalog = str(tmp_path / "catalog.sqlite")
+    assert build_feature_index(str(graphics), catalog) == 4
+    assert select_characters(catalog) == ["一", "二", "人", "口"]
+    assert select_characters(catalog, level=1) == ["一", "二", "人", "口"]
+    assert select_characters(catalog, min_strokes=2, max_strokes=2) == ["二", "人"]
+    assert select_characters(catalog, max_turning=10) == ["一", "二"]
+    assert select_characters(catalog, level=2, limit=1) == ["二"]
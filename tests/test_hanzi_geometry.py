@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from hanzi_geometry import CharacterGeometryCache, parse_path, path_polygons
+
+def _de_casteljau(ctrl, t):
+    pts = np.repeat(ctrl[None], len(t), axis=0)
+    while pts.shape[1] > 1:
+        pts = (1 - t)[:, None, None] * pts[:, :-1] + t[:, None, None] * pts[:, 1:]
+    return pts[:, 0]
+
+def _distance_to_polygon(points, poly):
+    a, b = poly[:-1], poly[1:]
+    ab = b - a
+    t = np.clip(((points[:, None] - a) * ab).sum(axis=2) / np.maximum((ab ** 2).sum(axis=1), 1e-12), 0, 1)
+    return np.linalg.norm(points[:, None] - (a + t[..., None] * ab), axis=2).min(axis=1)
+
+PATH = "M 100 100 Q 500 900 900 100 C 950 300 700 600 400 500 L 100 100 Z"
+
+def test_relative_commands_resolve_to_absolute():
+    absolute = parse_path("M 10 20 L 30 40 Q 50 60 70 80 Z")
+    relative = parse_path("m 10 20 l 20 20 q 20 20 40 40 z")
+    assert [k for k, _ in absolute[0]] == [k for k, _ in relative[0]] == ["L", "Q", "L"]
+    for (_, a), (_, b) in zip(absolute[0], relative[0]):
+        np.testing.assert_allclose(a, b)
+
+@pytest.mark.parametrize("tolerance", [0.5, 2.0, 8.0])
+def test_flattening_stays_within_tolerance(tolerance):
+    (poly,) = path_polygons(PATH, tolerance)
+    t = np.linspace(0, 1, 400)
+    for kind, ctrl in parse_path(PATH)[0]:
+        curve = _de_casteljau(ctrl, t)
+        assert _distance_to_polygon(curve, poly).max() <= tolerance
+    # A looser tolerance never needs more points
+    assert len(poly) <= len(path_polygons(PATH, tolerance / 4)[0])
+
+def test_cache_round_trips_through_disk(tmp_path):
+    data = {"口": {"medians": [[[100, 100], [100, 900]], [[100, 900], [900, 900], [900, 100]]],
+                   "strokes": [PATH, "M 0 0 L 10 0 L 10 10 Z"]}}
+    first = CharacterGeometryCache(data, cache_dir=str(tmp_path))
+    outlines, medians = first.outlines("口"), first.medians("口")
+    assert first.outlines("口") is outlines and first.stats()["hits"] == 1
+    np.testing.assert_allclose(medians[0], [[-412, -412], [-412, 388]])
+
+    second = CharacterGeometryCache(data, cache_dir=str(tmp_path))
+    assert [len(s) for s in second.outlines("口")] == [len(s) for s in outlines]
+    for a, b in zip(second.outlines("口"), outlines):
+        for pa, pb in zip(a, b):
+            np.testing.assert_array_equal(pa, pb)
+    assert second.stats()["disk_hits"] == 1
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from hanzi_augment import pad_medians
+from hanzi_tensors import resample_medians
+
+def _glyphs(seed=0):
+    rng = np.random.default_rng(seed)
+    return [[rng.uniform(0, 1024, (rng.integers(2, 12), 2)) for _ in range(rng.integers(1, 6))]
+            for _ in range(8)]
+
+def _arc(stroke):
+    return np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(stroke, axis=0).T))))
+
+def _interp(stroke, s):
+    cum = _arc(stroke)
+    return np.stack([np.interp(s, cum, stroke[:, 0]), np.interp(s, cum, stroke[:, 1])], axis=1)
+
+def test_count_matches_np_interp():
+    glyphs = _glyphs()
+    out, mask = resample_medians(*pad_medians(glyphs), count=17)
+    assert out.shape[2] == 17
+    for c, glyph in enumerate(glyphs):
+        for s, stroke in enumerate(glyph):
+            expected = _interp(stroke, np.linspace(0, _arc(stroke)[-1], 17))
+            np.testing.assert_allclose(out[c, s], expected, atol=1e-6)
+            assert mask[c, s].all()
+        assert not mask[c, len(glyph):].any()
+        assert not out[c, len(glyph):].any()
+
+def test_spacing_matches_np_interp():
+    glyphs = _glyphs(1)
+    spacing = 40.0
+    out, mask = resample_medians(*pad_medians(glyphs), spacing=spacing)
+    for c, glyph in enumerate(glyphs):
+        for s, stroke in enumerate(glyph):
+            total = _arc(stroke)[-1]
+            steps = int(np.ceil(total / spacing)) + 1
+            expected = _interp(stroke, np.minimum(np.arange(steps) * spacing, total))
+            assert mask[c, s].sum() == steps
+            np.testing.assert_allclose(out[c, s, :steps], expected, atol=1e-6)
+            np.testing.assert_allclose(out[c, s, -1 if steps == out.shape[2] else steps - 1], stroke[-1], atol=1e-6)
+
+def test_single_point_stroke_repeats_the_point():
+    out, mask = resample_medians(*pad_medians([[np.array([[3.0, 4.0]]), np.array([[0.0, 0.0], [10.0, 0.0]])]]),
+                                 count=5)
+    np.testing.assert_allclose(out[0, 0], [[3.0, 4.0]] * 5)
+    np.testing.assert_allclose(out[0, 1, :, 0], [0, 2.5, 5, 7.5, 10])
+
+def test_needs_exactly_one_of_count_or_spacing():
+    points, mask = pad_medians(_glyphs())
+    with pytest.raises(ValueError):
+        resample_medians(points, mask)
+    with pytest.raises(ValueError):
+        resample_medians(points, mask, count=4, spacing=10)
@@ -0,0 +1,66 @@
+import random
+
+from PIL import Image, ImageDraw
+
+from perceptual_hash import BKTree, Deduper, hamming, sample_hash, split_hash
+
+def _circle(color, r, cx=300, cy=300):
+    image = Image.new("RGB", (600, 600), "white")
+    ImageDraw.Draw(image).ellipse((cx - r, cy - r, cx + r, cy + r), outline=color, width=4)
+    return image
+
+def test_bktree_nearest_matches_brute_force():
+    rng = random.Random(0)
+    hashes = [rng.getrandbits(64) for _ in range(300)]
+    # Near copies so some queries land within small radii
+    hashes += [h ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)) for h in hashes[:100]]
+    tree = BKTree()
+    for i, h in enumerate(hashes):
+        tree.add(h, i)
+    assert len(tree) == len(hashes)
+    queries = [h ^ (1 << rng.randrange(64)) for h in hashes[::7]] + [rng.getrandbits(64) for _ in range(50)]
+    for q in queries:
+        for radius in (0, 2, 4, 8, 24):
+            best = min(hamming(q, h) for h in hashes)
+            match = tree.nearest(q, radius)
+            if best > radius:
+                assert match is None
+            else:
+                key, dist = match
+                assert dist == best == hamming(q, hashes[key])
+
+def test_sample_hash_layout():
+    key = sample_hash(_circle("red", 100))
+    colors, full, shape = split_hash(key)
+    assert colors and full and shape
+    assert sample_hash(_circle("red", 100)) == key
+
+def test_colors_are_never_matched():
+    dedupe = Deduper(radius=8)
+    entries = [{"id": f"{color}.png", "phash": sample_hash(_circle(color, 100))}
+               for color in ("red", "blue", "green")]
+    assert dedupe.resolve(entries) == entries
+    assert not dedupe.duplicates
+
+def test_invariant_families_ignore_position():
+    moved = [_circle("red", 100), _circle("red", 100, 150, 420)]
+    donuts = [{"id": f"donut_{i}.png", "params": {"type": "donut"}, "phash": sample_hash(im)}
+              for i, im in enumerate(moved)]
+    polys = [{"id": f"poly_{i}.png", "params": {"type": "poly"}, "phash": sample_hash(im)}
+             for i, im in enumerate(moved)]
+    flagged = Deduper(radius=4).resolve(donuts)
+    assert flagged[1]["duplicate_of"] == "donut_0.png"
+    assert "duplicate_of" not in Deduper(radius=4).resolve(polys)[1]
+    # Outside the invariant list, a donut compares whole canvases too
+    assert "duplicate_of" not in Deduper(radius=4, invariant=()).resolve(donuts)[1]
+
+def test_reject_deletes_the_duplicate_png(tmp_path):
+    entries = []
+    for i in range(2):
+        image = _circle("red", 100)
+        image.save(tmp_path / f"c_{i}.png")
+        entries.append({"id": f"c_{i}.png", "phash": sample_hash(image)})
+    entries.append({"id": "meta.png", "phash": None})
+    kept = Deduper(mode="reject").resolve(entries, str(tmp_path))
+    assert [e["id"] for e in kept] == ["c_0.png", "meta.png"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["c_0.png"]
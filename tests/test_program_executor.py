@@ -0,0 +1,36 @@
+import pytest
+
+from program_executor import UnsafeProgram, check_program, run_program
+
+@pytest.mark.parametrize("source", [
+    "import os",
+    "from os import path",
+    "x = ().__class__",
+    "f = lambda: 0\ng = f.__globals__",
+    "def g():\n    yield 1\nframe = g().gi_frame",
+    "'{0.__class__}'.format(1)",
+    "t.forward = None",
+    "try:\n    pass\nexcept:\n    pass",
+    "for i in range(3):\n    try:\n        pass\n    finally:\n        break",
+    "__builtins__",
+])
+def test_escapes_are_rejected(source):
+    with pytest.raises(UnsafeProgram):
+        check_program(source)
+
+def test_run_program_statuses():
+    square = "def draw(t):\n    for _ in range(4):\n        t.forward(50)\n        t.left(90)\n"
+    status, error, t = run_program(square, api={})
+    assert (status, error) == ("ok", None)
+    assert len(t.strokes()[0]) == 5
+
+    assert run_program("import os", api={})[0] == "rejected"
+    assert run_program("def draw(t) pass", api={})[0] == "error"
+    assert run_program("def draw(t):\n    open('x')", api={})[0] == "error"
+    assert run_program("def draw(t):\n    while True:\n        t.forward(1)", max_steps=100, api={})[0] == "step_limit"
+
+def test_seeded_random_is_reproducible():
+    source = "def draw(t):\n    t.forward(random.uniform(0, 100))"
+    first = run_program(source, seed=3, api={})[2].strokes()
+    assert first == run_program(source, seed=3, api={})[2].strokes()
+    assert first != run_program(source, seed=4, api={})[2].strokes()
@@ -0,0 +1,46 @@
+import multiprocessing as mp
+
+import numpy as np
+from PIL import Image
+
+import render_pipeline
+from render_pipeline import FrameRing, RasterCanvas, prefetch_samples, save_frames
+
+def test_raster_canvas_uses_turtle_coordinates():
+    canvas = RasterCanvas((200, 100))
+    canvas.dot((50, 25), 10, "red")
+    canvas.polyline([(-100, -40), (100, -40)], 1, "blue")
+    pixels = np.asarray(canvas.snapshot())
+    assert tuple(pixels[25, 150, :3]) == (255, 0, 0)       # (50, 25) -> column 150, row 25
+    assert tuple(pixels[90, 100, :3]) == (0, 0, 255)       # y = -40 -> row 90
+    assert tuple(pixels[50, 100, :3]) == (255, 255, 255)
+
+def test_save_frames_formats(tmp_path):
+    frames = [Image.new("RGBA", (20, 20), color) for color in ("white", "red", "blue")]
+    paths = save_frames(frames, str(tmp_path / "a.png"))
+    assert [p.rsplit("/", 1)[1] for p in paths] == ["a_01.png", "a_02.png", "a_03.png"]
+    (gif,) = save_frames(frames, str(tmp_path / "a.gif"), "gif")
+    with Image.open(gif) as image:
+        assert image.n_frames == 3
+    assert save_frames([], str(tmp_path / "b.gif"), "gif") == []
+
+def test_frame_ring_round_trip():
+    ring = FrameRing(mp.get_context("spawn"), 2, (4, 5, 4))
+    try:
+        frames = [np.random.default_rng(i).integers(0, 256, (6, 5, 4), dtype=np.uint8) for i in range(2)]
+        stored = [ring.store(frame) for frame in frames]
+        for (slot, shape), frame in zip(stored, frames):
+            assert shape == (4, 5, 4)
+            np.testing.assert_array_equal(ring.view(slot, shape), frame[:4])
+        ring.release(stored[0][0])
+        assert ring.store(frames[1])[0] == stored[0][0]
+    finally:
+        ring.close(unlink=True)
+
+def test_prefetch_keeps_sample_order(monkeypatch):
+    # Rasterizing needs ghostscript; here a "postscript" string is just a gray level
+    monkeypatch.setattr(render_pipeline, "postscript_to_image", lambda ps: Image.new("L", (2, 2), int(ps)))
+    levels = iter(range(0, 250, 10))
+    samples = list(prefetch_samples(lambda: (str(next(levels)), {"n": 1}), 20, prefetch=3, workers=2))
+    assert [int(image[0, 0]) for image, _ in samples] == list(range(0, 200, 10))
+    assert all(meta == {"n": 1} for _, meta in samples)
@@ -0,0 +1,57 @@
+import numpy as np
+from PIL import ImageColor
+
+from palette import COLORS
+from scoring import color_iou, foreground, mask_scores, ssim
+
+def test_mask_scores_match_set_arithmetic():
+    rng = np.random.default_rng(0)
+    cand, ref = rng.random((2, 5, 20, 20)) < 0.3
+    cand[0] = ref[0] = False
+    scores = mask_scores(cand, ref)
+    for n in range(1, 5):
+        c, r = set(zip(*np.nonzero(cand[n]))), set(zip(*np.nonzero(ref[n])))
+        assert np.isclose(scores["iou"][n], len(c & r) / len(c | r))
+        assert np.isclose(scores["precision"][n], len(c & r) / len(c))
+        assert np.isclose(scores["recall"][n], len(c & r) / len(r))
+    assert all(np.isnan(v[0]) for v in scores.values())
+
+def _paint(labels):
+    # Palette index + 1 per pixel, 0 for white
+    rgb = np.array([(255, 255, 255)] + [ImageColor.getrgb(c) for c in COLORS], dtype=np.uint8)
+    return rgb[labels]
+
+def test_color_iou_matches_per_color_loop():
+    rng = np.random.default_rng(1)
+    labels = rng.choice(4, size=(2, 3, 16, 16), p=[0.7, 0.1, 0.1, 0.1]) * rng.integers(1, 4, (2, 3, 1, 1))
+    cand, ref = _paint(labels[0]), _paint(labels[1])
+    assert (foreground(cand) == (labels[0] > 0)).all()
+    out = color_iou(cand, ref)
+    for n in range(3):
+        for color in range(len(COLORS)):
+            c, r = labels[0, n] == color + 1, labels[1, n] == color + 1
+            union = (c | r).sum()
+            expected = (c & r).sum() / union if union else np.nan
+            np.testing.assert_equal(out[n, color], expected)
+
+def _ssim_reference(a, b, window):
+    x = a @ np.array([0.299, 0.587, 0.114])
+    y = b @ np.array([0.299, 0.587, 0.114])
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    values = []
+    for i in range(x.shape[0] - window + 1):
+        for j in range(x.shape[1] - window + 1):
+            px, py = x[i:i + window, j:j + window], y[i:i + window, j:j + window]
+            mx, my = px.mean(), py.mean()
+            vx, vy = px.var(), py.var()
+            cov = ((px - mx) * (py - my)).mean()
+            values.append(((2 * mx * my + c1) * (2 * cov + c2)) / ((mx ** 2 + my ** 2 + c1) * (vx + vy + c2)))
+    return np.mean(values)
+
+def test_ssim_matches_windowed_reference():
+    rng = np.random.default_rng(2)
+    a = rng.integers(0, 256, (2, 24, 24, 3), dtype=np.uint8)
+    b = np.clip(a.astype(int) + rng.integers(-40, 40, a.shape), 0, 255).astype(np.uint8)
+    np.testing.assert_allclose(ssim(a, a), 1.0)
+    expected = [_ssim_reference(a[n].astype(float), b[n].astype(float), 7) for n in range(2)]
+    np.testing.assert_allclose(ssim(a, b), expected, rtol=1e-4)
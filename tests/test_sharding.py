@@ -0,0 +1,52 @@
+import json
+import os
+
+import pytest
+
+from generation_plan import compile_plan
+from sharding import merge_shards, select_jobs, shard_dir, shard_of, task_seed, write_manifest
+
+def test_shard_of_is_stable_and_in_range():
+    ids = [f"poly_{i}.png" for i in range(200)]
+    shards = [shard_of(i, 4) for i in ids]
+    assert shards == [shard_of(i, 4) for i in ids]
+    assert set(shards) == {0, 1, 2, 3}
+    assert all(shard_of(i, 1) == 0 for i in ids)
+    assert task_seed(1, "a") == task_seed(1, "a") != task_seed(2, "a")
+
+def test_select_jobs_partitions_and_keeps_plan_positions():
+    plan = {"families": [{"family": "poly", "count": 30, "params": {"n": {"choice": [3, 8]}}}]}
+    jobs = compile_plan(plan, {"poly": {"prefix": "poly", "cost": lambda p: p["n"]}}, seed=1)
+    seen = {}
+    for shard in range(3):
+        owned, positions = select_jobs(jobs, shard, 3)
+        assert all(shard_of(job.id, 3) == shard for job in owned)
+        seen.update(positions)
+    assert seen == {job.id: job.index for job in jobs}
+
+def _write_partition(out_dir, shard, num_shards, entries, positions):
+    part = shard_dir(out_dir, shard, num_shards)
+    os.makedirs(part)
+    for entry in entries:
+        open(os.path.join(part, entry["id"]), "wb").close()
+    with open(os.path.join(part, "metadata.json"), "w", encoding="utf-8") as f:
+        json.dump(entries, f)
+    write_manifest(part, shard, num_shards, 7, "metadata.json", positions)
+
+def test_merge_restores_single_node_order(tmp_path):
+    ids = [f"task_{i}.png" for i in range(20)]
+    single = [{"id": task_id, "n": i} for i, task_id in enumerate(ids)]
+    for shard in range(3):
+        entries = [e for e in single if shard_of(e["id"], 3) == shard]
+        _write_partition(str(tmp_path), shard, 3, entries, {e["id"]: e["n"] for e in entries})
+
+    path = merge_shards(str(tmp_path), 3, catalog="")
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == single
+    assert sorted(p for p in os.listdir(tmp_path) if p.endswith(".png")) == sorted(ids)
+    assert not os.path.exists(tmp_path / "shards")
+
+def test_merge_needs_every_shard(tmp_path):
+    _write_partition(str(tmp_path), 0, 2, [], {})
+    with pytest.raises(FileNotFoundError):
+        merge_shards(str(tmp_path), 2, catalog="")
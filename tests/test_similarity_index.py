@@ -0,0 +1,62 @@
+import json
+import os
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from similarity_index import SimilarityIndex, build_index, index_paths
+
+def _write_index(metadata_path, vectors):
+    array_path, info_path = index_paths(metadata_path)
+    os.makedirs(os.path.dirname(array_path))
+    np.save(array_path, vectors)
+    ids = [f"t_{i}.png" for i in range(len(vectors))]
+    with open(info_path, "w", encoding="utf-8") as f:
+        json.dump({"grid": 4, "size": None, "ids": ids, "stamps": [[0, 0]] * len(ids)}, f)
+
+def test_query_matches_brute_force_knn(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(500, 12)).astype(np.float32)
+    metadata = str(tmp_path / "tasks.json")
+    _write_index(metadata, vectors)
+    index = SimilarityIndex(metadata)
+
+    queries = rng.normal(size=(20, 12)).astype(np.float32)
+    full = np.linalg.norm(queries[:, None].astype(np.float64) - vectors[None], axis=2)
+    for block in (64, 65536):
+        rows, dist = index.query(queries, k=7, block=block)
+        np.testing.assert_array_equal(rows, np.argsort(full, axis=1)[:, :7])
+        np.testing.assert_allclose(dist, np.sort(full, axis=1)[:, :7], rtol=1e-4, atol=1e-4)
+
+def test_neighbors_leave_out_the_query(tmp_path):
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(100, 8)).astype(np.float32)
+    metadata = str(tmp_path / "tasks.json")
+    _write_index(metadata, vectors)
+    index = SimilarityIndex(metadata)
+
+    rows = np.array([0, 42, 99])
+    found, _ = index.query(vectors[rows], k=3, exclude=rows, block=32)
+    full = np.linalg.norm(vectors[rows][:, None] - vectors[None], axis=2)
+    full[np.arange(3), rows] = np.inf
+    np.testing.assert_array_equal(found, np.argsort(full, axis=1)[:, :3])
+    assert [hit[0] for hit in index.neighbors(["t_0.png"], k=1)[0]] == [f"t_{found[0, 0]}.png"]
+
+def test_build_index_redescribes_only_changed_images(tmp_path):
+    entries = []
+    for i, color in enumerate(("red", "blue", "green")):
+        image = Image.new("RGB", (64, 64), "white")
+        ImageDraw.Draw(image).rectangle((8 * i, 8, 8 * i + 20, 40), fill=color)
+        image.save(tmp_path / f"t_{i}.png")
+        entries.append({"id": f"t_{i}.png"})
+    metadata = str(tmp_path / "tasks.json")
+    with open(metadata, "w", encoding="utf-8") as f:
+        json.dump(entries, f)
+
+    assert build_index(metadata, grid=4, workers=1) == (3, 3)
+    assert build_index(metadata, grid=4, workers=1) == (3, 0)
+    index = SimilarityIndex(metadata)
+    assert index.ids == ["t_0.png", "t_1.png", "t_2.png"]
+    # An image's own descriptor finds it first
+    found, dist = index.query(index.vectors, k=1)
+    assert found[:, 0].tolist() == [0, 1, 2] and np.allclose(dist, 0, atol=1e-3)
@@ -0,0 +1,72 @@
+import math
+import random
+
+from solution_memory import SolutionMemory, record_tokens
+
+SHAPES = ("circle", "star", "square", "triangle", "hexagon")
+COLORS = ("red", "blue", "green", "gold")
+
+def _memory(path, n=60, seed=0):
+    rng = random.Random(seed)
+    memory = SolutionMemory(str(path))
+    for i in range(n):
+        shape, color = rng.choice(SHAPES), rng.choice(COLORS)
+        memory.add(shape, {"color": color, "x": i}, program=f"# {i}",
+                   prompt=f"Draw a {color} {shape}", task_id=f"{shape}_{i}.png")
+    return memory
+
+def _brute_force(memory, query, k):
+    records = [memory.get(n) for n in range(len(memory))]
+    tokens = [record_tokens(r) for r in records]
+    df = {t: sum(t in ts for ts in tokens) for t in query}
+    scores = {n: sum(math.log(1 + len(records) / df[t]) for t in query & ts if df[t])
+              for n, ts in enumerate(tokens)}
+    ranked = sorted((n for n in scores if scores[n] > 0), key=lambda n: (-scores[n], -n))
+    return ranked[:k]
+
+def test_rare_terms_rank_like_brute_force(tmp_path):
+    memory = _memory(tmp_path / "log.jsonl")
+    for prompt in ("Draw a red star", "a gold hexagon", "blue"):
+        # "draw" and "a" are in every record, so skipping them cannot change the ranking
+        query = record_tokens({"prompt": prompt}) - {"family:None"}
+        got = [r["task_id"] for r in memory.lookup(prompt, k=4)]
+        assert got == [memory.get(n)["task_id"] for n in _brute_force(memory, query, 4)]
+
+def test_more_specific_queries_never_return_fewer(tmp_path):
+    memory = _memory(tmp_path / "log.jsonl", n=20)
+    for shape in SHAPES:
+        for k in (1, 5, 20):
+            broad = memory.lookup(f"Draw a {shape}", k=k)
+            narrow = memory.lookup(f"Draw a red {shape}", k=k)
+            assert len(narrow) >= len(broad)
+
+def test_exact_matches_come_first_and_include_position(tmp_path):
+    memory = _memory(tmp_path / "log.jsonl")
+    target = memory.get(7)
+    hits = memory.lookup(target["prompt"], target["family"], target["params"], k=3)
+    assert hits[0]["task_id"] == target["task_id"]
+    moved = dict(target["params"], x=-1)
+    assert memory.exact(target["family"], target["params"])[0]["task_id"] == target["task_id"]
+    assert memory.exact(target["family"], moved) == []
+
+def test_other_writers_and_torn_lines(tmp_path):
+    path = tmp_path / "log.jsonl"
+    first = _memory(path, n=3)
+    second = SolutionMemory(str(path))
+    assert len(second) == 3
+    first.add("star", {"color": "red"}, prompt="Draw a red star")
+    assert second.refresh() == 1
+
+    # A writer that died mid-line leaves an unterminated tail
+    with open(path, "ab") as f:
+        f.write(b'{"family": "sta')
+    assert second.refresh() == 0
+    n = second.add("circle", {"color": "blue"}, prompt="Draw a blue circle")
+    assert SolutionMemory(str(path)).get(n)["family"] == "circle"
+    assert len(SolutionMemory(str(path))) == 5
+
+    # An older version appended straight after the torn tail: that line is skipped
+    with open(path, "ab") as f:
+        f.write(b'{"family": "sta{"family": "square", "params": {}}\n')
+    second.add("square", {"color": "gold"}, prompt="Draw a gold square")
+    assert len(SolutionMemory(str(path))) == 6
@@ -0,0 +1,79 @@
+import itertools
+
+import numpy as np
+
+from stroke_order import assign, dtw, inversions, stroke_order_scores, to_reference_frame
+
+def _dtw_reference(cost):
+    P, Q = cost.shape
+    D = np.full((P + 1, Q + 1), np.inf)
+    D[0, 0] = 0.0
+    for i in range(1, P + 1):
+        for j in range(1, Q + 1):
+            D[i, j] = cost[i - 1, j - 1] + min(D[i - 1, j], D[i, j - 1], D[i - 1, j - 1])
+    return D[P, Q]
+
+def _assign_reference(cost):
+    n, m = cost.shape
+    if n <= m:
+        return min(sum(cost[i, p[i]] for i in range(n)) for p in itertools.permutations(range(m), n))
+    return _assign_reference(cost.T)
+
+def test_dtw_matches_dynamic_programming():
+    rng = np.random.default_rng(0)
+    for P, Q in ((1, 1), (1, 5), (4, 4), (7, 3), (6, 9)):
+        cost = rng.uniform(0, 10, (5, P, Q))
+        np.testing.assert_allclose(dtw(cost), [_dtw_reference(c) for c in cost], rtol=1e-12)
+
+def test_assign_matches_brute_force():
+    rng = np.random.default_rng(1)
+    for n, m in ((1, 1), (3, 3), (5, 5), (2, 5), (6, 3)):
+        for _ in range(5):
+            cost = rng.uniform(0, 10, (n, m))
+            rows, cols = assign(cost)
+            assert len(rows) == min(n, m)
+            assert len(set(rows)) == len(rows) and len(set(cols)) == len(cols)
+            assert list(rows) == sorted(rows)
+            np.testing.assert_allclose(cost[rows, cols].sum(), _assign_reference(cost))
+
+def test_inversions_counts_out_of_order_pairs():
+    rng = np.random.default_rng(2)
+    for _ in range(10):
+        seq = rng.permutation(8)
+        expected = sum(seq[i] > seq[j] for i in range(8) for j in range(i + 1, 8))
+        assert inversions(seq) == expected
+
+def _reference():
+    return [np.array([[100.0, 800.0], [900.0, 800.0]]),
+            np.array([[500.0, 900.0], [500.0, 100.0]]),
+            np.array([[200.0, 400.0], [800.0, 400.0]])]
+
+def test_scores_a_correct_glyph_as_perfect():
+    ref = _reference()
+    (result,) = stroke_order_scores([to_reference_frame(ref, ref)], [ref])
+    assert result["order_errors"] == 0 and result["reversed"] == 0
+    assert result["missing"] == 0 and result["extra"] == 0
+    assert result["deviation"] < 1e-3
+
+def test_detects_order_errors_and_reversals():
+    ref = _reference()
+    # Drawn in the order 3, 1, 2 with the vertical stroke reversed: 2 inversions
+    cand = [ref[2], ref[0], ref[1][::-1]]
+    (result,) = stroke_order_scores([cand], [ref])
+    assert [s["reference"] for s in result["per_stroke"]] == [2, 0, 1]
+    assert result["order_errors"] == inversions([2, 0, 1]) == 2
+    assert result["reversed"] == 1
+    assert result["missing"] == 0
+
+def test_missing_strokes_are_counted():
+    ref = _reference()
+    (result,) = stroke_order_scores([ref[:2]], [ref])
+    assert result["missing"] == 1 and result["extra"] == 0
+
+def test_extra_strokes_keep_drawing_order():
+    ref = _reference()
+    # A stray stroke drawn first, then the glyph in order: no order errors
+    stray = np.array([[450.0, 450.0], [470.0, 470.0]])
+    (result,) = stroke_order_scores([[stray] + ref], [ref])
+    assert result["extra"] == 1 and result["missing"] == 0
+    assert result["order_errors"] == 0
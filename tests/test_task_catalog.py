@@ -0,0 +1,51 @@
+import random
+
+from task_catalog import open_catalog, query, write_catalog
+
+def _tasks(n=50, seed=0):
+    rng = random.Random(seed)
+    return [{"id": f"t_{i}.png", "level": rng.choice([1, 2, 3]), "prompt": f"task {i}",
+             "params": {"type": rng.choice(["poly", "star"]), "size": rng.uniform(10, 100),
+                        "x": rng.uniform(-250, 250), "y": rng.uniform(-250, 250)}} for i in range(n)]
+
+def test_query_matches_python_filters(tmp_path):
+    catalog = str(tmp_path / "catalog.sqlite")
+    tasks = _tasks()
+    assert write_catalog(tasks, str(tmp_path / "tasks.json"), catalog) == len(tasks)
+    cases = [
+        ({"level": 2}, lambda t: t["level"] == 2),
+        ({"family": "star", "min_size": 50}, lambda t: t["params"]["type"] == "star" and t["params"]["size"] >= 50),
+        ({"min_x": 0, "max_y": -100}, lambda t: t["params"]["x"] >= 0 and t["params"]["y"] <= -100),
+        ({"min_x": -50, "max_x": 50, "min_y": -50, "max_y": 50},
+         lambda t: -50 <= t["params"]["x"] <= 50 and -50 <= t["params"]["y"] <= 50),
+    ]
+    for filters, keep in cases:
+        rows = query(catalog, dataset="tasks", **filters)
+        assert [r["id"] for r in rows] == [t["id"] for t in tasks if keep(t)]
+    assert query(catalog, limit=3)[0]["params"] == tasks[0]["params"]
+    assert len(query(catalog, limit=3)) == 3
+
+def test_rewriting_a_dataset_replaces_its_rows(tmp_path):
+    catalog = str(tmp_path / "catalog.sqlite")
+    write_catalog(_tasks(10), str(tmp_path / "tasks.json"), catalog)
+    write_catalog(_tasks(4, seed=1), str(tmp_path / "tasks.json"), catalog)
+    write_catalog(_tasks(3), str(tmp_path / "other" / "strokes.json"), catalog)
+    assert len(query(catalog, dataset="tasks")) == 4
+    assert len(query(catalog)) == 7
+
+def test_characters_schema_and_indexes(tmp_path):
+    catalog = str(tmp_path / "catalog.sqlite")
+    metadata = {"level": 3, "total_images": 2, "characters": [
+        {"index": 1, "character": "人", "pinyin": "rén", "meaning": "person", "description": "",
+         "prompt": "Write 人", "samples": [{"filename": "01_人_1.png", "offset_x": -20, "offset_y": 10, "scale": 0.5},
+                                           {"filename": "01_人_2.png", "offset_x": 30, "offset_y": 0, "scale": 0.6}]}]}
+    write_catalog(metadata, str(tmp_path / "characters_L3.json"), catalog)
+    rows = query(catalog, character="人", min_x=0)
+    assert [(r["id"], r["level"], r["x"], r["scale"]) for r in rows] == [("01_人_2.png", 3, 30, 0.6)]
+
+    conn = open_catalog(catalog)
+    try:
+        plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN SELECT * FROM tasks WHERE y <= ?", (0,)))
+    finally:
+        conn.close()
+    assert "idx_tasks_y" in plan
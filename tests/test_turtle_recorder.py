@@ -0,0 +1,56 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from turtle_recorder import RecordingTurtle, StepLimitExceeded, record, sample_offset
+
+def _polygon(t, sides, length):
+    for _ in range(sides):
+        t.forward(length)
+        t.left(360 / sides)
+
+def test_polygon_vertices_match_trigonometry():
+    t = record(_polygon, 5, 100)
+    (line,) = t.strokes()
+    expected, x, y = [(0.0, 0.0)], 0.0, 0.0
+    for k in range(5):
+        x += 100 * math.cos(math.radians(72 * k))
+        y += 100 * math.sin(math.radians(72 * k))
+        expected.append((x, y))
+    np.testing.assert_allclose(line, expected, atol=1e-9)
+
+def test_bbox_includes_pen_width_and_dots():
+    t = RecordingTurtle()
+    t.pensize(10)
+    t.forward(100)
+    t.penup()
+    t.goto(0, 200)
+    t.dot(30, "red")
+    assert t.bbox() == pytest.approx((-15, -5, 105, 215))
+    assert RecordingTurtle().bbox() is None
+
+def test_fills_and_step_limit():
+    t = RecordingTurtle()
+    t.fillcolor("gold")
+    t.begin_fill()
+    _polygon(t, 4, 50)
+    t.end_fill()
+    fill = [item for item in t.items if item[0] == "fill"]
+    assert len(fill) == 1 and fill[0][2] == "gold"
+    assert "<polygon" in t.to_svg()
+    with pytest.raises(StepLimitExceeded):
+        _polygon(RecordingTurtle(max_steps=5), 4, 10)
+
+def test_sample_offset_keeps_the_drawing_on_the_canvas():
+    rng = random.Random(0)
+    for _ in range(200):
+        x0, y0 = rng.uniform(-300, 300), rng.uniform(-300, 300)
+        box = (x0, y0, x0 + rng.uniform(0, 500), y0 + rng.uniform(0, 500))
+        dx, dy = sample_offset(box, 600, 400, rng) or (None, None)
+        if box[2] - box[0] > 600 or box[3] - box[1] > 400:
+            assert dx is None
+        else:
+            assert -300 <= box[0] + dx and box[2] + dx <= 300
+            assert -200 <= box[1] + dy and box[3] + dy <= 200
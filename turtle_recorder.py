@@ -0,0 +1,225 @@
+"""Tk-free turtle that records what a drawing function does.
+
+RecordingTurtle reuses turtle's own TNavigator/TPen, so forward, circle,
+setheading, goto, fills and pen settings move exactly like a screen turtle,
+but nothing is drawn: pen-down paths, fills and dots are collected as
+vector items instead. A recorded scene renders straight to SVG, which makes
+previewing any `draw_*` function instant and needs no display:
+
+    t = record(draw_star, 80, "gold")
+    open("star.svg", "w").write(t.to_svg())
+
+The recorded geometry also gives a drawing's exact extent (bbox), so a
+generator can place it where it fits before rendering anything
+(sample_offset).
+"""
+
+import turtle
+from html import escape
+
+from render_pipeline import RasterCanvas
+
+# How far a round pen cap may stick out of the canvas and still count as
+# inside: traffic_scene's full-width road overhangs by half its pen width
+OVERHANG = 1.0
+
+class StepLimitExceeded(BaseException):
+    """Raised when a recorded program makes more than `max_steps` moves.
+
+    A BaseException so that `except Exception` in the program cannot swallow it.
+    """
+
+class RecordingTurtle(turtle.TNavigator, turtle.TPen):
+    """Turtle stand-in that keeps a list of drawn items.
+
+    items: ("line", points, color, width), ("fill", points, color),
+    ("dot", (x, y), size, color); points are turtle coordinates (y up).
+    With `max_steps`, every move or turn counts as a step and the program
+    is stopped with StepLimitExceeded once it makes more.
+    """
+
+    def __init__(self, max_steps=None):
+        self.max_steps = max_steps
+        self.steps = 0
+        turtle.TNavigator.__init__(self)
+        turtle.TPen.__init__(self)
+        self.undobuffer = None
+        self.items = []
+        self._line = None
+        self._fill = None
+
+    def _step(self):
+        self.steps += 1
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise StepLimitExceeded(f"more than {self.max_steps} turtle steps")
+
+    # -- hooks TNavigator/TPen expect from RawTurtle --
+    def _update(self):
+        pass
+
+    def _tracer(self, *args):
+        return 0
+
+    def _delay(self, *args):
+        return 0
+
+    def _colorstr(self, args):
+        color = args[0] if len(args) == 1 else args
+        if isinstance(color, str):
+            return color
+        r, g, b = color
+        if max(r, g, b) <= 1.0:  # colormode 1.0; 255-scale tuples pass through
+            r, g, b = (round(255 * c) for c in (r, g, b))
+        return f"#{int(r):02x}{int(g):02x}{int(b):02x}"
+
+    def _color(self, cstr):
+        return cstr
+
+    def _newLine(self, usePos=True):
+        self._line = None
+
+    # -- recording --
+    def _rotate(self, angle):
+        self._step()
+        turtle.TNavigator._rotate(self, angle)
+
+    def _goto(self, end):
+        self._step()
+        start = (float(self._position[0]), float(self._position[1]))
+        self._position = end
+        point = (float(end[0]), float(end[1]))
+        if self._drawing:
+            if self._line is None:
+                self._line = ("line", [start], self._pencolor, self._pensize)
+                self.items.append(self._line)
+            self._line[1].append(point)
+        if self._fill is not None:
+            self._fill[1].append(point)
+
+    def pen(self, pen=None, **pendict):
+        # Any style change (or pen lift) starts a new polyline
+        result = turtle.TPen.pen(self, pen, **pendict)
+        if pen or pendict:
+            self._line = None
+        return result
+
+    def begin_fill(self):
+        # Tk draws the fill polygon under lines made while filling: keep its slot
+        self._fill = ["fill", [tuple(map(float, self._position))], self._fillcolor]
+        self.items.append(self._fill)
+        self._line = None
+
+    def end_fill(self):
+        if self._fill is not None:
+            _, points, color = self._fill
+            self.items[self.items.index(self._fill)] = ("fill", points, color)
+            self._fill = None
+
+    def filling(self):
+        return self._fill is not None
+
+    def dot(self, size=None, *color):
+        size = size or max(self._pensize + 4, 2 * self._pensize)
+        color = self._colorstr(color) if color else self._pencolor
+        self.items.append(("dot", tuple(map(float, self._position)), size, color))
+
+    def write(self, *args, **kwargs):
+        pass
+
+    def clear(self):
+        self.items = []
+        self._line = self._fill = None
+
+    def reset(self):
+        turtle.TNavigator.reset(self)
+        turtle.TPen._reset(self)
+        self.clear()
+
+    # -- output --
+    def strokes(self):
+        """Pen-down polylines in drawing order."""
+        return [item[1] for item in self.items if item[0] == "line"]
+
+    def bbox(self):
+        """(x0, y0, x1, y1) extent of everything drawn, pen widths and dot sizes included; None if empty."""
+        x0 = y0 = float("inf")
+        x1 = y1 = float("-inf")
+        for item in self.items:
+            if item[0] == "dot":
+                points, pad = [item[1]], item[2] / 2
+            else:
+                points, pad = item[1], (item[3] / 2 if item[0] == "line" else 0.0)
+            xs = [p[0] for p in points]
+            ys = [p[1] for p in points]
+            x0, y0 = min(x0, min(xs) - pad), min(y0, min(ys) - pad)
+            x1, y1 = max(x1, max(xs) + pad), max(y1, max(ys) + pad)
+        return None if x0 > x1 else (x0, y0, x1, y1)
+
+    def to_svg(self, width=600, height=600, stroke_order=False, background="white"):
+        """The recorded scene as one SVG string, canvas centered on (0, 0) like the turtle screen.
+
+        With `stroke_order`, each pen-down polyline gets its own hue (red first,
+        through the spectrum) and a dot at its start point.
+        """
+        def pts(points):
+            return " ".join(f"{x + width / 2:.1f},{height / 2 - y:.1f}" for x, y in points)
+
+        n_lines = sum(1 for item in self.items if item[0] == "line")
+        body, k = [], 0
+        for item in self.items:
+            if item[0] == "fill":
+                body.append(f'<polygon points="{pts(item[1])}" fill="{escape(item[2])}" fill-rule="evenodd"/>')
+            elif item[0] == "dot":
+                (x, y), size, color = item[1:]
+                body.append(f'<circle cx="{x + width / 2:.1f}" cy="{height / 2 - y:.1f}" r="{size / 2:.1f}" '
+                            f'fill="{escape(color)}"/>')
+            else:
+                color = escape(item[2])
+                if stroke_order:
+                    color = f"hsl({300 * k / max(n_lines - 1, 1):.0f},80%,45%)"
+                body.append(f'<polyline points="{pts(item[1])}" fill="none" stroke="{color}" '
+                            f'stroke-width="{item[3]}" stroke-linecap="round" stroke-linejoin="round"/>')
+                if stroke_order:
+                    x, y = item[1][0]
+                    r = max(item[3], 3)
+                    body.append(f'<circle cx="{x + width / 2:.1f}" cy="{height / 2 - y:.1f}" r="{r}" fill="{color}"/>')
+                k += 1
+        return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+                f'viewBox="0 0 {width} {height}"><rect width="100%" height="100%" fill="{background}"/>'
+                + "".join(body) + "</svg>")
+
+    def to_image(self, size=600, background="white"):
+        """Rasterize the recorded scene into an RGBA PIL image (square `size` or (width, height))."""
+        canvas = RasterCanvas(size, background)
+        for item in self.items:
+            if item[0] == "fill":
+                canvas.fill(item[1], item[2])
+            elif item[0] == "dot":
+                canvas.dot(item[1], item[2], item[3])
+            else:
+                canvas.polyline(item[1], item[3], item[2])
+        return canvas.image
+
+def sample_offset(box, width, height, rng):
+    """Uniform (dx, dy) that moves `box` anywhere fully inside a centered width x height canvas.
+
+    The feasible offsets form a rectangle, so sampling it never needs a
+    retry; returns None when the box cannot fit at all.
+    """
+    if box is None:  # nothing drawn: any position
+        box = (0.0, 0.0, 0.0, 0.0)
+    offset = []
+    for lo, hi, size in ((box[0], box[2], width), (box[1], box[3], height)):
+        low, high = -size / 2 - lo, size / 2 - hi
+        if low > high:
+            if low - high > 2 * OVERHANG:
+                return None
+            low = high = (low + high) / 2  # oversize by no more than the overhang: centered
+        offset.append(rng.uniform(low, high))
+    return tuple(offset)
+
+def record(draw, *args, **kwargs):
+    """Run `draw(t, *args, **kwargs)` on a fresh RecordingTurtle and return it."""
+    t = RecordingTurtle()
+    draw(t, *args, **kwargs)
+    return t